@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""离线端到端登录基准测试。
+
+在本地启动 OpenI / LinuxDO / AnyRouter 的模拟站点，把浏览器请求重定向过去，
+对 1..N 个账号分别测量冷启动（账号密码登录）与热启动（Cookie 登录）的各阶段耗时，
+输出 p50/p95。所有 Cookie、日志与截图写入临时数据目录，不影响 data/。
+
+使用示例：
+  python scripts/benchmark.py
+  python scripts/benchmark.py --site openi --accounts 5 --latency 120 --jitter 30
+  python scripts/benchmark.py --pool --json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 允许脚本直接运行时找到本地 src 包
+_HERE = Path(__file__).resolve().parent
+_ROOT = _HERE.parent
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="基于模拟站点的离线登录基准测试")
+    parser.add_argument("--site", choices=["openi", "linuxdo", "anyrouter", "all"], default="all", help="测试的站点")
+    parser.add_argument("--accounts", type=int, default=3, help="最大账号数 N，依次测量 1..N")
+    parser.add_argument("--latency", type=float, default=50.0, help="每个请求的模拟延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=10.0, help="延迟抖动范围（± 毫秒）")
+    parser.add_argument("--task-start", type=float, default=1000.0, help="OpenI 任务从 WAITING 到 RUNNING 的耗时（毫秒）")
+    parser.add_argument("--run-duration", type=int, default=1, help="OpenI 任务运行时长（秒）")
+    parser.add_argument("--pool", action="store_true", help="所有账号共享浏览器池")
+    parser.add_argument("--headed", action="store_true", help="以有头模式运行浏览器")
+    parser.add_argument("--seed", type=int, default=None, help="延迟抖动的随机种子")
+    parser.add_argument("--data-dir", type=Path, default=None, help="数据目录（默认使用临时目录）")
+    parser.add_argument("--json", dest="json_path", type=Path, default=None, help="把结果另存为 JSON")
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+
+    # 必须在导入 src 之前设置，项目路径在导入时确定
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="auto-bench-"))
+    os.environ["AUTO_DATA_DIR"] = str(data_dir)
+
+    from src.bench.runner import SITES, format_report, run_benchmark
+
+    sites = SITES if args.site == "all" else (args.site,)
+    report = run_benchmark(
+        sites,
+        max_accounts=args.accounts,
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        headless=not args.headed,
+        run_duration=args.run_duration,
+        task_start_ms=args.task_start,
+        use_pool=args.pool,
+        seed=args.seed,
+    )
+
+    print(format_report(report))
+    print(f"\n数据目录: {data_dir}（模拟请求 {report['_meta']['requests']} 次）")
+    if args.json_path:
+        args.json_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已写入: {args.json_path}")
+
+    failed = sum(
+        entry["runs"] - entry["ok"]
+        for site, phases in report.items() if not site.startswith("_")
+        for by_count in phases.values()
+        for entry in by_count.values()
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
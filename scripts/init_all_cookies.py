@@ -3,23 +3,28 @@
 
 - 读取 config/users.json
 - 为各站点/用户执行一次登录以生成 Cookie
-  * linuxdo: 通过 `xvfb-run python -m src linuxdo`
+  * linuxdo: 调用 LinuxdoLogin（有 DISPLAY 或 Xvfb 显示池时有头运行）
   * openi:   直接调用 OpeniLogin 执行账号密码登录
+- 启动任何浏览器之前先检查已保存的 Cookie（HTTP 探测），仍有效的账号直接跳过
+- 其余账号在独立子进程中并发处理（默认 3 workers），与刷新脚本共用 `ProcessRunner`；
+  同一站点的并发数受 `sites.<site>.rate_limit.max_concurrent` 或 `--site-cap` 限制
+- 终端上实时显示一行进度
 
 使用示例：
   python scripts/init_all_cookies.py
   python scripts/init_all_cookies.py --site linuxdo
   python scripts/init_all_cookies.py --site openi --user yls
+  python scripts/init_all_cookies.py --workers 6 --site-cap linuxdo=1 --site-cap openi=4
 """
 
 from __future__ import annotations
 
 import argparse
 import logging
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
 import sys
 import os
 
@@ -30,7 +35,12 @@ if str(_ROOT) not in sys.path:
     sys.path.insert(0, str(_ROOT))
 
 from src.core.config import UnifiedConfigManager
+from src.core.cookies import CookieManager
+from src.core.display import get_display_pool, use_display
+from src.core.executor import ProcessRunner, ProgressLine, load_group_caps, parse_group_caps
+from src.core.logger import init_worker_logging, start_worker_log_queue
 from src.core.paths import get_project_paths
+from src.core.probe import get_default_probe, get_probe_spec, merge_set_cookies
 
 
 def setup_logging() -> Path:
@@ -69,12 +79,21 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="初始化所有用户的 Cookie")
     parser.add_argument("--site", help="仅处理指定站点，例如 openi 或 linuxdo")
     parser.add_argument("--user", help="仅处理指定用户名/邮箱")
+    parser.add_argument("--workers", type=int, default=3, help="并发进程数，默认 3")
+    parser.add_argument("--timeout", type=float, default=300, help="单个账号的超时秒数，超时即终止，默认 300")
+    parser.add_argument(
+        "--site-cap",
+        action="append",
+        metavar="SITE=N",
+        help="单站点同时登录的账号数上限（可多次指定），默认读取 sites.<site>.rate_limit.max_concurrent",
+    )
+    parser.add_argument("--force", action="store_true", help="不检查已有 Cookie，全部重新处理")
     return parser.parse_args()
 
 
 def load_users_from_config(cfg_mgr: UnifiedConfigManager) -> Dict:
-    """使用 UnifiedConfigManager 读取配置原始数据。"""
-    data = cfg_mgr._load_once()
+    """使用 UnifiedConfigManager 读取配置原始数据（共享快照）。"""
+    data = cfg_mgr.snapshot().data
     if not isinstance(data, dict):
         return {"users": [], "config": {}}
     return data
@@ -98,33 +117,89 @@ def filter_users(users: Iterable[Dict], site: str | None, user_key: str | None)
     return result
 
 
-def run_linuxdo() -> bool:
-    """通过子进程运行 linuxdo 登录以生成 Cookie。"""
-    project_root = get_project_paths().root
-    cmd = ["xvfb-run", "python", "-m", "src", "linuxdo"]
+def cookie_site_name(user: Dict) -> str:
+    site = str(user.get("site", "")).lower()
+    if site == "openi":
+        return f"openi_{user.get('username') or ''}"
+    return site
+
+
+def cookie_expire_days(user: Dict, config_data: Dict) -> int:
+    """账号 Cookie 的有效期（天），探测跳过与实际登录共用同一取值。
+
+    OpenI 取 `config.cookie_expire_days`（与 OpeniLogin 运行时一致），其余站点取
+    `defaults.cookie_expire_days`，默认 30 天。
+    """
+    data = config_data if isinstance(config_data, dict) else {}
+    section = "config" if str(user.get("site", "")).lower() == "openi" else "defaults"
     try:
-        proc = subprocess.run(
-            cmd,
-            cwd=str(project_root),
-            timeout=180,
-            check=False,
-        )
-        return proc.returncode == 0
-    except FileNotFoundError:
-        logging.warning("未找到 xvfb-run，回退为直接运行 python -m src linuxdo")
+        return int((data.get(section) or {}).get("cookie_expire_days", 30))
+    except (TypeError, ValueError):
+        return 30
+
+
+def has_valid_cookies(cm: CookieManager, user: Dict, expire_days: int) -> bool:
+    """不启动浏览器判断账号是否已有有效 Cookie。
+
+    没有探测规则时以 Cookie 仍在有效期内为准；探测无法判断时视为无效，交给浏览器处理。
+    """
+    site_name = cookie_site_name(user)
+    cookies = cm.read_cookies(site_name, expire_days)
+    if not cookies:
+        return False
+    spec = get_probe_spec(site_name)
+    if spec is None:
+        return True
+    verdict, updates = get_default_probe().check(spec, cookies)
+    if verdict and merge_set_cookies(cookies, updates):
         try:
-            proc = subprocess.run(
-                ["python", "-m", "src", "linuxdo"],
-                cwd=str(project_root),
-                timeout=180,
-                check=False,
-            )
-            return proc.returncode == 0
+            cm.write_cookies(site_name, cookies)
+        except OSError as exc:
+            logging.warning("保存探测更新的 Cookie 失败: %s", exc)
+    return verdict is True
+
+
+def partition_targets(targets: List[Dict], config_data: Dict) -> Tuple[List[Dict], List[Dict]]:
+    """并发探测全部账号，返回 (需要登录的账号, 可跳过的账号)。"""
+    cm = CookieManager()
+
+    def check(user: Dict) -> bool:
+        try:
+            return has_valid_cookies(cm, user, cookie_expire_days(user, config_data))
         except Exception as exc:  # noqa: BLE001
-            logging.error(f"运行 linuxdo 登录失败: {exc}")
+            logging.warning("检查 %s 的 Cookie 失败: %s", user.get('username') or user.get('email'), exc)
             return False
+
+    with ThreadPoolExecutor(max_workers=min(8, max(1, len(targets)))) as pool:
+        valid = list(pool.map(check, targets))
+    pending = [u for u, ok in zip(targets, valid) if not ok]
+    skipped = [u for u, ok in zip(targets, valid) if ok]
+    return pending, skipped
+
+
+def run_linuxdo(user: Dict) -> bool:
+    """在当前进程内运行 LinuxDO 登录以生成 Cookie（已有有效 Cookie 时直接复用）。"""
+    try:
+        from src.sites.linuxdo.login import LinuxdoLogin
+    except Exception as exc:  # pragma: no cover
+        logging.error("导入 LinuxDO 模块失败: %s", exc)
+        return False
+
+    # LinuxDO 需要有头浏览器应对 Cloudflare；既没有 DISPLAY 也没有 Xvfb 显示池时退回无头模式
+    headless = not os.environ.get("DISPLAY") and get_display_pool() is None
+    if headless:
+        logging.warning("未检测到 DISPLAY，LinuxDO 将以无头模式运行（可能被 Cloudflare 拦截）")
+    try:
+        automation = LinuxdoLogin(headless=headless)
+        ok = automation.run(
+            use_cookie=True,
+            verify_url="https://linux.do/",
+            email=user.get("email"),
+            password=user.get("password"),
+        )
+        return bool(ok)
     except Exception as exc:  # noqa: BLE001
-        logging.error(f"运行 linuxdo 登录失败: {exc}")
+        logging.error("运行 linuxdo 登录失败: %s", exc)
         return False
 
 
@@ -134,15 +209,15 @@ def run_openi(user: Dict, config_data: Dict) -> bool:
         from src.sites.openi.login import OpeniLogin
         from src.sites.openi.config import load_config
     except Exception as exc:  # pragma: no cover
-        logging.error(f"导入 OpenI 模块失败: {exc}")
+        logging.error("导入 OpenI 模块失败: %s", exc)
         return False
 
     # 允许按需求加载配置（与现有实现保持一致）
     try:
         cfg = load_config()
-        cfg_config = cfg.get("config", {})
     except Exception:
-        cfg_config = config_data.get("config", {}) if isinstance(config_data, dict) else {}
+        cfg = config_data if isinstance(config_data, dict) else {}
+    cfg_config = cfg.get("config") or {}
 
     username = user.get("username")
     password = user.get("password")
@@ -152,7 +227,7 @@ def run_openi(user: Dict, config_data: Dict) -> bool:
 
     task_name = cfg_config.get("task_name", "image")
     run_duration = int(cfg_config.get("run_duration", 15))
-    cookie_expire_days = int(cfg_config.get("cookie_expire_days", 30))
+    expire_days = cookie_expire_days(user, cfg)
 
     try:
         automation = OpeniLogin(
@@ -161,25 +236,55 @@ def run_openi(user: Dict, config_data: Dict) -> bool:
             task_name=task_name,
             run_duration=run_duration,
             use_cookies=True,
-            cookie_expire_days=cookie_expire_days,
+            cookie_expire_days=expire_days,
         )
         # 为初始化 Cookie，若不存在 Cookie 会自动走账密并保存
         ok = automation.run(
             use_cookie=True,
             verify_url="https://git.openi.org.cn/dashboard",
-            cookie_expire_days=cookie_expire_days,
+            cookie_expire_days=expire_days,
             password=password,
         )
         return bool(ok)
     except Exception as exc:  # noqa: BLE001
-        logging.error(f"OpenI 用户 {username} 初始化失败: {exc}")
+        logging.error("OpenI 用户 %s 初始化失败: %s", username, exc)
+        return False
+
+
+def init_worker(log_queue, display: str | None) -> None:
+    """子进程初始化：日志发回主进程，有头浏览器使用主进程租用的 Xvfb 显示。"""
+    init_worker_logging(log_queue)
+    use_display(display)
+
+
+def init_single_user(user_data: tuple) -> bool:
+    """子进程执行的初始化函数，参数为 (user: Dict, config_data: Dict)。"""
+    user, config_data = user_data
+    site = str(user.get("site", "")).lower()
+    who = user.get("username") or user.get("email") or "<unknown>"
+    logging.info("开始处理: site=%s, 用户=%s", site, who)
+    try:
+        if site == "linuxdo":
+            return run_linuxdo(user)
+        if site == "openi":
+            return run_openi(user, config_data)
+        logging.warning("未知站点，跳过: %s", site)
+        return False
+    except Exception as exc:  # noqa: BLE001
+        logging.error("处理用户 %s 出错: %s", who, exc)
         return False
 
 
 def main() -> int:
     args = parse_args()
     log_file = setup_logging()
-    logging.info(f"日志文件: {log_file}")
+    logging.info("日志文件: %s", log_file)
+
+    try:
+        cap_overrides = parse_group_caps(args.site_cap)
+    except ValueError as exc:
+        logging.error(str(exc))
+        return 2
 
     cfg_mgr = UnifiedConfigManager()
     data = load_users_from_config(cfg_mgr)
@@ -193,32 +298,57 @@ def main() -> int:
         logging.warning("没有匹配到需要处理的用户")
         return 0
 
-    success, failed = 0, 0
-    for idx, user in enumerate(targets, 1):
-        site = str(user.get("site", "")).lower()
-        who = user.get("username") or user.get("email") or "<unknown>"
-        logging.info(f"[{idx}/{len(targets)}] 开始处理: site={site}, 用户={who}")
+    if args.force:
+        pending, already = list(targets), []
+    else:
+        pending, already = partition_targets(targets, data)
+    for user in already:
+        logging.info("[跳过] 已有有效 Cookie: %s", user.get('username') or user.get('email'))
+
+    success, failed, skipped = 0, 0, len(already)
+    progress = ProgressLine(len(targets))
+    progress.update(skipped, ok=success, failed=failed, skipped=skipped)
+    if not pending:
+        progress.finish()
+        logging.info("完成。成功 0 个，失败 0 个，跳过 %s 个", skipped)
+        return 0
 
+    def site_of(task: tuple) -> str:
+        return str(task[0].get("site", "")).lower()
+
+    tasks = [(user, data) for user in pending]
+    sites = {site_of(task) for task in tasks}
+    # 子进程日志经队列回到主进程统一写入，避免多进程同时追加同一文件
+    log_queue = start_worker_log_queue()
+    display = None
+    display_pool = get_display_pool()
+    if display_pool is not None and "linuxdo" in sites:
+        # 主进程启动 Xvfb，各子进程共享同一显示，而不是各自启动 X 服务器
         try:
-            if site == "linuxdo":
-                ok = run_linuxdo()
-            elif site == "openi":
-                ok = run_openi(user, data)
-            else:
-                logging.warning(f"未知站点，跳过: {site}")
-                ok = False
-        except Exception as exc:  # noqa: BLE001
-            logging.error(f"处理用户 {who} 出错: {exc}")
-            ok = False
-
-        if ok:
-            logging.info(f"处理成功: {who}")
+            display = display_pool.acquire()
+        except Exception as exc:
+            logging.warning("预启动 Xvfb 显示失败: %s", exc)
+    runner = ProcessRunner(
+        max_workers=args.workers or 3,
+        timeout=args.timeout if args.timeout and args.timeout > 0 else None,
+        group_caps=load_group_caps(sites, cap_overrides),
+        initializer=init_worker,
+        initargs=(log_queue, display),
+    )
+
+    for task in runner.run(init_single_user, tasks, group=site_of):
+        user = task.item[0]
+        who = user.get("username") or user.get("email") or "<unknown>"
+        if task.ok and task.value:
+            logging.info("处理成功: %s（%.1fs）", who, task.duration)
             success += 1
         else:
-            logging.error(f"处理失败: {who}")
+            logging.error("处理失败: %s（%s）", who, task.error or "登录未成功")
             failed += 1
+        progress.update(success + failed + skipped, ok=success, failed=failed, skipped=skipped, running=runner.active)
+    progress.finish()
 
-    logging.info(f"完成。成功 {success} 个，失败 {failed} 个")
+    logging.info("完成。成功 %s 个，失败 %s 个，跳过 %s 个", success, failed, skipped)
     return 0 if failed == 0 else 1
 
 
@@ -1,5 +1,5 @@
 #!/bin/bash
-# 初始化所有用户的Cookie（使用xvfb处理Cloudflare）
+# 初始化所有用户的Cookie（有头运行由 Xvfb 显示池提供显示）
 cd "$(dirname "$0")/.."
 source /root/miniconda3/bin/activate auto
 python scripts/init_all_cookies.py "$@"
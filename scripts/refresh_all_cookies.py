@@ -2,13 +2,19 @@
 """批量刷新多用户 Cookie 的脚本（并发版）
 
 - 检测各用户 Cookie 文件年龄
-- 超过阈值(>20天)或 --force 时触发登录刷新
+- 会话关键 Cookie 将在 3 天内过期时触发登录刷新；无真实过期时间时回退为年龄超过 20 天
+- --force 时无条件刷新
 - 支持 --dry-run 仅检测不执行刷新
-- 使用 ProcessPoolExecutor 并发处理（默认 3 workers）
+- 每个账号在独立子进程中并发处理（默认 3 workers），结果按完成顺序汇报
+- 单个账号超过 --timeout 秒即终止其进程（含浏览器）
+- 同一站点的并发数受 `sites.<site>.rate_limit.max_concurrent` 或 `--site-cap` 限制
+- 超时、人机验证等暂时性失败在子进程内退避重试；主进程汇总各站点结果驱动熔断器，
+  之后启动的子进程继承熔断状态，站点不可用时其余账号直接失败（见 `src.core.retry`）
 
 变更说明：
-- 将串行循环改为 `ProcessPoolExecutor` 并发执行。
+- 将串行循环改为多进程并发执行（`src.core.executor.ProcessRunner`）。
 - 提取 `refresh_single_user(user_data: tuple) -> dict` 便于子进程执行。
+- LinuxDO 刷新改为进程内直接调用 `LinuxdoLogin`，不再经 `xvfb-run python -m src linuxdo` 启动新解释器。
 """
 
 from __future__ import annotations
@@ -17,10 +23,9 @@ import argparse
 import logging
 import os
 import sys
-from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # 允许脚本直接执行时找到本地 src
 _HERE = os.path.dirname(os.path.abspath(__file__))
@@ -30,7 +35,19 @@ if _ROOT not in sys.path:
 
 from src.core.config import UnifiedConfigManager  # noqa: E402
 from src.core.cookies import CookieManager  # noqa: E402
+from src.core.display import get_display_pool, use_display  # noqa: E402
+from src.core.executor import ProcessRunner, ProgressLine, load_group_caps, parse_group_caps  # noqa: E402
+from src.core.logger import init_worker_logging, start_worker_log_queue  # noqa: E402
 from src.core.paths import get_project_paths  # noqa: E402
+from src.core.retry import (  # noqa: E402
+    CIRCUIT_OPEN,
+    TIMEOUT,
+    RetryOutcome,
+    export_breakers,
+    get_circuit_breaker,
+    restore_breakers,
+    run_with_retry,
+)
 
 
 def setup_logging() -> Path:
@@ -66,11 +83,18 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--site", help="仅处理指定站点，例如 openi 或 linuxdo")
     parser.add_argument("--user", help="仅处理指定用户名/邮箱")
     parser.add_argument("--workers", type=int, default=3, help="并发进程数，默认 3")
+    parser.add_argument("--timeout", type=float, default=300, help="单个账号的超时秒数，超时即终止，默认 300")
+    parser.add_argument(
+        "--site-cap",
+        action="append",
+        metavar="SITE=N",
+        help="单站点同时刷新的账号数上限（可多次指定），默认读取 sites.<site>.rate_limit.max_concurrent",
+    )
     return parser.parse_args()
 
 
 def load_users(cfg_mgr: UnifiedConfigManager) -> Dict:
-    data = cfg_mgr._load_once()
+    data = cfg_mgr.snapshot().data
     if not isinstance(data, dict):
         return {"users": [], "defaults": {}, "sites": {}}
     return data
@@ -93,47 +117,71 @@ def filter_users(users: Iterable[Dict], site: str | None, user_key: str | None)
     return result
 
 
-def cookie_info_for_user(user: Dict) -> Tuple[str, Path]:
-    cm = CookieManager()
+def cookie_info_for_user(user: Dict) -> Tuple[str, str]:
     site = str(user.get("site", "")).lower()
     if site == "openi":
         username = user.get("username") or ""
         site_name = f"openi_{username}"
     else:
         site_name = site or ""
-    return site, cm.get_cookie_path(site_name)
+    return site, site_name
 
 
-def file_age_days(path: Path) -> float:
-    stat = path.stat()
-    mtime = datetime.fromtimestamp(stat.st_mtime)
-    delta = datetime.now() - mtime
+# 关键 Cookie 剩余寿命低于该天数时刷新
+REFRESH_BEFORE_EXPIRY_DAYS = 3.0
+# 无法获取真实过期时间时，按保存天数刷新的阈值
+REFRESH_AGE_DAYS = 20.0
+
+
+def needs_refresh(cm: CookieManager, site_name: str) -> bool:
+    """优先依据关键 Cookie 的真实 `expires` 判断，其次回退到保存天数。"""
+    expiry = cm.get_expiry(site_name)
+    if expiry is not None:
+        remaining_days = (expiry - datetime.now().timestamp()) / 86400.0
+        return remaining_days < REFRESH_BEFORE_EXPIRY_DAYS
+    age = cookie_age_days(cm, site_name)
+    return (age is None) or (age > REFRESH_AGE_DAYS)
+
+
+def cookie_age_days(cm: CookieManager, site_name: str) -> Optional[float]:
+    """返回 Cookie 的保存天数；不存在时返回 None（兼容 JSON 与 SQLite 后端）。"""
+    saved_at = cm.get_saved_at(site_name)
+    if saved_at is None:
+        return None
+    delta = datetime.now() - saved_at
     return delta.total_seconds() / 86400.0
 
 
-def refresh_linuxdo(cookie_expire_override: int = 0) -> bool:
-    """使用 xvfb-run 包装统一 CLI，强制忽略旧 Cookie。"""
-    import subprocess
+def linuxdo_headless() -> bool:
+    """LinuxDO 需要有头浏览器应对 Cloudflare；既没有 DISPLAY 也没有 Xvfb 显示池时退回无头模式。"""
+    if os.environ.get("DISPLAY") or get_display_pool() is not None:
+        return False
+    logging.warning("未检测到 DISPLAY，LinuxDO 将以无头模式运行（可能被 Cloudflare 拦截）")
+    return True
+
 
-    cmd = ["xvfb-run", "python", "-m", "src", "linuxdo", "--no-cookie"]
+def refresh_linuxdo(user: Dict) -> RetryOutcome:
+    """在当前进程内强制重新登录 LinuxDO 并保存新 Cookie。"""
     try:
-        res = subprocess.run(cmd, cwd=str(get_project_paths().root), timeout=180, check=False)
-        return res.returncode == 0
-    except FileNotFoundError:
-        logging.error("未找到 xvfb-run，请先安装：apt-get update && apt-get install -y xvfb")
-        return False
-    except subprocess.TimeoutExpired:
-        logging.error("LinuxDO 刷新超时 (180s)")
-        return False
+        from src.sites.registry import refresh_account
+    except Exception as exc:  # pragma: no cover
+        logging.error("导入 LinuxDO 模块失败: %s", exc)
+        return RetryOutcome(ok=False)
+
+    try:
+        return refresh_account(user, headless=linuxdo_headless())
+    except Exception as exc:  # noqa: BLE001
+        logging.error("刷新 LinuxDO Cookie 失败: %s", exc)
+        return RetryOutcome(ok=False)
 
 
-def refresh_openi(user: Dict, config_data: Dict, cookie_expire_override: int = 0) -> bool:
+def refresh_openi(user: Dict, config_data: Dict, cookie_expire_override: int = 0) -> RetryOutcome:
     try:
         from src.sites.openi.login import OpeniLogin
         from src.sites.openi.config import load_config
     except Exception as exc:  # pragma: no cover
-        logging.error(f"导入 OpenI 模块失败: {exc}")
-        return False
+        logging.error("导入 OpenI 模块失败: %s", exc)
+        return RetryOutcome(ok=False)
 
     try:
         cfg = load_config()
@@ -147,7 +195,7 @@ def refresh_openi(user: Dict, config_data: Dict, cookie_expire_override: int = 0
     password = user.get("password")
     if not username or not password:
         logging.error("缺少 OpenI 用户名或密码")
-        return False
+        return RetryOutcome(ok=False)
 
     site_cfg = cfg_sites.get("openi", {}) if isinstance(cfg_sites, dict) else {}
     task_name = site_cfg.get("task_name", "image")
@@ -163,16 +211,29 @@ def refresh_openi(user: Dict, config_data: Dict, cookie_expire_override: int = 0
             use_cookies=True,
             cookie_expire_days=default_expire,
         )
-        ok = automation.run(
-            use_cookie=False,
-            verify_url="https://git.openi.org.cn/dashboard",
-            cookie_expire_days=cookie_expire_override,
-            password=password,
+        # 忽略旧 Cookie 重新登录，成功后保存新 Cookie
+        return run_with_retry(
+            "openi",
+            lambda: automation.run(
+                use_cookie=True,
+                force_login=True,
+                verify_url="https://git.openi.org.cn/dashboard",
+                cookie_expire_days=cookie_expire_override,
+                password=password,
+            ),
+            failure_class=lambda: automation.failure_class,
+            label=f"openi:{username}",
         )
-        return bool(ok)
     except Exception as exc:  # noqa: BLE001
-        logging.error(f"刷新 OpenI 用户 {username} Cookie 失败: {exc}")
-        return False
+        logging.error("刷新 OpenI 用户 %s Cookie 失败: %s", username, exc)
+        return RetryOutcome(ok=False)
+
+
+def init_worker(log_queue, display: str | None, breakers: Dict) -> None:
+    """子进程初始化：日志发回主进程，恢复主进程汇总的熔断状态，有头浏览器使用主进程租用的显示。"""
+    init_worker_logging(log_queue)
+    restore_breakers(breakers)
+    use_display(display)
 
 
 def refresh_single_user(user_data: tuple) -> Dict:
@@ -181,22 +242,17 @@ def refresh_single_user(user_data: tuple) -> Dict:
     参数打包为 tuple 以明确进程间传递：
         (user: Dict, config_data: Dict, force: bool, dry_run: bool)
 
-    返回结果字典：{"site", "who", "ok", "skipped"}
+    返回结果字典：{"site", "who", "ok", "skipped", "error_class"}
     """
     user, config_data, force, dry_run = user_data
-    site, cookie_path = cookie_info_for_user(user)
+    site, site_name = cookie_info_for_user(user)
     who = user.get("username") or user.get("email") or "<unknown>"
 
-    # 年龄检查（在子进程执行，减少主进程 I/O）
-    if not cookie_path.exists():
+    # 过期检查（在子进程执行，减少主进程 I/O）
+    try:
+        need_refresh = bool(force) or needs_refresh(CookieManager(), site_name)
+    except Exception:
         need_refresh = True
-        age = None
-    else:
-        try:
-            age = file_age_days(cookie_path)
-        except Exception:
-            age = None
-        need_refresh = (age is None) or (age > 20.0) or bool(force)
 
     if dry_run:
         return {"site": site, "who": who, "ok": need_refresh, "skipped": not need_refresh}
@@ -206,21 +262,27 @@ def refresh_single_user(user_data: tuple) -> Dict:
 
     try:
         if site == "linuxdo":
-            ok = refresh_linuxdo(cookie_expire_override=0)
+            outcome = refresh_linuxdo(user)
         elif site == "openi":
-            ok = refresh_openi(user, config_data, cookie_expire_override=0)
+            outcome = refresh_openi(user, config_data, cookie_expire_override=0)
         else:
-            ok = False
+            outcome = RetryOutcome(ok=False)
     except Exception:
-        ok = False
+        outcome = RetryOutcome(ok=False)
 
-    return {"site": site, "who": who, "ok": bool(ok), "skipped": False}
+    return {"site": site, "who": who, "ok": outcome.ok, "skipped": False, "error_class": outcome.error_class}
 
 
 def main() -> int:
     args = parse_args()
     log_file = setup_logging()
-    logging.info(f"日志文件: {log_file}")
+    logging.info("日志文件: %s", log_file)
+
+    try:
+        cap_overrides = parse_group_caps(args.site_cap)
+    except ValueError as exc:
+        logging.error(str(exc))
+        return 2
 
     cfg_mgr = UnifiedConfigManager()
     data = load_users(cfg_mgr)
@@ -236,46 +298,67 @@ def main() -> int:
 
     refreshed, skipped, failed = 0, 0, 0
 
-    # 并发提交任务
-    with ProcessPoolExecutor(max_workers=args.workers or 3) as executor:
-        futures = [
-            executor.submit(
-                refresh_single_user,
-                (user, data, args.force, args.dry_run),
-            )
-            for user in targets
-        ]
-
-        for idx, fut in enumerate(futures, 1):
-            try:
-                result = fut.result()
-            except Exception as exc:  # pragma: no cover
-                logging.error(f"任务[{idx}] 执行异常: {exc}")
-                failed += 1
-                continue
-
-            who = result.get("who")
-            site = result.get("site")
-            ok = result.get("ok")
-            was_skipped = result.get("skipped")
-
-            if args.dry_run:
-                logging.info(f"[Dry-Run] 用户={who} site={site} -> {'刷新' if ok else '跳过'}")
-                refreshed += 1 if ok else 0
-                skipped += 0 if ok else 1
-                continue
+    # 并发执行，按完成顺序处理结果；子进程日志经队列回到主进程统一写入，避免多进程同时追加同一文件
+    def site_of(task: tuple) -> str:
+        return str(task[0].get("site", "")).lower()
+
+    tasks = [(user, data, args.force, args.dry_run) for user in targets]
+    log_queue = start_worker_log_queue()
+    display = None
+    display_pool = get_display_pool()
+    if display_pool is not None and not args.dry_run and any(
+        str(u.get("site", "")).lower() == "linuxdo" for u in targets
+    ):
+        # 主进程启动 Xvfb，各子进程共享同一显示，而不是各自启动 X 服务器
+        try:
+            display = display_pool.acquire()
+        except Exception as exc:
+            logging.warning("预启动 Xvfb 显示失败: %s", exc)
+    runner = ProcessRunner(
+        max_workers=args.workers or 3,
+        timeout=args.timeout if args.timeout and args.timeout > 0 else None,
+        group_caps=load_group_caps({site_of(task) for task in tasks}, cap_overrides),
+        initializer=init_worker,
+        # 每次启动子进程时取熔断器的最新快照
+        initargs=lambda: (log_queue, display, export_breakers()),
+    )
+    progress = ProgressLine(len(tasks))
+    for task in runner.run(refresh_single_user, tasks, group=site_of):
+        user = task.item[0]
+        result = task.value if task.ok else {}
+        who = result.get("who")
+        site = result.get("site")
+        ok = result.get("ok")
+        was_skipped = result.get("skipped")
+
+        if not args.dry_run and (not task.ok or not was_skipped):
+            # 子进程各自的熔断器随进程结束丢弃，由主进程汇总；此后启动的子进程经 initargs 取得最新状态
+            error_class = TIMEOUT if task.timed_out else result.get("error_class")
+            if error_class != CIRCUIT_OPEN:
+                get_circuit_breaker(site_of(task.item)).record(bool(task.ok and ok), error_class)
+
+        if not task.ok:
+            who = user.get("username") or user.get("email") or "<unknown>"
+            logging.error("任务[%s] 用户=%s 执行异常: %s", task.index + 1, who, task.error)
+            failed += 1
+        elif args.dry_run:
+            logging.info("[Dry-Run] 用户=%s site=%s -> %s", who, site, '刷新' if ok else '跳过')
+            refreshed += 1 if ok else 0
+            skipped += 0 if ok else 1
+        elif was_skipped:
+            logging.info("[跳过] 用户=%s site=%s", who, site)
+            skipped += 1
+        elif ok:
+            logging.info("[完成] 用户=%s site=%s（%.1fs）", who, site, task.duration)
+            refreshed += 1
+        else:
+            logging.error("[失败] 用户=%s site=%s（%s）", who, site, result.get('error_class') or 'unknown')
+            failed += 1
+        progress.update(refreshed + skipped + failed, refreshed=refreshed, skipped=skipped, failed=failed,
+                        running=runner.active)
+    progress.finish()
 
-            if was_skipped:
-                logging.info(f"[跳过] 用户={who} site={site}")
-                skipped += 1
-            elif ok:
-                logging.info(f"[完成] 用户={who} site={site}")
-                refreshed += 1
-            else:
-                logging.error(f"[失败] 用户={who} site={site}")
-                failed += 1
-
-    logging.info(f"完成。刷新 {refreshed} 个，跳过 {skipped} 个，失败 {failed} 个")
+    logging.info("完成。刷新 %s 个，跳过 %s 个，失败 %s 个", refreshed, skipped, failed)
     return 0 if failed == 0 else 1
 
 
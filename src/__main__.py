@@ -6,6 +6,10 @@
   python -m src linuxdo             # 登录 linuxdo
   python -m src openi               # 根据配置登录所有 OpenI 用户
   python -m src openi --user yls    # 登录指定的 OpenI 用户
+  python -m src openi --concurrency 3  # 并发处理 3 个 OpenI 用户
+  python -m src daemon              # 常驻进程，按 Cookie 预测过期时间刷新
+  python -m src daemon --dry-run    # 仅打印刷新计划
+  python -m src run-all --headless  # 单进程执行全部站点的全部账号，输出 JSON 汇总
   python -m src --help              # 显示帮助
 
 该 CLI 作为对位于 `src/sites/<site>/login.py` 的各站点脚本的轻量封装，
@@ -80,8 +84,83 @@ def build_parser() -> argparse.ArgumentParser:
         dest="user",
         help="Specific OpenI username from config/users.json (default: all users)",
     )
+    sp_openi.add_argument(
+        "--engine",
+        choices=("sync", "async"),
+        default="sync",
+        help="Execution engine; 'async' drives accounts concurrently in one process",
+    )
+    sp_openi.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Number of accounts processed concurrently (default: config 'concurrency' or 1)",
+    )
+    sp_openi.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Start every account's cloud task first, then stop them all after one shared run window",
+    )
     sp_openi.set_defaults(handler=_handle_openi)
 
+    # daemon 子命令
+    sp_daemon = subparsers.add_parser(
+        "daemon",
+        help="Keep running and refresh cookies shortly before they expire",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    sp_daemon.add_argument("--site", default=None, help="Only schedule accounts of this site")
+    sp_daemon.add_argument(
+        "--max-workers",
+        dest="max_workers",
+        type=int,
+        default=None,
+        help="Refreshes running at the same time (default: config 'scheduler.max_workers' or 2)",
+    )
+    sp_daemon.add_argument(
+        "--headed",
+        action="store_true",
+        help="Run refresh logins with a visible browser (default: headless)",
+    )
+    sp_daemon.add_argument(
+        "--dry-run",
+        dest="dry_run",
+        action="store_true",
+        help="Print the refresh schedule and exit",
+    )
+    sp_daemon.set_defaults(handler=_handle_daemon)
+
+    # run-all 子命令
+    sp_all = subparsers.add_parser(
+        "run-all",
+        help="Run every configured account of every site in one process and print a JSON summary",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    _add_common_options(sp_all)
+    sp_all.add_argument(
+        "--site",
+        dest="sites",
+        action="append",
+        default=None,
+        help="Only run accounts of this site (repeatable; default: all sites)",
+    )
+    sp_all.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Jobs running at the same time (default: config 'concurrency' or 4)",
+    )
+    sp_all.add_argument(
+        "--site-cap",
+        dest="site_cap",
+        action="append",
+        metavar="SITE=N",
+        help="Per-site concurrency cap (default: sites.<site>.rate_limit.max_concurrent)",
+    )
+    sp_all.add_argument("--timeout", type=float, default=300, help="Per-job timeout in seconds (0 disables)")
+    sp_all.add_argument("--json", dest="json_path", default=None, help="Also write the JSON summary to this file")
+    sp_all.set_defaults(handler=_handle_run_all)
+
     return parser
 
 
@@ -125,6 +204,9 @@ def _handle_linuxdo(args: argparse.Namespace) -> int:
 
 
 def _handle_openi(args: argparse.Namespace) -> int:
+    if args.engine == "async":
+        return _handle_openi_async(args)
+
     # 若未指定具体用户，则调用现有的多用户主流程
     if not args.user:
         try:
@@ -134,8 +216,7 @@ def _handle_openi(args: argparse.Namespace) -> int:
             return 2
 
         try:
-            openi_main()
-            return 0
+            return int(openi_main(concurrency=args.concurrency, pipeline=args.pipeline or None))
         except SystemExit as e:
             return int(e.code) if e.code is not None else 1
         except Exception as exc:
@@ -196,9 +277,131 @@ def _handle_openi(args: argparse.Namespace) -> int:
         return 1
 
 
+def _handle_openi_async(args: argparse.Namespace) -> int:
+    try:
+        import asyncio
+        from src.sites.openi.async_login import run_users
+        from src.sites.openi.config import load_config
+    except Exception as exc:  # pragma: no cover - 覆盖率忽略
+        print(f"Failed to import openi async engine: {exc}")
+        return 2
+
+    try:
+        cfg = load_config()
+    except Exception as exc:
+        print(f"Failed to load OpenI config: {exc}")
+        return 1
+
+    users = [u for u in cfg.get("users", []) or [] if str(u.get("site", "openi")).lower() == "openi"]
+    if args.user:
+        users = [u for u in users if u.get("username") == args.user]
+    if not users:
+        print("No matching OpenI users in config/users.json")
+        return 1
+
+    config = cfg.get("config", {})
+    defaults = cfg.get("defaults") or {}
+    cookie_expire_days = int(config.get("cookie_expire_days", 7))
+    results = asyncio.run(run_users(
+        users,
+        concurrency=args.concurrency or int(config.get("concurrency", defaults.get("concurrency", 4))),
+        headless=args.headless,
+        task_name=config.get("task_name", "image"),
+        run_duration=int(config.get("run_duration", 15)),
+        use_cookies=not args.no_cookie,
+        cookie_expire_days=cookie_expire_days,
+    ))
+
+    failed = [u.get("username") for u, ok in zip(users, results) if not ok]
+    print(f"OpenI async: total={len(users)} success={len(users) - len(failed)} failed={len(failed)}")
+    if failed:
+        print(f"Failed users: {', '.join(failed)}")
+    return 0 if not failed else 1
+
+
+def _handle_daemon(args: argparse.Namespace) -> int:
+    try:
+        import signal
+        from datetime import datetime
+        from src.core.config import UnifiedConfigManager
+        from src.core.scheduler import RefreshScheduler
+        from src.sites.registry import refresh_account
+    except Exception as exc:  # pragma: no cover - 覆盖率忽略
+        print(f"Failed to import refresh scheduler: {exc}")
+        return 2
+
+    def load_users() -> list:
+        # 配置文件修改后快照自动重新加载，便于在守护进程运行期间增删账号
+        cfg = UnifiedConfigManager()
+        return cfg.get_all_users(args.site) if args.site else cfg.get_users()
+
+    headless = not args.headed
+    scheduler = RefreshScheduler(
+        load_users,
+        refresh=lambda user: refresh_account(user, headless=headless),
+        options={"max_workers": args.max_workers},
+    )
+
+    if args.dry_run:
+        scheduler.rescan()
+        for key, due in scheduler.schedule_table():
+            print(f"{key:<28} {datetime.fromtimestamp(due):%Y-%m-%d %H:%M:%S}")
+        return 0
+
+    def _stop(_signum, _frame) -> None:
+        scheduler.stop()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    scheduler.run_forever()
+    return 0
+
+
+def _handle_run_all(args: argparse.Namespace) -> int:
+    try:
+        import asyncio
+        import json
+        from src.core.executor import parse_group_caps
+        from src.core.logger import shutdown_logging
+        from src.sites.run_all import run_all
+    except Exception as exc:  # pragma: no cover - 覆盖率忽略
+        print(f"Failed to import run-all engine: {exc}")
+        return 2
+
+    try:
+        site_caps = parse_group_caps(args.site_cap)
+    except ValueError as exc:
+        print(exc)
+        return 2
+
+    summary = asyncio.run(run_all(
+        headless=args.headless,
+        use_cookie=not args.no_cookie,
+        sites=args.sites,
+        concurrency=args.concurrency,
+        site_caps=site_caps,
+        timeout=args.timeout if args.timeout and args.timeout > 0 else None,
+    ))
+    text = json.dumps(summary, ensure_ascii=False)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    # 汇总固定为标准输出的最后一行，便于 cron/脚本解析：
+    # 日志经后台线程异步输出，先停止监听线程写完队列中的记录，再打印汇总
+    shutdown_logging()
+    sys.stderr.flush()
+    print(text, flush=True)
+    if not summary["total"]:
+        return 1
+    return 0 if summary["failed"] == 0 and summary["skipped"] == 0 else 1
+
+
 def main(argv: Optional[list[str]] = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
+    # 指定单个用户时只处理一个账号，并发与流水线参数不会生效，直接报错而不是静默忽略
+    if args.site == "openi" and args.user and (args.concurrency is not None or args.pipeline):
+        parser.error("openi: --concurrency/--pipeline cannot be combined with --user")
 
     handler = getattr(args, "handler", None)
     if handler is None:
@@ -0,0 +1,5 @@
+"""离线基准测试：本地模拟站点与端到端登录耗时统计。"""
+
+from src.bench.mock_sites import MOCK_HOSTS, MockSiteServer
+
+__all__ = ["MOCK_HOSTS", "MockSiteServer"]
@@ -0,0 +1,467 @@
+"""离线模拟站点：在本地 HTTP 服务器上复刻 OpenI / LinuxDO / AnyRouter 的登录流程。
+
+只复刻自动化脚本实际依赖的元素（选择器与跳转），用于在无网络的环境下测量
+端到端登录耗时：
+
+- OpenI：首页 ` 登录` 链接、`用户名/邮箱/手机号` 与 `密码` 输入框、`个人信息和配置` 菜单、
+  仪表盘弹窗（`notRemindAgain`）、云脑任务表格（STOPPED → WAITING → RUNNING → STOPPING → STOPPED）；
+- LinuxDO：`#login-button` 与 `#login-account-name` 登录表单、OAuth 授权同意页；
+- AnyRouter：公告弹窗、`使用 LinuxDO 继续` 按钮（弹出授权窗口）、OAuth 回调与控制台。
+
+浏览器仍访问真实域名，由 `install(context)` 注册的路由把请求转发到本地服务器；
+其余域名的请求一律中止，保证完全离线。每个请求在响应前按 `latency_ms ± jitter_ms`
+休眠，用于模拟网络延迟。页面跳转与 Cookie 写入均在页面脚本中完成，不依赖 3xx 响应。
+"""
+
+from __future__ import annotations
+
+import html
+import json
+import random
+import threading
+import time
+import uuid
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+OPENI_HOST = "git.openi.org.cn"
+LINUXDO_HOST = "linux.do"
+ANYROUTER_HOST = "anyrouter.top"
+MOCK_HOSTS = (OPENI_HOST, LINUXDO_HOST, ANYROUTER_HOST)
+
+# 各站点的会话 Cookie 名称
+_OPENI_COOKIE = "i_like_gitea"
+_LINUXDO_COOKIE = "_t"
+_ANYROUTER_COOKIE = "session"
+_COOKIE_MAX_AGE = 30 * 24 * 3600
+
+Response = Tuple[int, str, bytes]
+
+
+def _page(title: str, body: str, script: str = "") -> Response:
+    doc = (
+        "<!doctype html><html><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title></head><body>{body}"
+        + (f"<script>{script}</script>" if script else "")
+        + "</body></html>"
+    )
+    return 200, "text/html; charset=utf-8", doc.encode("utf-8")
+
+
+def _redirect(url: str, cookies: Optional[Dict[str, str]] = None) -> Response:
+    """返回由脚本完成跳转（并写入 Cookie）的页面。"""
+    lines = [
+        f"document.cookie = {json.dumps(f'{name}={value}; path=/; max-age={_COOKIE_MAX_AGE}')};"
+        for name, value in (cookies or {}).items()
+    ]
+    lines.append(f"location.replace({json.dumps(url)});")
+    return _page("跳转中", "", "\n".join(lines))
+
+
+def _json(payload: object, status: int = 200) -> Response:
+    return status, "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+class _TaskState:
+    """单个 OpenI 用户的云脑任务状态，状态迁移按时间推算。"""
+
+    def __init__(self) -> None:
+        self.action: Optional[str] = None
+        self.since = 0.0
+
+    def status(self, start_ms: float, stop_ms: float) -> str:
+        elapsed = (time.monotonic() - self.since) * 1000.0
+        if self.action == "start":
+            return "RUNNING" if elapsed >= start_ms else "WAITING"
+        if self.action == "stop":
+            return "STOPPED" if elapsed >= stop_ms else "STOPPING"
+        return "STOPPED"
+
+    def set(self, action: str) -> None:
+        self.action = action
+        self.since = time.monotonic()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server 约定
+        self._serve("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._serve("POST")
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _serve(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        site = self.server.site
+        site.delay()
+        host, _, rest = self.path.lstrip("/").partition("/")
+        parts = urlsplit("/" + rest)
+        cookies = {k: v.value for k, v in SimpleCookie(self.headers.get("Cookie") or "").items()}
+        try:
+            status, content_type, payload = site.dispatch(
+                method, host, parts.path, parse_qs(parts.query), parse_qs(body.decode("utf-8", "replace")), cookies
+            )
+        except Exception as exc:  # 模拟站点自身异常时返回 500，便于在报告中暴露
+            status, content_type, payload = 500, "text/plain; charset=utf-8", str(exc).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, site: "MockSiteServer") -> None:
+        super().__init__(address, _Handler)
+        self.site = site
+
+
+class MockSiteServer:
+    """三个站点的本地模拟服务器（后台线程运行）。
+
+    用法：
+
+        with MockSiteServer(latency_ms=80, jitter_ms=20) as server:
+            automation.context_hooks.append(server.install)
+            automation.run(...)
+    """
+
+    def __init__(
+        self,
+        *,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        task_name: str = "image",
+        task_start_ms: float = 1000.0,
+        task_stop_ms: float = 500.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.jitter_ms = max(0.0, float(jitter_ms))
+        self.task_name = task_name
+        self.task_start_ms = float(task_start_ms)
+        self.task_stop_ms = float(task_stop_ms)
+        self.requests = 0
+        self._address = (host, port)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, _TaskState] = {}
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # 生命周期 -----------------------------------------------------------
+    def start(self) -> "MockSiteServer":
+        if self._server is None:
+            self._server = _Server(self._address, self)
+            self._thread = threading.Thread(target=self._server.serve_forever, name="mock-sites", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> "MockSiteServer":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("MockSiteServer 尚未启动")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # 浏览器接入 ---------------------------------------------------------
+    def local_url(self, url: str) -> Optional[str]:
+        """把真实站点 URL 映射为本地服务器地址；非模拟域名返回 None。"""
+        parts = urlsplit(url)
+        if parts.hostname not in MOCK_HOSTS:
+            return None
+        query = f"?{parts.query}" if parts.query else ""
+        return f"{self.base_url}/{parts.hostname}{parts.path or '/'}{query}"
+
+    def install(self, context) -> None:
+        """在同步 API 的浏览器上下文上注册转发路由（可直接作为 `context_hooks` 使用）。"""
+
+        def _handle(route, request) -> None:
+            local = self.local_url(request.url)
+            if local is None:
+                route.abort()
+                return
+            try:
+                headers = {k: v for k, v in request.all_headers().items() if not k.startswith(":")}
+                response = route.fetch(url=local, headers=headers, max_redirects=0)
+            except Exception:
+                route.abort()
+                return
+            route.fulfill(response=response)
+
+        context.route("**/*", _handle)
+
+    def delay(self) -> None:
+        with self._lock:
+            self.requests += 1
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        seconds = max(0.0, self.latency_ms + jitter) / 1000.0
+        if seconds:
+            time.sleep(seconds)
+
+    def task_status(self, username: str) -> str:
+        with self._lock:
+            state = self._tasks.setdefault(username, _TaskState())
+            return state.status(self.task_start_ms, self.task_stop_ms)
+
+    # 路由分发 -----------------------------------------------------------
+    def dispatch(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        query: Dict[str, List[str]],
+        form: Dict[str, List[str]],
+        cookies: Dict[str, str],
+    ) -> Response:
+        if host == OPENI_HOST:
+            return self._openi(method, path, query, form, cookies)
+        if host == LINUXDO_HOST:
+            return self._linuxdo(method, path, query, form, cookies)
+        if host == ANYROUTER_HOST:
+            return self._anyrouter(path, query, cookies)
+        return 404, "text/plain", b"unknown host"
+
+    # OpenI --------------------------------------------------------------
+    def _openi(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, List[str]],
+        form: Dict[str, List[str]],
+        cookies: Dict[str, str],
+    ) -> Response:
+        user = cookies.get(_OPENI_COOKIE)
+        if path == "/user/login" and method == "POST":
+            username = (form.get("user_name") or [""])[0]
+            if not username or not (form.get("password") or [""])[0]:
+                return self._openi_login_form("用户名或密码不正确")
+            return _redirect(f"https://{OPENI_HOST}/dashboard", {_OPENI_COOKIE: quote(username)})
+        if path == "/user/login":
+            return self._openi_login_form()
+        if path == "/":
+            return _page(
+                "OpenI 启智社区",
+                '<div class="menu"><a href="/explore">探索</a>'
+                '<a href="/user/login"><i class="sign in icon"></i> 登录</a></div>',
+            )
+        if user is None:
+            return _redirect(f"https://{OPENI_HOST}/user/login")
+        if path == "/dashboard":
+            return self._openi_dashboard(user)
+        if path == "/cloudbrains":
+            return self._openi_cloudbrains(user)
+        if path.startswith("/api/cloudbrain/") and method == "POST":
+            action = path.rsplit("/", 1)[-1]
+            if action not in ("start", "stop"):
+                return _json({"error": "unknown action"}, 404)
+            with self._lock:
+                self._tasks.setdefault(user, _TaskState()).set(action)
+            return _json({"status": self.task_status(user)})
+        # 与 `src.sites.openi.task_api.DEFAULT_ENDPOINTS` 对应的接口模式
+        if path == "/api/v1/cloudbrains":
+            name = (query.get("q") or [""])[0]
+            tasks = []
+            if name and name in self.task_name:
+                tasks.append({
+                    "ID": 1,
+                    "DisplayJobName": self.task_name,
+                    "Status": self.task_status(user),
+                    "Repo": {"OwnerName": user, "Name": "bench"},
+                })
+            return _json({"tasks": tasks})
+        if path in (f"/{user}/bench/cloudbrain/1/restart", f"/{user}/bench/cloudbrain/1/stop") and method == "POST":
+            action = "start" if path.endswith("/restart") else "stop"
+            with self._lock:
+                self._tasks.setdefault(user, _TaskState()).set(action)
+            return _json({"result_code": "0", "status": self.task_status(user)})
+        return 404, "text/plain", b"not found"
+
+    @staticmethod
+    def _openi_login_form(error: str = "") -> Response:
+        return _page(
+            "登录 - OpenI",
+            (f'<div class="error">{html.escape(error)}</div>' if error else "")
+            + '<form method="post" action="/user/login">'
+            '<input type="text" name="user_name" aria-label="用户名/邮箱/手机号" placeholder="用户名/邮箱/手机号">'
+            '<input type="password" name="password" aria-label="密码" placeholder="密码">'
+            '<button type="submit">登录</button></form>',
+        )
+
+    @staticmethod
+    def _openi_dashboard(user: str) -> Response:
+        body = (
+            f'<div role="menu" aria-label="个人信息和配置">{html.escape(user)}</div>'
+            '<a href="/cloudbrains">云脑任务</a>'
+            "<p>42 total contributions in the last 12 months</p>"
+            "<h2>项目列表</h2>"
+            '<div id="notice" style="position:fixed;inset:30% 30%;background:#fff;border:1px solid #999;display:none">'
+            '<p>平台公告</p><label><input type="checkbox" name="notRemindAgain">不再提醒</label>'
+            '<button id="notice-close">关闭</button></div>'
+        )
+        script = (
+            "var n = document.getElementById('notice');"
+            "if (!localStorage.getItem('notRemindAgain')) { n.style.display = 'block'; }"
+            "document.querySelector('[name=notRemindAgain]').addEventListener('change', function (e) {"
+            " if (e.target.checked) { localStorage.setItem('notRemindAgain', '1'); } });"
+            "document.getElementById('notice-close').addEventListener('click', function () { n.style.display = 'none'; });"
+        )
+        return _page("控制面板 - OpenI", body, script)
+
+    def _openi_cloudbrains(self, user: str) -> Response:
+        name = html.escape(self.task_name)
+        status = self.task_status(user)
+        body = (
+            '<input type="text" aria-label="搜索任务名称" placeholder="搜索任务名称">'
+            '<table><tbody>'
+            f'<tr data-name="{name}"><td>{name}</td><td id="status">{status}</td>'
+            '<td><a href="#" id="debug">再次调试</a> <a href="#" id="stop">停止</a></td></tr>'
+            "</tbody></table>"
+        )
+        script = (
+            f"var startMs = {self.task_start_ms:.0f}, stopMs = {self.task_stop_ms:.0f};"
+            "var cell = document.getElementById('status');"
+            "function settle(pending, done, ms) {"
+            " setTimeout(function () { if (cell.textContent === pending) { cell.textContent = done; } }, ms); }"
+            "function act(action, pending, done, ms) {"
+            " cell.textContent = pending;"
+            " fetch('/api/cloudbrain/' + action, {method: 'POST'});"
+            " settle(pending, done, ms); }"
+            "document.getElementById('debug').addEventListener('click', function (e) {"
+            " e.preventDefault(); act('start', 'WAITING', 'RUNNING', startMs); });"
+            "document.getElementById('stop').addEventListener('click', function (e) {"
+            " e.preventDefault(); act('stop', 'STOPPING', 'STOPPED', stopMs); });"
+            "settle('WAITING', 'RUNNING', startMs); settle('STOPPING', 'STOPPED', stopMs);"
+            "document.querySelector('[aria-label=搜索任务名称]').addEventListener('keydown', function (e) {"
+            " if (e.key !== 'Enter') { return; } var q = e.target.value;"
+            " document.querySelectorAll('tr[data-name]').forEach(function (row) {"
+            "  row.style.display = row.dataset.name.indexOf(q) >= 0 ? '' : 'none'; }); });"
+        )
+        return _page("云脑任务 - OpenI", body, script)
+
+    # LinuxDO ------------------------------------------------------------
+    def _linuxdo(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, List[str]],
+        form: Dict[str, List[str]],
+        cookies: Dict[str, str],
+    ) -> Response:
+        token = cookies.get(_LINUXDO_COOKIE)
+        if path == "/session" and method == "POST":
+            login = (form.get("login") or [""])[0]
+            if not login or not (form.get("password") or [""])[0]:
+                return self._linuxdo_login_form("", "用户名或密码不正确")
+            target = (form.get("next") or [f"https://{LINUXDO_HOST}/"])[0]
+            return _redirect(target, {_LINUXDO_COOKIE: uuid.uuid4().hex})
+        if path == "/session/current.json":
+            return _json({"current_user": {"username": "bench"}}) if token else _json({"error": "not logged in"}, 404)
+        if path == "/login":
+            return self._linuxdo_login_form((query.get("next") or [""])[0])
+        if path == "/oauth2/authorize":
+            current = f"https://{LINUXDO_HOST}/oauth2/authorize?" + "&".join(
+                f"{k}={quote(v[0], safe='')}" for k, v in query.items()
+            )
+            if token is None:
+                return self._linuxdo_login_form(current)
+            redirect_uri = (query.get("redirect_uri") or [f"https://{ANYROUTER_HOST}/oauth/linuxdo"])[0]
+            allow = f"{redirect_uri}?code={uuid.uuid4().hex}"
+            return _page(
+                "授权 - LINUX DO",
+                "<p>AnyRouter 请求访问你的账号</p>"
+                '<label><input type="checkbox" name="remember">记住这次授权</label>'
+                f'<a href="{html.escape(allow)}">允许</a> <a href="https://{ANYROUTER_HOST}/login">拒绝</a>',
+            )
+        if path == "/":
+            if token is None:
+                return _redirect(f"https://{LINUXDO_HOST}/login")
+            return _page("LINUX DO", '<div class="topic-list"><a href="/t/1">欢迎来到 LINUX DO</a></div>')
+        return 404, "text/plain", b"not found"
+
+    @staticmethod
+    def _linuxdo_login_form(next_url: str, error: str = "") -> Response:
+        body = (
+            '<button id="login-button" class="login-button">登录</button>'
+            + (f'<div class="alert">{html.escape(error)}</div>' if error else "")
+            + '<form id="login-form" method="post" action="/session" style="display:none">'
+            f'<input type="hidden" name="next" value="{html.escape(next_url)}">'
+            '<input id="login-account-name" name="login" placeholder="邮箱/用户名">'
+            '<input id="login-account-password" name="password" type="password">'
+            '<button type="submit">登录</button></form>'
+        )
+        script = (
+            "document.getElementById('login-button').addEventListener('click', function () {"
+            " document.getElementById('login-form').style.display = 'block'; });"
+        )
+        return _page("登录 - LINUX DO", body, script)
+
+    # AnyRouter ----------------------------------------------------------
+    def _anyrouter(self, path: str, query: Dict[str, List[str]], cookies: Dict[str, str]) -> Response:
+        session = cookies.get(_ANYROUTER_COOKIE)
+        console = f"https://{ANYROUTER_HOST}/console/token"
+        if path == "/oauth/linuxdo":
+            if not query.get("code"):
+                return _redirect(f"https://{ANYROUTER_HOST}/login")
+            return _redirect(console, {_ANYROUTER_COOKIE: uuid.uuid4().hex})
+        if path == "/api/user/self":
+            return _json({"success": bool(session)}, 200 if session else 401)
+        if path in ("/", "/login"):
+            if session:
+                return _redirect(console)
+            authorize = (
+                f"https://{LINUXDO_HOST}/oauth2/authorize?client_id=anyrouter&response_type=code"
+                f"&redirect_uri={quote(f'https://{ANYROUTER_HOST}/oauth/linuxdo', safe='')}"
+            )
+            body = (
+                f'<button id="oauth">使用 LinuxDO 继续</button>'
+                '<div id="announcement" role="dialog" style="position:fixed;inset:0;background:rgba(0,0,0,.4)">'
+                '<div style="background:#fff;margin:20% auto;width:300px"><p>系统公告</p>'
+                '<button class="close">今日关闭</button><button class="close">关闭公告</button></div></div>'
+            )
+            script = (
+                f"document.getElementById('oauth').addEventListener('click', function () {{"
+                f" window.open({json.dumps(authorize)}, '_blank'); }});"
+                "document.querySelectorAll('#announcement .close').forEach(function (b) {"
+                " b.addEventListener('click', function () {"
+                "  document.getElementById('announcement').style.display = 'none'; }); });"
+            )
+            return _page("登录 - AnyRouter", body, script)
+        if path.startswith("/console"):
+            if not session:
+                return _redirect(f"https://{ANYROUTER_HOST}/login")
+            return _page(
+                "令牌 - AnyRouter",
+                "<header><button>linuxdo_10001</button></header>"
+                "<table><tr><td>default</td><td>sk-bench</td></tr></table>",
+            )
+        return 404, "text/plain", b"not found"
+
+
+__all__ = ["MOCK_HOSTS", "MockSiteServer"]
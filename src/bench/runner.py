@@ -0,0 +1,252 @@
+"""基于模拟站点的端到端登录基准测试。
+
+对每个站点依次运行 1..N 个账号，每一轮先做冷启动（空 Cookie 目录，走账号密码登录），
+再做热启动（复用上一步保存的登录状态）。各阶段耗时复用 `SpanRecorder` 写入的 span，
+汇总为 p50/p95：
+
+    {"openi": {"cold": {"1": {"wall_ms": ..., "runs": 1, "ok": 1,
+                              "phases": {"do_login": {"count": 1, "p50_ms": ..., "p95_ms": ...}}}}}}
+
+基准测试会写入 Cookie 与日志，必须在隔离的数据目录中运行（设置 `AUTO_DATA_DIR`），
+推荐通过 `scripts/benchmark.py` 启动。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from src.bench.mock_sites import ANYROUTER_HOST, LINUXDO_HOST, OPENI_HOST, MockSiteServer
+from src.core.browser import BrowserPool
+from src.core.cookies import CookieManager
+from src.core.logger import setup_logger
+from src.core.metrics import SpanRecorder
+from src.core.paths import get_project_paths
+
+logger = setup_logger("bench", get_project_paths().logs / "bench.log")
+
+SITES = ("openi", "linuxdo", "anyrouter")
+PHASES = ("cold", "warm")
+
+_VERIFY_URLS = {
+    "openi": f"https://{OPENI_HOST}/dashboard",
+    "linuxdo": f"https://{LINUXDO_HOST}/",
+    "anyrouter": f"https://{ANYROUTER_HOST}/console/token",
+}
+
+
+@dataclass
+class BenchRun:
+    site: str
+    accounts: int
+    phase: str
+    run_id: str
+    ok: bool
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """最近秩法百分位数；空序列返回 0。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def ensure_isolated() -> Path:
+    """确认数据目录已通过 `AUTO_DATA_DIR` 隔离，避免覆盖真实 Cookie。"""
+    if not os.environ.get("AUTO_DATA_DIR"):
+        raise RuntimeError("基准测试需要隔离的数据目录，请设置 AUTO_DATA_DIR 或使用 scripts/benchmark.py")
+    return get_project_paths().data
+
+
+def _make_automation(site: str, index: int, *, headless: bool, run_duration: int, task_name: str):
+    if site == "openi":
+        from src.sites.openi.login import OpeniLogin
+        return OpeniLogin(
+            f"bench{index}",
+            headless=headless,
+            task_name=task_name,
+            run_duration=run_duration,
+        ), {"password": "bench"}
+    if site == "linuxdo":
+        from src.sites.linuxdo.login import LinuxdoLogin
+        return LinuxdoLogin(headless=headless), {"email": "bench@example.com", "password": "bench"}
+    if site == "anyrouter":
+        from src.sites.anyrouter.login import AnyrouterLogin
+        return AnyrouterLogin(headless=headless), {}
+    raise ValueError(f"未知站点: {site}")
+
+
+def _seed_linuxdo_session() -> None:
+    """AnyRouter 通过 LinuxDO OAuth 登录：预置模拟站点的 LinuxDO 会话，跳过凭据填写。"""
+    CookieManager().write_cookies("linuxdo", [{
+        "name": "_t",
+        "value": "bench",
+        "domain": LINUXDO_HOST,
+        "path": "/",
+        "expires": time.time() + 30 * 86400,
+        "httpOnly": False,
+        "secure": False,
+        "sameSite": "Lax",
+    }])
+
+
+def _run_once(
+    site: str,
+    index: int,
+    cookie_dir: Path,
+    *,
+    server: MockSiteServer,
+    metrics_path: Path,
+    pool: Optional[BrowserPool],
+    headless: bool,
+    run_duration: int,
+) -> tuple:
+    automation, credentials = _make_automation(
+        site, index, headless=headless, run_duration=run_duration, task_name=server.task_name
+    )
+    automation.cookie_manager = CookieManager(cookie_dir)
+    # HTTP 探测会直接访问真实域名，离线测量时关闭
+    automation.cookie_probe = False
+    automation.browser_manager.pool = pool
+    automation.spans = SpanRecorder(automation.site_name, metrics_path)
+    automation.context_hooks.append(server.install)
+    try:
+        ok = bool(automation.run(use_cookie=True, verify_url=_VERIFY_URLS[site], **credentials))
+    except Exception as exc:
+        logger.warning("%s 第 %s 个账号运行异常: %s", site, index, exc)
+        ok = False
+    return automation.spans.run_id, ok
+
+
+def run_benchmark(
+    sites: Iterable[str] = SITES,
+    *,
+    max_accounts: int = 3,
+    latency_ms: float = 50.0,
+    jitter_ms: float = 10.0,
+    headless: bool = True,
+    run_duration: int = 1,
+    task_start_ms: float = 1000.0,
+    use_pool: bool = False,
+    seed: Optional[int] = None,
+) -> Dict:
+    """运行基准测试并返回按站点/冷热/账号数汇总的结果。"""
+    work_dir = ensure_isolated() / "bench"
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    metrics_path = work_dir / f"metrics_{stamp}.jsonl"
+    runs: List[BenchRun] = []
+    walls: Dict[tuple, float] = {}
+
+    with MockSiteServer(latency_ms=latency_ms, jitter_ms=jitter_ms, task_start_ms=task_start_ms, seed=seed) as server:
+        pool = BrowserPool() if use_pool else None
+        try:
+            for site in sites:
+                if site == "anyrouter":
+                    _seed_linuxdo_session()
+                for accounts in range(1, max(1, max_accounts) + 1):
+                    for phase in PHASES:
+                        started = time.perf_counter()
+                        for index in range(1, accounts + 1):
+                            # 每个账号独立的 Cookie 目录：冷启动时为空，热启动复用冷启动保存的状态
+                            cookie_dir = work_dir / stamp / "cookies" / f"{site}_n{accounts}_a{index}"
+                            run_id, ok = _run_once(
+                                site, index, cookie_dir,
+                                server=server, metrics_path=metrics_path, pool=pool,
+                                headless=headless, run_duration=run_duration,
+                            )
+                            runs.append(BenchRun(site, accounts, phase, run_id, ok))
+                        walls[(site, phase, accounts)] = time.perf_counter() - started
+                        logger.info(
+                            "%s %s n=%s 完成，耗时 %.1fs", site, phase, accounts, walls[(site, phase, accounts)]
+                        )
+        finally:
+            if pool is not None:
+                pool.close()
+        requests = server.requests
+
+    report = summarize(runs, walls, metrics_path)
+    report["_meta"] = {
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "max_accounts": max_accounts,
+        "pool": use_pool,
+        "requests": requests,
+        "metrics": str(metrics_path),
+    }
+    return report
+
+
+def _load_spans(metrics_path: Path) -> Dict[str, List[Dict]]:
+    by_run: Dict[str, List[Dict]] = defaultdict(list)
+    try:
+        with metrics_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                by_run[record.get("run_id", "")].append(record)
+    except OSError:
+        pass
+    return by_run
+
+
+def summarize(runs: Sequence[BenchRun], walls: Dict[tuple, float], metrics_path: Path) -> Dict:
+    """把各次运行的 span 聚合为 p50/p95。"""
+    spans = _load_spans(metrics_path)
+    grouped: Dict[tuple, List[BenchRun]] = defaultdict(list)
+    for run in runs:
+        grouped[(run.site, run.phase, run.accounts)].append(run)
+
+    report: Dict = {}
+    for (site, phase, accounts), items in grouped.items():
+        durations: Dict[str, List[float]] = defaultdict(list)
+        for run in items:
+            for record in spans.get(run.run_id, ()):
+                durations[record["span"]].append(float(record.get("duration_ms", 0.0)))
+        report.setdefault(site, {}).setdefault(phase, {})[str(accounts)] = {
+            "runs": len(items),
+            "ok": sum(1 for run in items if run.ok),
+            "wall_ms": round(walls.get((site, phase, accounts), 0.0) * 1000.0, 1),
+            "phases": {
+                name: {
+                    "count": len(values),
+                    "p50_ms": percentile(values, 50),
+                    "p95_ms": percentile(values, 95),
+                }
+                for name, values in sorted(durations.items())
+            },
+        }
+    return report
+
+
+def format_report(report: Dict) -> str:
+    """把 `run_benchmark` 的结果格式化为终端表格。"""
+    lines: List[str] = []
+    for site, phases in report.items():
+        if site.startswith("_"):
+            continue
+        for phase, by_count in phases.items():
+            for accounts, entry in sorted(by_count.items(), key=lambda kv: int(kv[0])):
+                lines.append(
+                    f"[{site}] {phase} n={accounts}: 成功 {entry['ok']}/{entry['runs']}，"
+                    f"总耗时 {entry['wall_ms'] / 1000.0:.1f}s"
+                )
+                for name, stats in entry["phases"].items():
+                    lines.append(
+                        f"    {name:<24} x{stats['count']:<3} p50 {stats['p50_ms']:>9.1f} ms"
+                        f"   p95 {stats['p95_ms']:>9.1f} ms"
+                    )
+    return "\n".join(lines)
+
+
+__all__ = ["SITES", "PHASES", "BenchRun", "percentile", "ensure_isolated", "run_benchmark", "summarize", "format_report"]
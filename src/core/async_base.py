@@ -0,0 +1,293 @@
+"""登录自动化的 asyncio 版本
+
+与 `src.core.base.LoginAutomation` 保持相同的编排逻辑，但基于
+`playwright.async_api`，使单个进程可以并发驱动多个账号的页面：
+- `AsyncBrowserManager` 在多个会话间共享一个 Playwright 驱动与浏览器；
+- `AsyncLoginAutomation` 的 `verify_login`/`do_login`/`after_login`/`run` 均为协程。
+"""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from playwright.async_api import Page, async_playwright
+
+from src.core.cookies import CookieManager
+from src.core.routing import ResourcePolicy, RouteStats
+from src.core.screenshots import ScreenshotRecorder
+from src.core.async_waits import wait_for_dom_quiet
+from src.core.display import lease_display, release_display
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+
+
+class AsyncBrowserManager:
+    """共享的异步浏览器管理器。
+
+    同一启动参数只启动一个 Chromium，每个会话仅获得独立的上下文。
+    可作为 `async with` 上下文管理器使用，退出时关闭全部浏览器。
+    """
+
+    def __init__(self) -> None:
+        self._playwright_cm = None
+        self._playwright = None
+        self._browsers: Dict[Tuple, Any] = {}
+        self._displays: Dict[Tuple, Optional[str]] = {}
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncBrowserManager":
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        await self.close()
+
+    async def new_context(
+        self,
+        *,
+        headless: bool = False,
+        launch_kwargs: Optional[Dict[str, Any]] = None,
+        context_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        """返回 `(browser, context)`，按需启动对应启动参数的浏览器。"""
+        browser = await self._get_browser(headless, dict(launch_kwargs or {}))
+        return browser, await browser.new_context(**(context_kwargs or {}))
+
+    async def close(self) -> None:
+        """关闭所有浏览器并停止 Playwright 驱动。"""
+        async with self._lock:
+            for browser in list(self._browsers.values()):
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+            self._browsers.clear()
+            for display in self._displays.values():
+                release_display(display)
+            self._displays.clear()
+            if self._playwright_cm is not None:
+                try:
+                    await self._playwright_cm.__aexit__(None, None, None)
+                except Exception:
+                    pass
+                self._playwright_cm = None
+                self._playwright = None
+
+    async def save_error_screenshot(self, page, filename: Optional[str]) -> bool:
+        """捕获截图以便排查故障。"""
+        if page is None or not filename:
+            return False
+
+        try:
+            path = Path(filename)
+            if not path.is_absolute():
+                path = (get_project_paths().screenshots / path).resolve()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            await page.screenshot(path=str(path))
+            return True
+        except Exception:
+            return False
+
+    async def _get_browser(self, headless: bool, launch_kwargs: Dict[str, Any]):
+        key = (bool(headless), repr(sorted(launch_kwargs.items())))
+        async with self._lock:
+            if self._playwright_cm is None:
+                self._playwright_cm = async_playwright()
+                self._playwright = await self._playwright_cm.__aenter__()
+            browser = self._browsers.get(key)
+            if browser is None or not browser.is_connected():
+                release_display(self._displays.pop(key, None))
+                launch_kwargs = dict(launch_kwargs)
+                # 启动 Xvfb 会阻塞，放到线程中执行
+                display = await asyncio.to_thread(lease_display, headless, launch_kwargs)
+                self._displays[key] = display
+                browser = await self._playwright.chromium.launch(headless=headless, **launch_kwargs)
+                self._browsers[key] = browser
+            return browser
+
+
+class AsyncLoginAutomation(abc.ABC):
+    """`LoginAutomation` 的异步孪生版本。"""
+
+    def __init__(
+        self,
+        site_name: str,
+        *,
+        headless: bool = False,
+        cookie_dir: Optional[Path] = None,
+        browser_kwargs: Optional[Dict[str, Any]] = None,
+        context_kwargs: Optional[Dict[str, Any]] = None,
+        cookie_expire_days: int = 30,
+        browser_manager: Optional[AsyncBrowserManager] = None,
+        resource_policy: Optional[ResourcePolicy] = None,
+    ) -> None:
+        self.site_name = site_name
+        self.headless = headless
+        self.browser_kwargs = browser_kwargs or {}
+        self.context_kwargs = context_kwargs or {}
+        self.cookie_expire_days = cookie_expire_days
+        self.resource_policy = resource_policy or ResourcePolicy.for_site(site_name)
+        self.route_stats: Optional[RouteStats] = None
+        safe_name = site_name.replace("/", "_").replace("\\", "_")
+        self.screenshots = ScreenshotRecorder.for_site(
+            site_name, get_project_paths().screenshots / f"{safe_name}_debug"
+        )
+
+        self.cookie_manager = CookieManager(cookie_dir)
+        # 未传入共享管理器时，本实例独占一个管理器并在 run 结束时关闭
+        self._owns_browser_manager = browser_manager is None
+        self.browser_manager = browser_manager or AsyncBrowserManager()
+
+        logs_dir = get_project_paths().logs
+        self.logger = setup_logger(
+            f"login.{site_name}",
+            logs_dir / f"login_{site_name}.log",
+        )
+
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.logged_in_with_cookies = False
+        self.state_injected = False
+        # 登录成功后、上下文关闭前的 `storage_state`，供依赖本会话的任务直接使用
+        self.session_state: Optional[Dict[str, Any]] = None
+
+    async def try_cookie_login(
+        self,
+        page: Page,
+        *,
+        verify_url: Optional[str] = None,
+        expire_days: Optional[int] = None,
+    ) -> bool:
+        """尝试使用先前保存的 Cookie 进行认证。"""
+        effective_expire_days = self.cookie_expire_days if expire_days is None else expire_days
+
+        if not self.state_injected:
+            cookies = self.cookie_manager.read_cookies(self.site_name, effective_expire_days)
+            if not cookies:
+                return False
+            try:
+                await page.context.add_cookies(cookies)
+            except Exception as e:
+                self.logger.warning("加载 Cookie 失败: %s", e)
+                return False
+
+        if verify_url:
+            try:
+                await page.goto(verify_url, timeout=60000)
+                await page.wait_for_load_state("domcontentloaded")
+            except Exception as e:
+                self.logger.warning("跳转验证页失败: %s", e)
+        else:
+            try:
+                await page.reload()
+            except Exception as e:
+                self.logger.warning("页面刷新失败: %s", e)
+
+        await wait_for_dom_quiet(page, timeout=2000)
+
+        return await self.verify_login(page)
+
+    @abc.abstractmethod
+    async def verify_login(self, page: Page) -> bool:
+        """当页面反映出已认证的会话时返回 True。"""
+
+    @abc.abstractmethod
+    async def do_login(self, page: Page, **credentials) -> bool:
+        """执行交互式登录流程并返回是否成功。"""
+
+    async def after_login(self, page: Page, **credentials) -> None:
+        """供子类在登录后执行自动化步骤的钩子。"""
+
+    async def run(
+        self,
+        *,
+        use_cookie: bool = True,
+        verify_url: Optional[str] = None,
+        cookie_expire_days: Optional[int] = None,
+        **credentials,
+    ) -> bool:
+        """执行完整的登录流程。"""
+        login_success = False
+        self.logged_in_with_cookies = False
+        self.session_state = None
+
+        expire_days = self.cookie_expire_days if cookie_expire_days is None else cookie_expire_days
+
+        context_kwargs = self.context_kwargs
+        self.state_injected = False
+        if use_cookie and "storage_state" not in context_kwargs:
+            state = self.cookie_manager.read_storage_state(self.site_name, expire_days)
+            if state:
+                context_kwargs = {**context_kwargs, "storage_state": state}
+                self.state_injected = True
+
+        try:
+            self.browser, self.context = await self.browser_manager.new_context(
+                headless=self.headless,
+                launch_kwargs=self.browser_kwargs,
+                context_kwargs=context_kwargs,
+            )
+            if self.resource_policy is not None and self.resource_policy.applies_to(self.headless):
+                try:
+                    self.route_stats = await self.resource_policy.install_async(self.context)
+                except Exception as e:
+                    self.logger.warning("安装资源拦截规则失败: %s", e)
+            self.page = await self.context.new_page()
+
+            if use_cookie and await self.try_cookie_login(self.page, verify_url=verify_url, expire_days=expire_days):
+                login_success = True
+                self.logged_in_with_cookies = True
+            else:
+                login_success = await self.do_login(self.page, **credentials)
+                self.logged_in_with_cookies = False
+
+            if login_success:
+                await self.after_login(self.page, **credentials)
+                try:
+                    self.session_state = await self.context.storage_state()
+                except Exception as e:
+                    self.logger.warning("读取 storage_state 失败: %s", e)
+                if use_cookie and self.session_state is not None:
+                    try:
+                        self.cookie_manager.write_cookies(
+                            self.site_name,
+                            self.session_state.get("cookies") or [],
+                            origins=self.session_state.get("origins") or [],
+                        )
+                    except Exception as e:
+                        self.logger.warning("保存 storage_state 失败: %s", e)
+
+            if login_success:
+                self.screenshots.discard()
+            else:
+                await self.screenshots.fail_async(self.page, "login_failed")
+            return login_success
+        except Exception:
+            await self.browser_manager.save_error_screenshot(self.page, self._error_screenshot_path())
+            self.screenshots.flush()
+            raise
+        finally:
+            try:
+                if self.context is not None:
+                    await self.context.close()
+            except Exception as e:
+                self.logger.warning("关闭浏览器上下文失败: %s", e)
+
+            if self.route_stats is not None:
+                self.logger.info("资源拦截: %s", self.route_stats.summary())
+                self.route_stats = None
+
+            if self._owns_browser_manager:
+                await self.browser_manager.close()
+            self.browser = None
+            self.context = None
+            self.page = None
+
+    def _error_screenshot_path(self) -> str:
+        """为失败情况创建一个文件系统安全的截图路径。"""
+        safe_name = self.site_name.replace("/", "_").replace("\\", "_")
+        screenshots_dir = get_project_paths().screenshots
+        return str((screenshots_dir / f"{safe_name}_error_screenshot.png").resolve())
@@ -0,0 +1,40 @@
+"""在单个进程内并发运行多个异步登录会话的驱动。"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, List, Sequence
+
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+
+
+logger = setup_logger("async_runner", get_project_paths().logs / "async_runner.log")
+
+SessionFactory = Callable[[], Awaitable[bool]]
+
+
+async def run_sessions(factories: Sequence[SessionFactory], *, concurrency: int = 4) -> List[bool]:
+    """在信号量限制下并发执行会话，按输入顺序返回各自是否成功。
+
+    每个工厂在获得信号量后才被调用，异常视为失败，不会中断其他会话。
+    """
+    semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def _guarded(index: int, factory: SessionFactory) -> bool:
+        async with semaphore:
+            try:
+                return bool(await factory())
+            except Exception as exc:
+                logger.error("会话[%s] 执行异常: %s", index, exc)
+                return False
+
+    return list(await asyncio.gather(*(_guarded(i, f) for i, f in enumerate(factories, 1))))
+
+
+def run_concurrently(factories: Sequence[SessionFactory], *, concurrency: int = 4) -> List[bool]:
+    """同步入口：启动事件循环并运行 `run_sessions`。"""
+    return asyncio.run(run_sessions(factories, concurrency=concurrency))
+
+
+__all__ = ["SessionFactory", "run_sessions", "run_concurrently"]
@@ -0,0 +1,86 @@
+"""`src.core.waits` 的 asyncio 版本，语义与返回值保持一致。"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable, Optional, Union
+
+from playwright.async_api import Page, Response
+
+from src.core.waits import DOM_QUIET_SCRIPT, UrlPredicate
+
+
+async def wait_for_url_change(page: Page, old_url: Optional[str] = None, *, timeout: float = 10000) -> bool:
+    previous = page.url if old_url is None else old_url
+    return await wait_for_url_match(page, lambda url: url != previous, timeout=timeout)
+
+
+async def wait_for_url_match(page: Page, url: UrlPredicate, *, timeout: float = 10000) -> bool:
+    try:
+        await page.wait_for_url(url, timeout=timeout, wait_until="commit")
+        return True
+    except Exception:
+        return False
+
+
+async def wait_for_selector(page: Page, selector: str, *, state: str = "visible", timeout: float = 5000) -> bool:
+    try:
+        await page.locator(selector).first.wait_for(state=state, timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+async def wait_for_any_selector(page: Page, selectors: Iterable[str], *, timeout: float = 5000) -> Optional[str]:
+    candidates = [s for s in selectors if s]
+    if not candidates or not await wait_for_selector(page, ", ".join(candidates), timeout=timeout):
+        return None
+    for selector in candidates:
+        try:
+            if await page.locator(selector).first.is_visible():
+                return selector
+        except Exception:
+            continue
+    return candidates[0]
+
+
+async def wait_for_response(
+    page: Page,
+    match: Union[str, Callable[[Response], bool]],
+    *,
+    timeout: float = 10000,
+) -> Optional[Response]:
+    predicate = match if callable(match) else (lambda resp: match in resp.url)
+    try:
+        return await page.wait_for_event("response", predicate=predicate, timeout=timeout)
+    except Exception:
+        return None
+
+
+async def wait_for_dom_quiet(page: Page, *, quiet: float = 300, timeout: float = 3000) -> bool:
+    try:
+        return bool(await page.evaluate(DOM_QUIET_SCRIPT, [quiet, timeout]))
+    except Exception:
+        try:
+            await page.wait_for_load_state("domcontentloaded", timeout=timeout)
+        except Exception:
+            pass
+        return False
+
+
+async def wait_for_network_idle(page: Page, *, timeout: float = 3000) -> bool:
+    try:
+        await page.wait_for_load_state("networkidle", timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+__all__ = [
+    "wait_for_url_change",
+    "wait_for_url_match",
+    "wait_for_selector",
+    "wait_for_any_selector",
+    "wait_for_response",
+    "wait_for_dom_quiet",
+    "wait_for_network_idle",
+]
@@ -9,20 +9,32 @@
 from __future__ import annotations
 
 import abc
+import time
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from playwright.sync_api import Page
 
-from src.core.browser import BrowserManager
+from src.core.browser import BrowserManager, BrowserPool, apply_storage_state
 from src.core.cookies import CookieManager
 from src.core.logger import setup_logger
+from src.core.metrics import SpanRecorder
 from src.core.paths import get_project_paths
+from src.core.probe import get_default_probe, get_probe_spec, merge_set_cookies
+from src.core.profiles import ProfileManager
+from src.core.retry import classify_error, classify_page
+from src.core.routing import ResourcePolicy, RouteStats
+from src.core.screenshots import ScreenshotRecorder
+from src.core.waits import wait_for_dom_quiet
 
 
 class LoginAutomation(abc.ABC):
     """交互式登录流程的通用编排逻辑。"""
 
+    # 登录后是否仍需浏览器完成后续步骤；为 False 的站点在 HTTP 探测确认
+    # Cookie 有效时可完全跳过浏览器启动。
+    requires_browser_after_login: bool = True
+
     def __init__(
         self,
         site_name: str,
@@ -32,15 +44,38 @@ class LoginAutomation(abc.ABC):
         browser_kwargs: Optional[Dict[str, Any]] = None,
         context_kwargs: Optional[Dict[str, Any]] = None,
         cookie_expire_days: int = 30,  # 默认改为 30 天
+        browser_pool: Optional[BrowserPool] = None,
+        cookie_probe: bool = True,
+        resource_policy: Optional[ResourcePolicy] = None,
+        profiles: Optional[ProfileManager] = None,
     ) -> None:
         self.site_name = site_name
         self.headless = headless
         self.browser_kwargs = browser_kwargs or {}
         self.context_kwargs = context_kwargs or {}
         self.cookie_expire_days = cookie_expire_days
+        self.cookie_probe = cookie_probe
+        # 未显式传入时读取 `block_resources` 配置；None 表示不拦截
+        self.resource_policy = resource_policy or ResourcePolicy.for_site(site_name)
+        self.route_stats: Optional[RouteStats] = None
+        # 未显式传入时读取 `persistent_profile` 配置；None 表示每次使用临时上下文
+        self.profiles = profiles or ProfileManager.for_site(site_name)
+        self.profile_dir: Optional[Path] = None
+        # 上下文创建后、打开页面前依次调用的钩子（参数为 context），
+        # 例如基准测试把站点请求重定向到本地模拟服务器
+        self.context_hooks: List[Callable[[Any], None]] = []
+        # 分阶段计时，写入 data/logs/metrics.jsonl
+        self.spans = SpanRecorder(site_name)
+        self._run_started: Optional[float] = None
+        # 调试截图：内存环形缓冲，仅在运行失败时由后台线程写入 <screenshots>/<site>_debug/
+        safe_name = site_name.replace("/", "_").replace("\\", "_")
+        self.screenshots = ScreenshotRecorder.for_site(
+            site_name, get_project_paths().screenshots / f"{safe_name}_debug"
+        )
 
         self.cookie_manager = CookieManager(cookie_dir)
-        self.browser_manager = BrowserManager()
+        # 传入 browser_pool 时复用池内浏览器，仅为本账号创建独立上下文
+        self.browser_manager = BrowserManager(pool=browser_pool)
 
         # 初始化站点级日志器：login.<site_name>
         logs_dir = get_project_paths().logs
@@ -53,6 +88,12 @@ class LoginAutomation(abc.ABC):
         self.context = None
         self.page = None
         self.logged_in_with_cookies = False
+        # 本次上下文是否已通过 `storage_state` 注入 cookies 与 localStorage
+        self.state_injected = False
+        # 最近一次运行失败的类别（见 src.core.retry），成功时为 None
+        self.failure_class: Optional[str] = None
+        # 站点 `do_login` 自行捕获并返回 False 时记录的异常，供失败分类区分超时与凭据被拒
+        self.last_error: Optional[BaseException] = None
 
     def try_cookie_login(
         self,
@@ -64,27 +105,59 @@ class LoginAutomation(abc.ABC):
         """尝试使用先前保存的 Cookie 进行认证。"""
         effective_expire_days = self.cookie_expire_days if expire_days is None else expire_days
 
-        if not self.cookie_manager.load_cookies(page.context, self.site_name, effective_expire_days):
-            return False
+        # 上下文创建时已注入 storage_state 的情况下无需再次 add_cookies
+        if not self.state_injected:
+            with self.spans.span("cookie_load") as span:
+                loaded = self.cookie_manager.load_cookies(page.context, self.site_name, effective_expire_days)
+                span.set("ok" if loaded else "missing")
+            if not loaded:
+                return False
 
-        if verify_url:
-            try:
-                page.goto(verify_url, timeout=60000)
-                page.wait_for_load_state("domcontentloaded")
-            except Exception as e:  # 记录失败原因，避免静默
-                self.logger.warning(f"跳转验证页失败: {e}")
-        else:
-            try:
-                page.reload()
-            except Exception as e:
-                self.logger.warning(f"页面刷新失败: {e}")
+        with self.spans.span("verify_navigation") as span:
+            if verify_url:
+                try:
+                    page.goto(verify_url, timeout=60000)
+                    page.wait_for_load_state("domcontentloaded")
+                except Exception as e:  # 记录失败原因，避免静默
+                    span.set("failed")
+                    self.logger.warning("跳转验证页失败: %s", e)
+            else:
+                try:
+                    page.reload()
+                except Exception as e:
+                    span.set("failed")
+                    self.logger.warning("页面刷新失败: %s", e)
 
-        try:
-            page.wait_for_timeout(2000)
-        except Exception as e:
-            self.logger.warning(f"等待页面稳定失败: {e}")
+            # 等待页面渲染稳定（DOM 静默），最多 2 秒
+            wait_for_dom_quiet(page, timeout=2000)
+
+        with self.spans.span("verify_login") as span:
+            valid = self.verify_login(page)
+            span.set("ok" if valid else "invalid")
+        return valid
 
-        return self.verify_login(page)
+    def probe_cookies(self, expire_days: Optional[int] = None) -> Optional[bool]:
+        """不启动浏览器，通过 HTTP 探测已保存 Cookie 是否仍有效。
+
+        返回 True/False；没有探测规则、没有 Cookie 或无法判断时返回 None。
+        探测响应中下发的新 Cookie 会合并回存储，保持滚动会话的更新。
+        """
+        spec = get_probe_spec(self.site_name)
+        if spec is None:
+            return None
+
+        effective_expire_days = self.cookie_expire_days if expire_days is None else expire_days
+        cookies = self.cookie_manager.read_cookies(self.site_name, effective_expire_days)
+        if not cookies:
+            return None
+
+        verdict, updates = get_default_probe().check(spec, cookies)
+        if verdict and merge_set_cookies(cookies, updates):
+            try:
+                self.cookie_manager.write_cookies(self.site_name, cookies)
+            except OSError as e:
+                self.logger.warning("保存探测更新的 Cookie 失败: %s", e)
+        return verdict
 
     @abc.abstractmethod
     def verify_login(self, page: Page) -> bool:
@@ -103,48 +176,164 @@ class LoginAutomation(abc.ABC):
         use_cookie: bool = True,
         verify_url: Optional[str] = None,
         cookie_expire_days: Optional[int] = None,
+        keep_open: bool = False,
+        force_login: bool = False,
         **credentials,
     ) -> bool:
-        """执行完整的登录流程。"""
+        """执行完整的登录流程。
+
+        `keep_open=True` 且登录成功时不关闭浏览器上下文，调用方需在后续步骤完成后调用 `close()`。
+        `force_login=True` 时忽略已保存的 Cookie 直接走交互式登录，成功后仍按 `use_cookie` 保存新状态（用于刷新）。
+        """
         login_success = False
+        keep_session = False
         self.logged_in_with_cookies = False
+        self.failure_class = None
+        self.last_error = None
+        self.spans.new_run()
+        self._run_started = time.perf_counter()
 
         expire_days = self.cookie_expire_days if cookie_expire_days is None else cookie_expire_days
 
+        probe_verdict = None
+        if use_cookie and self.cookie_probe and not force_login:
+            with self.spans.span("cookie_probe") as span:
+                probe_verdict = self.probe_cookies(expire_days)
+                span.set(str(probe_verdict).lower())
+            self.logger.info("HTTP 探测 Cookie 结果: %s", probe_verdict)
+            if probe_verdict and not self.requires_browser_after_login and not keep_open:
+                # 会话有效且无需后续浏览器步骤：完全跳过浏览器
+                self.logged_in_with_cookies = True
+                self._end_run("ok", browser=False)
+                return True
+
+        # 探测已确认失效时跳过 Cookie 验证导航，直接走交互式登录
+        cookie_usable = use_cookie and not force_login and probe_verdict is not False
+        context_kwargs = self.context_kwargs
+        self.state_injected = False
+        state = None
+        if cookie_usable and "storage_state" not in context_kwargs:
+            # 创建上下文时直接注入 cookies + localStorage，页面打开即为已登录状态
+            with self.spans.span("cookie_load", injected=True) as span:
+                state = self.cookie_manager.read_storage_state(self.site_name, expire_days)
+                span.set("ok" if state else "missing")
+
         try:
-            self.browser = self.browser_manager.launch(headless=self.headless, **self.browser_kwargs)
-            self.context = self.browser.new_context(**self.context_kwargs)
-            self.page = self.context.new_page()
+            if self.profiles is not None:
+                self.profile_dir = self.profiles.lease(self.site_name)
+            if state and self.profile_dir is None:
+                context_kwargs = {**context_kwargs, "storage_state": state}
+                self.state_injected = True
+            self.browser, self.context = self.browser_manager.open_context(
+                headless=self.headless,
+                launch_kwargs=self.browser_kwargs,
+                context_kwargs=context_kwargs,
+                spans=self.spans,
+                user_data_dir=self.profile_dir,
+            )
+            if self.profile_dir is not None:
+                if not cookie_usable:
+                    # 持久化配置中仍留有上次的会话：强制登录或 Cookie 已失效时先清空，确保进入登录页
+                    self.context.clear_cookies()
+                elif state:
+                    # 持久化上下文无法在创建时注入 storage_state；仅在 cookies 与 localStorage 都写入后
+                    # 才视为已注入，否则由 try_cookie_login 自行加载 cookies
+                    self.state_injected = apply_storage_state(self.context, state)
+            self._install_routes()
+            # 持久化上下文启动时自带一个空白页，直接复用
+            pages = self.context.pages if self.profile_dir is not None else []
+            self.page = pages[0] if pages else self.context.new_page()
 
-            if use_cookie and self.try_cookie_login(self.page, verify_url=verify_url, expire_days=expire_days):
+            if cookie_usable and self.try_cookie_login(self.page, verify_url=verify_url, expire_days=expire_days):
                 login_success = True
                 self.logged_in_with_cookies = True
             else:
-                login_success = self.do_login(self.page, **credentials)
+                with self.spans.span("do_login") as span:
+                    login_success = self.do_login(self.page, **credentials)
+                    span.set("ok" if login_success else "failed")
                 self.logged_in_with_cookies = False
-                if login_success and use_cookie:
-                    self.cookie_manager.save_cookies(self.context, self.site_name)
 
             if login_success:
-                self.after_login(self.page, **credentials)
+                with self.spans.span("after_login"):
+                    self.after_login(self.page, **credentials)
+                if use_cookie:
+                    # 登录后步骤可能写入 localStorage（如弹窗“不再提醒”），一并持久化
+                    with self.spans.span("cookie_save"):
+                        self._save_storage_state()
 
+            keep_session = keep_open and login_success
+            if login_success:
+                self.screenshots.discard()
+            else:
+                self.failure_class = classify_page(self.page, self.last_error)
+                self._flush_screenshots(self.screenshots.fail(self.page, "login_failed"))
+            self._end_run("ok" if login_success else "failed", cookie_login=self.logged_in_with_cookies)
             return login_success
-        except Exception:
+        except Exception as exc:
             # 保持原有行为：保存错误截图并向上传播异常
+            self.failure_class = classify_error(exc)
             self.browser_manager.save_error_screenshot(self.page, self._error_screenshot_path())
+            self._flush_screenshots(self.screenshots.flush())
+            self._end_run("error", error=type(exc).__name__)
             raise
         finally:
+            if not keep_session:
+                self.close()
+
+    def _end_run(self, outcome: str, **attrs: Any) -> None:
+        """记录整次运行的 `run` span（keep_open 时不含之后的会话保持时间）。"""
+        started = getattr(self, "_run_started", None)
+        if started is not None:
+            self.spans.record("run", time.perf_counter() - started, outcome, **attrs)
+            self._run_started = None
+        if self.context is None:
+            self.spans.flush()
+
+    def _flush_screenshots(self, paths) -> None:
+        if paths:
+            self.logger.info("已提交 %s 张调试截图写入: %s", len(paths), self.screenshots.out_dir)
+
+    def _install_routes(self) -> None:
+        # 钩子先于资源拦截安装：后注册的路由优先，拦截规则放行的请求再回落到钩子的路由
+        for hook in self.context_hooks:
+            hook(self.context)
+        self.route_stats = None
+        if self.resource_policy is None or not self.resource_policy.applies_to(self.headless):
+            return
+        try:
+            self.route_stats = self.resource_policy.install(self.context)
+        except Exception as e:
+            self.logger.warning("安装资源拦截规则失败: %s", e)
+
+    def _save_storage_state(self) -> None:
+        if self.context is None:
+            return
+        try:
+            self.cookie_manager.save_storage_state(self.context, self.site_name)
+        except Exception as e:
+            self.logger.warning("保存 storage_state 失败: %s", e)
+
+    def close(self) -> None:
+        """关闭当前会话的浏览器上下文（及独立模式下的浏览器）。"""
+        if self.route_stats is not None:
+            self.logger.info("资源拦截: %s", self.route_stats.summary())
+            self.route_stats = None
+        with self.spans.span("teardown") as span:
             try:
-                if self.context is not None:
-                    self.context.close()
+                self.browser_manager.close_context(self.browser, self.context)
             except Exception as e:
                 # 关闭上下文失败也需要可见日志
-                self.logger.warning(f"关闭浏览器上下文失败: {e}")
+                span.set("failed")
+                self.logger.warning("关闭浏览器上下文失败: %s", e)
 
-            self.browser_manager.close(self.browser)
-            self.browser = None
-            self.context = None
-            self.page = None
+        if self.profile_dir is not None:
+            self.profiles.release(self.site_name)
+            self.profile_dir = None
+
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.spans.flush()
 
     def _error_screenshot_path(self) -> str:
         """为失败情况创建一个文件系统安全的截图路径。"""
@@ -2,19 +2,79 @@
 
 from __future__ import annotations
 
+import json
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from playwright.sync_api import sync_playwright
+from src.core.display import lease_display, release_display
+from src.core.metrics import NULL_SPANS, SpanRecorder
 from src.core.paths import get_project_paths
 
 
 class BrowserManager:
     """封装 Playwright 浏览器生命周期管理。"""
 
-    def __init__(self) -> None:
+    def __init__(self, pool: Optional["BrowserPool"] = None) -> None:
         self._playwright_cm = None
         self._playwright = None
+        self.pool = pool
+        # 有头启动时从 Xvfb 显示池租用的显示，关闭浏览器时归还
+        self._display: Optional[str] = None
+
+    def open_context(
+        self,
+        *,
+        headless: bool = False,
+        launch_kwargs: Optional[Dict[str, Any]] = None,
+        context_kwargs: Optional[Dict[str, Any]] = None,
+        spans: Optional[SpanRecorder] = None,
+        user_data_dir: Optional[Path] = None,
+    ):
+        """创建一个浏览器上下文，返回 `(browser, context)`。
+
+        配置了 `pool` 时从共享池借用浏览器，否则独立启动一个 Chromium。
+        传入 `user_data_dir` 时以 `launch_persistent_context` 启动持久化上下文（`browser` 为 None），
+        有 `pool` 时沿用池的 Playwright 驱动。
+        传入 `spans` 时分别记录 `browser_launch` 与 `context_creation` 耗时。
+        """
+        spans = spans or NULL_SPANS
+        if user_data_dir is not None:
+            with spans.span("browser_launch", persistent=True):
+                if self.pool is not None:
+                    return None, self.pool.new_persistent_context(
+                        user_data_dir, headless=headless, launch_kwargs=launch_kwargs, **(context_kwargs or {})
+                    )
+                return None, self.launch_persistent(user_data_dir, headless=headless,
+                                                    launch_kwargs=launch_kwargs, context_kwargs=context_kwargs)
+
+        if self.pool is not None:
+            # 池内浏览器按需启动，启动耗时计入 context_creation
+            with spans.span("context_creation", pooled=True):
+                return self.pool.new_context(headless=headless, launch_kwargs=launch_kwargs, **(context_kwargs or {}))
+
+        with spans.span("browser_launch"):
+            browser = self.launch(headless=headless, **(launch_kwargs or {}))
+        try:
+            with spans.span("context_creation"):
+                return browser, browser.new_context(**(context_kwargs or {}))
+        except Exception:
+            self.close(browser)
+            raise
+
+    def close_context(self, browser, context) -> None:
+        """关闭 `open_context` 创建的上下文；独立模式下同时关闭浏览器。"""
+        if self.pool is not None:
+            self.pool.release(context)
+            return
+
+        try:
+            if context is not None:
+                context.close()
+        except Exception as e:
+            _log_warning("Failed to close browser context: %s", e)
+        self.close(browser)
 
     def launch(self, headless: bool = False, **launch_kwargs):
         """启动 Playwright 并启动一个 Chromium 浏览器。"""
@@ -23,8 +83,31 @@ class BrowserManager:
 
         self._playwright_cm = sync_playwright()
         self._playwright = self._playwright_cm.__enter__()
+        self._display = lease_display(headless, launch_kwargs)
         return self._playwright.chromium.launch(headless=headless, **launch_kwargs)
 
+    def launch_persistent(
+        self,
+        user_data_dir: Path,
+        *,
+        headless: bool = False,
+        launch_kwargs: Optional[Dict[str, Any]] = None,
+        context_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        """启动 Playwright 并以 `user_data_dir` 启动持久化上下文。"""
+        if self._playwright_cm is not None:
+            raise RuntimeError("Browser already launched for this manager")
+
+        self._playwright_cm = sync_playwright()
+        self._playwright = self._playwright_cm.__enter__()
+        launch_kwargs = dict(launch_kwargs or {})
+        self._display = lease_display(headless, launch_kwargs)
+        try:
+            return _launch_persistent(self._playwright, user_data_dir, headless, launch_kwargs, context_kwargs)
+        except Exception:
+            self.close(None)
+            raise
+
     def close(self, browser) -> None:
         """安全地关闭浏览器并停止 Playwright。"""
         try:
@@ -36,7 +119,7 @@ class BrowserManager:
                 from src.core.logger import setup_logger
                 from src.core.paths import get_project_paths
                 logger = setup_logger("browser", get_project_paths().logs / "browser.log")
-                logger.warning(f"Failed to close browser: {e}")
+                logger.warning("Failed to close browser: %s", e)
             except Exception:
                 pass
         finally:
@@ -48,11 +131,13 @@ class BrowserManager:
                         from src.core.logger import setup_logger
                         from src.core.paths import get_project_paths
                         logger = setup_logger("browser", get_project_paths().logs / "browser.log")
-                        logger.warning(f"Failed to stop Playwright: {e}")
+                        logger.warning("Failed to stop Playwright: %s", e)
                     except Exception:
                         pass
                 self._playwright_cm = None
                 self._playwright = None
+            release_display(self._display)
+            self._display = None
 
     def save_error_screenshot(self, page, filename: Optional[str]) -> bool:
         """捕获截图以便排查故障。"""
@@ -68,3 +153,279 @@ class BrowserManager:
             return True
         except Exception:
             return False
+
+
+def _descendant_rss_mb() -> float:
+    """统计当前进程所有子孙进程（Chromium 及其渲染进程）的常驻内存，单位 MB。
+
+    仅在 Linux 上通过 `/proc` 计算；其他平台返回 0，即不触发按内存回收。
+    """
+    proc = Path("/proc")
+    if not proc.exists():
+        return 0.0
+
+    children: Dict[int, List[int]] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            # 字段 2 (comm) 可能含空格，从最后一个 ')' 之后解析
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    total_kb = 0
+    stack = list(children.get(os.getpid(), []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            for line in (proc / str(pid) / "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total_kb += int(line.split()[1])
+                    break
+        except (OSError, ValueError, IndexError):
+            continue
+    return total_kb / 1024.0
+
+
+class _PooledBrowser:
+    """池内单个浏览器及其使用计数。"""
+
+    def __init__(self, browser, display: Optional[str] = None) -> None:
+        self.browser = browser
+        self.display = display
+        self.served = 0
+        self.active = 0
+        self.retiring = False
+
+
+class BrowserPool:
+    """在整个批处理期间共享一个 Playwright 驱动与少量预热浏览器。
+
+    每个账号只获得一个独立的 `new_context()`，浏览器本身在多个账号间复用：
+    - 同一浏览器累计服务 `max_contexts` 个上下文后回收重启；
+    - 所有 Chromium 进程的 RSS 总和超过 `max_rss_mb` 时回收服务最多的浏览器。
+
+    注意：Playwright 同步 API 绑定创建它的线程，池只能在同一线程内使用。
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int = 1,
+        max_contexts: int = 20,
+        max_rss_mb: Optional[float] = None,
+    ) -> None:
+        self.size = max(1, int(size))
+        self.max_contexts = max(1, int(max_contexts))
+        self.max_rss_mb = max_rss_mb
+        self._playwright_cm = None
+        self._playwright = None
+        # 按启动参数分组：不同 headless/slow_mo 组合不能共用同一浏览器
+        self._browsers: Dict[Tuple, List[_PooledBrowser]] = {}
+        self._owners: Dict[int, _PooledBrowser] = {}
+        # 持久化上下文不属于池内浏览器，仅记录其租用的显示
+        self._persistent: Dict[int, Tuple[Any, Optional[str]]] = {}
+
+    @classmethod
+    def from_config(cls, options: Optional[Dict[str, Any]]) -> Optional["BrowserPool"]:
+        """根据配置字典（如 `defaults.browser_pool`）创建池；未启用时返回 None。"""
+        if not isinstance(options, dict) or not options.get("enabled", False):
+            return None
+        max_rss = options.get("max_rss_mb")
+        return cls(
+            size=int(options.get("size", 1)),
+            max_contexts=int(options.get("max_contexts", 20)),
+            max_rss_mb=float(max_rss) if max_rss else None,
+        )
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def new_context(self, *, headless: bool = False, launch_kwargs: Optional[Dict[str, Any]] = None, **context_kwargs):
+        """从池中挑选浏览器并创建一个隔离的上下文，返回 `(browser, context)`。"""
+        launch_kwargs = dict(launch_kwargs or {})
+        entry = self._acquire(headless, launch_kwargs)
+        context = entry.browser.new_context(**context_kwargs)
+        entry.served += 1
+        entry.active += 1
+        self._owners[id(context)] = entry
+        return entry.browser, context
+
+    def new_persistent_context(
+        self,
+        user_data_dir: Path,
+        *,
+        headless: bool = False,
+        launch_kwargs: Optional[Dict[str, Any]] = None,
+        **context_kwargs,
+    ):
+        """使用池的 Playwright 驱动启动一个持久化上下文（独占一个 Chromium 进程）。"""
+        self._ensure_playwright()
+        launch_kwargs = dict(launch_kwargs or {})
+        display = lease_display(headless, launch_kwargs)
+        try:
+            context = _launch_persistent(self._playwright, user_data_dir, headless, launch_kwargs, context_kwargs)
+        except Exception:
+            release_display(display)
+            raise
+        self._persistent[id(context)] = (context, display)
+        return context
+
+    def release(self, context) -> None:
+        """关闭上下文并在需要时回收其所属浏览器。"""
+        persistent = self._persistent.pop(id(context), None)
+        if persistent is not None:
+            try:
+                context.close()
+            except Exception as e:
+                _log_warning("Failed to close persistent context: %s", e)
+            release_display(persistent[1])
+            return
+
+        entry = self._owners.pop(id(context), None)
+        try:
+            if context is not None:
+                context.close()
+        except Exception as e:
+            _log_warning("Failed to close pooled context: %s", e)
+
+        if entry is None:
+            return
+        entry.active -= 1
+        if entry.served >= self.max_contexts:
+            entry.retiring = True
+        elif self.max_rss_mb and _descendant_rss_mb() > self.max_rss_mb:
+            entry.retiring = True
+        if entry.retiring and entry.active <= 0:
+            self._retire(entry)
+
+    def close(self) -> None:
+        """关闭池内所有浏览器并停止 Playwright 驱动。"""
+        for entries in list(self._browsers.values()):
+            for entry in list(entries):
+                self._retire(entry)
+        self._browsers.clear()
+        self._owners.clear()
+        for context, display in list(self._persistent.values()):
+            try:
+                context.close()
+            except Exception as e:
+                _log_warning("Failed to close persistent context: %s", e)
+            release_display(display)
+        self._persistent.clear()
+        if self._playwright_cm is not None:
+            try:
+                self._playwright_cm.__exit__(None, None, None)
+            except Exception as e:
+                _log_warning("Failed to stop Playwright: %s", e)
+            self._playwright_cm = None
+            self._playwright = None
+
+    # 内部实现 -----------------------------------------------------------
+    def _ensure_playwright(self) -> None:
+        if self._playwright_cm is None:
+            self._playwright_cm = sync_playwright()
+            self._playwright = self._playwright_cm.__enter__()
+
+    def _acquire(self, headless: bool, launch_kwargs: Dict[str, Any]) -> _PooledBrowser:
+        self._ensure_playwright()
+
+        key = (bool(headless), repr(sorted(launch_kwargs.items())))
+        entries = self._browsers.setdefault(key, [])
+        live = [e for e in entries if not e.retiring and e.browser.is_connected()]
+        for stale in [e for e in entries if e not in live and e.active <= 0]:
+            self._retire(stale)
+
+        if len(live) < self.size:
+            launch_kwargs = dict(launch_kwargs)
+            display = lease_display(headless, launch_kwargs)
+            try:
+                browser = self._playwright.chromium.launch(headless=headless, **launch_kwargs)
+            except Exception:
+                release_display(display)
+                raise
+            entry = _PooledBrowser(browser, display)
+            entries.append(entry)
+            return entry
+        return min(live, key=lambda e: (e.active, e.served))
+
+    def _retire(self, entry: _PooledBrowser) -> None:
+        for entries in self._browsers.values():
+            if entry in entries:
+                entries.remove(entry)
+        try:
+            entry.browser.close()
+        except Exception as e:
+            _log_warning("Failed to close pooled browser: %s", e)
+        release_display(entry.display)
+        entry.display = None
+
+
+def _launch_persistent(
+    playwright,
+    user_data_dir: Path,
+    headless: bool,
+    launch_kwargs: Dict[str, Any],
+    context_kwargs: Optional[Dict[str, Any]],
+):
+    """`launch_persistent_context` 不接受 `storage_state`：启动后经 `apply_storage_state` 补充写入。"""
+    context_kwargs = dict(context_kwargs or {})
+    state = context_kwargs.pop("storage_state", None)
+    context = playwright.chromium.launch_persistent_context(
+        str(user_data_dir), headless=headless, **launch_kwargs, **context_kwargs
+    )
+    if state and not apply_storage_state(context, state):
+        _log_warning("Failed to apply storage_state to persistent context")
+    return context
+
+
+# 每个标签页在各 origin 首次加载时写入一次 localStorage；之后页面自身的修改不会被覆盖
+_SEED_LOCAL_STORAGE = """
+(origins => {
+  try {
+    const items = origins[location.origin];
+    if (!items || sessionStorage.getItem('__auto_state_seeded')) return;
+    for (const item of items) localStorage.setItem(item.name, item.value);
+    sessionStorage.setItem('__auto_state_seeded', '1');
+  } catch (e) {}
+})(%s)
+"""
+
+
+def apply_storage_state(context, state: Optional[Dict[str, Any]]) -> bool:
+    """把 `storage_state` 字典（cookies + 各 origin 的 localStorage）写入已创建的上下文。
+
+    用于无法在创建时传入 `storage_state` 的持久化上下文；全部写入成功时返回 True。
+    """
+    if not isinstance(state, dict):
+        return False
+    try:
+        if state.get("cookies"):
+            context.add_cookies(state["cookies"])
+        origins = {
+            entry["origin"]: entry.get("localStorage") or []
+            for entry in state.get("origins") or []
+            if isinstance(entry, dict) and entry.get("origin")
+        }
+        if any(origins.values()):
+            context.add_init_script(script=_SEED_LOCAL_STORAGE % json.dumps(origins))
+        return True
+    except Exception as e:
+        _log_warning("Failed to apply storage_state: %s", e)
+        return False
+
+
+def _log_warning(message: str, *args: Any) -> None:
+    try:
+        from src.core.logger import setup_logger
+        logger = setup_logger("browser", get_project_paths().logs / "browser.log")
+        logger.warning(message, *args)
+    except Exception:
+        pass
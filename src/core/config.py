@@ -23,28 +23,149 @@
 
 说明：为兼容旧调用处，保留 `get_credentials(site, index, fallback_env=True)` 签名，
 但 `fallback_env` 将被忽略（不再使用环境变量回退）。
+
+快照与热加载：
+- 同一配置文件在进程内只解析一次，得到不可变的 `ConfigSnapshot`，其中预先建立按站点、
+  按账号（用户名/邮箱）的索引，所有 `UnifiedConfigManager` 实例共享；
+- 访问时检查文件的 mtime/大小（最多每 `RELOAD_CHECK_INTERVAL` 秒一次），变化后自动重新
+  解析，守护进程无需重启即可感知账号增删；
+- 重新解析失败（如文件正在写入）时保留上一份有效快照。
 """
 
 from __future__ import annotations
 
 import json
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.core.paths import get_project_paths
 
+# 两次检查配置文件 mtime 的最短间隔（秒）
+RELOAD_CHECK_INTERVAL = 1.0
+
 
 def _normalize_site(site: str) -> str:
     return (site or "").strip().lower()
 
 
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """一次解析得到的配置及其索引；调用方不应修改其中的对象。"""
+
+    data: Dict[str, Any] = field(default_factory=dict)
+    # 配置中全部合法账号，保持文件中的顺序
+    users: List[Dict] = field(default_factory=list)
+    by_site: Dict[str, List[Dict]] = field(default_factory=dict)
+    # (站点, 用户名或邮箱) -> 账号
+    by_account: Dict[Tuple[str, str], Dict] = field(default_factory=dict)
+    # 文件的 (mtime_ns, size)；文件不存在时为 None
+    stamp: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def build(cls, data: Dict[str, Any], stamp: Optional[Tuple[int, int]] = None) -> "ConfigSnapshot":
+        by_site: Dict[str, List[Dict]] = {}
+        by_account: Dict[Tuple[str, str], Dict] = {}
+        raw_users = data.get("users")
+        users = [u for u in raw_users if isinstance(u, dict)] if isinstance(raw_users, list) else []
+        for user in users:
+            site = _normalize_site(user.get("site", ""))
+            by_site.setdefault(site, []).append(user)
+            for ident in (user.get("username"), user.get("email")):
+                if ident:
+                    by_account.setdefault((site, str(ident)), user)
+        return cls(data=data, users=users, by_site=by_site, by_account=by_account, stamp=stamp)
+
+    @property
+    def defaults(self) -> Dict:
+        value = self.data.get("defaults")
+        return value if isinstance(value, dict) else {}
+
+    @property
+    def sites(self) -> Dict:
+        value = self.data.get("sites")
+        return value if isinstance(value, dict) else {}
+
+
+class _SnapshotCache:
+    """单个配置文件的共享快照，按 mtime 自动重新加载。"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.snapshot: Optional[ConfigSnapshot] = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, force: bool = False) -> ConfigSnapshot:
+        now = time.monotonic()
+        snapshot = self.snapshot
+        if snapshot is not None and not force and now - self.checked_at < RELOAD_CHECK_INTERVAL:
+            return snapshot
+        with self.lock:
+            self.checked_at = now
+            stamp = self._stamp()
+            if self.snapshot is None or force or stamp != self.snapshot.stamp:
+                self.snapshot = self._load(stamp)
+            return self.snapshot
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, stamp: Optional[Tuple[int, int]]) -> ConfigSnapshot:
+        if stamp is None:
+            return ConfigSnapshot()
+        try:
+            with self.path.open("r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except Exception:
+            # JSON 不合法（可能正在写入）：保留上一份快照，但记录新的 stamp 以免反复解析
+            if self.snapshot is not None and self.snapshot.stamp is not None:
+                previous = self.snapshot
+                return ConfigSnapshot(previous.data, previous.users, previous.by_site, previous.by_account, stamp)
+            return ConfigSnapshot(stamp=stamp)
+        return ConfigSnapshot.build(data if isinstance(data, dict) else {}, stamp)
+
+
+_CACHES: Dict[Path, _SnapshotCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def _cache_for(path: Path) -> _SnapshotCache:
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = _CACHES[path] = _SnapshotCache(path)
+        return cache
+
+
 class UnifiedConfigManager:
-    """统一配置管理器（仅支持 users + defaults + sites）。"""
+    """统一配置管理器（仅支持 users + defaults + sites）。
+
+    实例很轻量，可随处创建；同一配置文件的解析结果在进程内共享。
+    """
 
     def __init__(self, config_file: str = "users.json") -> None:
         self._config_file: str = config_file
         self._config_path: Path = get_project_paths().config / config_file
-        self._data: Optional[Dict] = None  # 首次访问时加载并缓存
+        self._cache = _cache_for(self._config_path)
+
+    @property
+    def config_path(self) -> Path:
+        return self._config_path
+
+    def snapshot(self) -> ConfigSnapshot:
+        """返回当前配置快照（文件变化后自动重新加载）。"""
+        return self._cache.get()
+
+    def reload(self) -> ConfigSnapshot:
+        """立即重新读取配置文件。"""
+        return self._cache.get(force=True)
 
     # 公共 API -----------------------------------------------------------
     def get_credentials(self, site: str, index: int = 0, fallback_env: bool = True) -> Dict:
@@ -60,47 +181,30 @@ class UnifiedConfigManager:
 
     def get_all_users(self, site: str) -> List[Dict]:
         """返回某站点的全部用户，仅支持 users 数组格式。"""
-        data = self._load_once()
-        key = _normalize_site(site)
-        users = data.get("users") if isinstance(data, dict) else None
-        if not isinstance(users, list):
-            return []
-        return [u for u in users if isinstance(u, dict) and _normalize_site(u.get("site", "")) == key]
+        return list(self.snapshot().by_site.get(_normalize_site(site), ()))
+
+    def get_user(self, site: str, identifier: str) -> Optional[Dict]:
+        """按用户名或邮箱查找某站点的账号，不存在返回 None。"""
+        user = self.snapshot().by_account.get((_normalize_site(site), str(identifier or "")))
+        return dict(user) if user is not None else None
+
+    def get_users(self) -> List[Dict]:
+        """返回全部站点的用户（保持配置文件中的顺序）。"""
+        return list(self.snapshot().users)
 
     def get_site_config(self, site: str) -> Dict:
         """返回站点级配置，从 data["sites"][site] 读取，不存在返回空字典。"""
-        data = self._load_once()
-        key = _normalize_site(site)
-        sites = data.get("sites") if isinstance(data, dict) else None
-        if isinstance(sites, dict) and isinstance(sites.get(key), dict):
-            return dict(sites[key])
-        return {}
+        value = self.snapshot().sites.get(_normalize_site(site))
+        return dict(value) if isinstance(value, dict) else {}
 
     def get_defaults(self) -> Dict:
         """返回全局默认配置（data["defaults"]）。"""
-        data = self._load_once()
-        defaults = data.get("defaults") if isinstance(data, dict) else None
-        return dict(defaults) if isinstance(defaults, dict) else {}
+        return dict(self.snapshot().defaults)
 
-    # 内部实现 -----------------------------------------------------------
+    # 兼容旧调用 ---------------------------------------------------------
     def _load_once(self) -> Dict:
-        if self._data is not None:
-            return self._data
-
-        path = self._config_path
-        if not path.exists():
-            self._data = {}
-            return self._data
-
-        try:
-            with path.open("r", encoding="utf-8") as fh:
-                data = json.load(fh)
-            self._data = data if isinstance(data, dict) else {}
-        except Exception:
-            # JSON 不合法时返回空结构（不再提供环境变量回退）
-            self._data = {}
-        return self._data
+        return self.snapshot().data
 
 
-__all__ = ["UnifiedConfigManager"]
+__all__ = ["ConfigSnapshot", "UnifiedConfigManager", "RELOAD_CHECK_INTERVAL"]
 
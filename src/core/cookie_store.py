@@ -0,0 +1,219 @@
+"""基于 SQLite 的 Cookie 索引存储。
+
+与“每账号一个 JSON 文件”的默认存储相比：
+- 所有账号存放在单个数据库 `cookies.db` 中，以 `site_name` 为主键；
+- `saved_at` 与最早的 Cookie 过期时间 `expires_at` 作为独立列并建立索引，
+  “未来 N 天内过期的账号”只需一次索引查询；
+- 写入在事务中完成（WAL + BEGIN IMMEDIATE），并发工作进程不会互相破坏数据；
+- 首次打开时自动导入目录中已有的 `{site_name}_cookies.json` 文件。
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cookies (
+    site_name  TEXT PRIMARY KEY,
+    site       TEXT NOT NULL,
+    account    TEXT NOT NULL DEFAULT '',
+    payload    TEXT NOT NULL,
+    saved_at   REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_cookies_expires ON cookies (expires_at);
+CREATE INDEX IF NOT EXISTS idx_cookies_site ON cookies (site, account);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_JSON_SUFFIX = "_cookies.json"
+
+
+def split_site_name(site_name: str) -> Tuple[str, str]:
+    """将 `openi_<username>` 形式的 site_name 拆分为 (site, account)。"""
+    site, _, account = (site_name or "").partition("_")
+    return site.lower(), account
+
+
+def earliest_expiry(cookies: List[Dict]) -> Optional[float]:
+    """返回 cookie 列表中最早的有效 `expires`（秒级时间戳），会话 Cookie 忽略。"""
+    values = [
+        float(c["expires"])
+        for c in cookies
+        if isinstance(c, dict) and isinstance(c.get("expires"), (int, float)) and c["expires"] > 0
+    ]
+    return min(values) if values else None
+
+
+class SqliteCookieStore:
+    """单文件 SQLite Cookie 存储，按操作打开连接，可在多线程/多进程间安全使用。"""
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        import_dir: Optional[Path] = None,
+        expiry_fn: Optional[Callable[[str, List[Dict]], Optional[float]]] = None,
+    ) -> None:
+        self.db_path = Path(db_path)
+        # 计算 `expires_at` 列的函数 (site_name, cookies) -> 时间戳；默认取最早的持久 Cookie
+        self.expiry_fn = expiry_fn or (lambda _site_name, cookies: earliest_expiry(cookies))
+        self.import_dir = Path(import_dir) if import_dir is not None else self.db_path.parent
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+            imported = conn.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+        if imported is None:
+            self.import_json_dir(self.import_dir)
+        else:
+            self._imported_at = float(imported[0])
+
+    # 公共 API -----------------------------------------------------------
+    def save(self, site_name: str, cookies: List[Dict], saved_at: Optional[datetime] = None,
+             expires_at: Optional[float] = None, origins: Optional[List[Dict]] = None) -> None:
+        """在事务中写入（覆盖）一个账号的 cookies 及可选的 localStorage（origins）。"""
+        saved_at = saved_at or datetime.now()
+        if expires_at is None:
+            expires_at = self.expiry_fn(site_name, cookies)
+        site, account = split_site_name(site_name)
+        data: Dict = {"cookies": cookies, "saved_at": saved_at.isoformat()}
+        if origins:
+            data["origins"] = origins
+        payload = json.dumps(data, ensure_ascii=False)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO cookies (site_name, site, account, payload, saved_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(site_name) DO UPDATE SET site = excluded.site, account = excluded.account, "
+                "payload = excluded.payload, saved_at = excluded.saved_at, expires_at = excluded.expires_at",
+                (site_name, site, account, payload, saved_at.timestamp(), expires_at),
+            )
+
+    def load(self, site_name: str) -> Optional[Tuple[List[Dict], datetime]]:
+        """返回 `(cookies, saved_at)`；不存在时尝试导入同名 JSON 文件。"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT payload, saved_at FROM cookies WHERE site_name = ?", (site_name,)).fetchone()
+        if row is None:
+            # 仅导入批量导入之后由旧工具新写入的 JSON 文件，避免已删除的过期记录被重新导入
+            json_path = self.import_dir / f"{site_name}{_JSON_SUFFIX}"
+            try:
+                fresh = json_path.stat().st_mtime > self._imported_at
+            except OSError:
+                fresh = False
+            if not fresh or not self._import_json_file(json_path):
+                return None
+            return self.load(site_name)
+
+        try:
+            cookies = json.loads(row[0]).get("cookies") or []
+        except (ValueError, AttributeError):
+            return None
+        return cookies, datetime.fromtimestamp(row[1])
+
+    def load_origins(self, site_name: str) -> List[Dict]:
+        """返回保存的 storage_state `origins`（localStorage）；不存在时返回空列表。"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT payload FROM cookies WHERE site_name = ?", (site_name,)).fetchone()
+        if row is None:
+            return []
+        try:
+            origins = json.loads(row[0]).get("origins")
+        except (ValueError, AttributeError):
+            return []
+        return origins if isinstance(origins, list) else []
+
+    def exists(self, site_name: str) -> bool:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT 1 FROM cookies WHERE site_name = ?", (site_name,)).fetchone()
+        return row is not None
+
+    def delete(self, site_name: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cookies WHERE site_name = ?", (site_name,))
+
+    def expiring_within(self, days: float, site: Optional[str] = None) -> List[Tuple[str, Optional[float]]]:
+        """返回 `expires_at` 落在未来 `days` 天内（或已过期）的 `(site_name, expires_at)`。"""
+        deadline = time.time() + days * 86400.0
+        sql = "SELECT site_name, expires_at FROM cookies WHERE expires_at IS NOT NULL AND expires_at <= ?"
+        params: list = [deadline]
+        if site:
+            sql += " AND site = ?"
+            params.append(site.lower())
+        sql += " ORDER BY expires_at"
+        with closing(self._connect()) as conn:
+            return [(r[0], r[1]) for r in conn.execute(sql, params).fetchall()]
+
+    def import_json_dir(self, directory: Path) -> int:
+        """导入目录中的 `*_cookies.json`，已存在且更新的记录不会被覆盖。返回导入数量。"""
+        count = 0
+        directory = Path(directory)
+        if directory.exists():
+            for path in sorted(directory.glob(f"*{_JSON_SUFFIX}")):
+                count += 1 if self._import_json_file(path) else 0
+        self._imported_at = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', ?)",
+                         (str(self._imported_at),))
+        return count
+
+    # 内部实现 -----------------------------------------------------------
+    def _import_json_file(self, path: Path) -> bool:
+        if not path.exists():
+            return False
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return False
+
+        cookies = data if isinstance(data, list) else (data.get("cookies") if isinstance(data, dict) else None)
+        if not cookies:
+            return False
+        saved_at = None
+        if isinstance(data, dict) and isinstance(data.get("saved_at"), str):
+            try:
+                saved_at = datetime.fromisoformat(data["saved_at"])
+            except ValueError:
+                saved_at = None
+        if saved_at is None:
+            saved_at = datetime.fromtimestamp(path.stat().st_mtime)
+
+        site_name = path.name[: -len(_JSON_SUFFIX)]
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT saved_at FROM cookies WHERE site_name = ?", (site_name,)).fetchone()
+        if row is not None and row[0] >= saved_at.timestamp():
+            return False
+        origins = data.get("origins") if isinstance(data, dict) else None
+        self.save(site_name, cookies, saved_at, origins=origins if isinstance(origins, list) else None)
+        return True
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+__all__ = ["SqliteCookieStore", "earliest_expiry", "split_site_name"]
@@ -3,27 +3,110 @@
 变更说明：
 - 删除 `_legacy_path()` 与 `_existing_path()`，仅保留统一命名 `{site_name}_cookies.json`。
 - 调用方可通过自定义 `site_name`（如 `openi_<username>`）来区分不同账号。
+- 新增可选的 SQLite 存储后端（`defaults.cookie_store = "sqlite"`），见 `cookie_store.py`。
+- 有效期优先依据会话关键 Cookie 的真实 `expires` 判断，仅在无法判断时回退到保存时间。
 """
 
 from __future__ import annotations
 
 import json
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
+from src.core.cookie_store import SqliteCookieStore, earliest_expiry
 from src.core.paths import get_project_paths
 
+_STORES: Dict[Path, SqliteCookieStore] = {}
+
+# 各站点决定会话是否仍有效的关键 Cookie；以 `*` 结尾表示前缀匹配。
+# 可通过配置 `sites.<site>.session_cookies` 覆盖。
+SESSION_COOKIE_RULES: Dict[str, Tuple[str, ...]] = {
+    "openi": ("i_like_*", "gitea_incredible", "gitea_awesome"),
+    "linuxdo": ("_t",),
+    "anyrouter": ("session",),
+}
+
+# 关键 Cookie 剩余寿命低于该秒数即视为已过期，避免使用中途失效
+EXPIRY_MARGIN_SECONDS = 300
+
+
+def _site_key(site_name: str) -> str:
+    return (site_name or "").split("_", 1)[0].strip().lower()
+
+
+def _session_cookie_names(site: str) -> Tuple[str, ...]:
+    try:
+        from src.core.config import UnifiedConfigManager
+        names = UnifiedConfigManager().get_site_config(site).get("session_cookies")
+        if isinstance(names, list) and names:
+            return tuple(str(n) for n in names)
+    except Exception:
+        pass
+    return SESSION_COOKIE_RULES.get(site, ())
+
+
+def session_expiry(cookies: List[Dict], site_name: str) -> Optional[float]:
+    """根据站点规则返回会话关键 Cookie 中最早的过期时间戳（秒）。
+
+    - 关键 Cookie 均为会话 Cookie（无 `expires`）或站点无规则/未匹配时返回 None，
+      调用方应回退到基于保存时间的判断；
+    - 任一关键 Cookie 已过期时返回其过期时间（早于当前时间）。
+    """
+    names = _session_cookie_names(_site_key(site_name))
+    if not names:
+        return None
+
+    def _matches(name: str) -> bool:
+        return any(name.startswith(n[:-1]) if n.endswith("*") else name == n for n in names)
+
+    expiries = [
+        float(c["expires"])
+        for c in cookies
+        if isinstance(c, dict) and _matches(str(c.get("name", "")))
+        and isinstance(c.get("expires"), (int, float)) and c["expires"] > 0
+    ]
+    return min(expiries) if expiries else None
+
+
+def _expiry_for(site_name: str, cookies: List[Dict]) -> Optional[float]:
+    """索引用的过期时间：优先关键 Cookie，其次全部持久 Cookie 中最早者。"""
+    expiry = session_expiry(cookies, site_name)
+    return expiry if expiry is not None else earliest_expiry(cookies)
+
+
+def _default_backend() -> str:
+    """从 `config/users.json` 的 `defaults.cookie_store` 读取默认后端（json/sqlite）。"""
+    try:
+        from src.core.config import UnifiedConfigManager
+        return str(UnifiedConfigManager().get_defaults().get("cookie_store") or "json").lower()
+    except Exception:
+        return "json"
+
+
+def _get_store(base_dir: Path) -> SqliteCookieStore:
+    db_path = (base_dir / "cookies.db").resolve()
+    store = _STORES.get(db_path)
+    if store is None:
+        store = SqliteCookieStore(db_path, import_dir=base_dir, expiry_fn=_expiry_for)
+        _STORES[db_path] = store
+    return store
+
 
 class CookieManager:
     """处理浏览器 Cookie 的持久化与恢复。"""
 
-    def __init__(self, base_dir: Optional[Path] = None) -> None:
+    def __init__(self, base_dir: Optional[Path] = None, backend: Optional[str] = None) -> None:
         """初始化 Cookie 管理器。
 
         若未提供 `base_dir`，默认使用 `ProjectPaths.cookies`。
+        `backend` 为 "json"（每账号一个文件）或 "sqlite"（单库索引存储），
+        未提供时读取配置 `defaults.cookie_store`，默认 "json"。
         """
         self.base_dir = Path(base_dir) if base_dir is not None else get_project_paths().cookies
+        self.backend = (backend or _default_backend()).lower()
+        self._store: Optional[SqliteCookieStore] = _get_store(self.base_dir) if self.backend == "sqlite" else None
 
     def _cookie_path(self, site_name: str) -> Path:
         # 统一文件命名
@@ -35,11 +118,28 @@ class CookieManager:
 
     def save_cookies(self, context, site_name: str) -> Path:
         """持久化保存来自指定 Playwright 上下文的 cookies。"""
-        cookies = context.cookies()
+        return self.write_cookies(site_name, context.cookies())
+
+    def save_storage_state(self, context, site_name: str) -> Path:
+        """持久化保存上下文的完整 `storage_state`（cookies + 各 origin 的 localStorage）。"""
+        state = context.storage_state()
+        return self.write_cookies(site_name, state.get("cookies") or [], origins=state.get("origins") or [])
+
+    def write_cookies(self, site_name: str, cookies: list, *, origins: Optional[list] = None) -> Path:
+        """持久化保存已取得的 cookie 列表（供异步上下文等调用方使用）。
+
+        `origins` 为 Playwright `storage_state()` 中的 localStorage 部分，可选。
+        """
+        if self._store is not None:
+            self._store.save(site_name, cookies, origins=origins)
+            return self._store.db_path
+
         payload = {
             "cookies": cookies,
             "saved_at": datetime.now().isoformat(),
         }
+        if origins:
+            payload["origins"] = origins
 
         cookie_path = self._cookie_path(site_name)
         cookie_path.parent.mkdir(parents=True, exist_ok=True)
@@ -50,35 +150,126 @@ class CookieManager:
 
     def load_cookies(self, context, site_name: str, expire_days: int = 7) -> bool:
         """若仍有效，则将 cookies 恢复到 Playwright 上下文。"""
-        cookie_path = self._cookie_path(site_name)
-        if not cookie_path.exists():
+        cookies = self.read_cookies(site_name, expire_days)
+        if not cookies:
             return False
 
         try:
-            with cookie_path.open("r", encoding="utf-8") as handle:
-                data = json.load(handle)
-        except (OSError, json.JSONDecodeError):
+            context.add_cookies(cookies)
+        except Exception:
             return False
 
-        cookies, saved_at = self._parse_cookie_payload(data, cookie_path)
+        return True
+
+    def read_cookies(self, site_name: str, expire_days: int = 7) -> Optional[list]:
+        """读取仍在有效期内的 cookie 列表；不存在或已过期时返回 None。"""
+        entry = self._load_entry(site_name)
+        if entry is None:
+            return None
+
+        cookies, saved_at = entry
         if not cookies:
-            return False
+            return None
+
+        expiry = session_expiry(cookies, site_name)
+        if expiry is not None:
+            # 关键 Cookie 带有真实过期时间：以其为准，忽略固定天数
+            if expiry - time.time() < EXPIRY_MARGIN_SECONDS:
+                self._delete(site_name)
+                return None
+            return cookies
 
         if expire_days is not None and saved_at is not None:
             if datetime.now() - saved_at > timedelta(days=expire_days):
                 # 过期即清理，避免误用
-                try:
-                    cookie_path.unlink()
-                except OSError:
-                    pass
-                return False
+                self._delete(site_name)
+                return None
+
+        return cookies
+
+    def read_storage_state(self, site_name: str, expire_days: int = 7) -> Optional[Dict]:
+        """返回可直接传给 `browser.new_context(storage_state=...)` 的状态字典。
+
+        cookies 的有效期判断与 `read_cookies` 一致；无效时返回 None。
+        """
+        cookies = self.read_cookies(site_name, expire_days)
+        if not cookies:
+            return None
+        return {"cookies": cookies, "origins": self._load_origins(site_name)}
+
+    def has_cookies(self, site_name: str) -> bool:
+        """是否存在已保存的 cookies（不检查有效期）。"""
+        if self._store is not None:
+            return self._store.exists(site_name) or self._store.load(site_name) is not None
+        return self._cookie_path(site_name).exists()
+
+    def get_expiry(self, site_name: str) -> Optional[float]:
+        """返回会话关键 Cookie 的最早过期时间戳；无法判断时返回 None。"""
+        entry = self._load_entry(site_name)
+        return session_expiry(entry[0], site_name) if entry is not None else None
+
+    def get_saved_at(self, site_name: str) -> Optional[datetime]:
+        """返回 cookies 的保存时间；不存在时返回 None。"""
+        entry = self._load_entry(site_name)
+        return entry[1] if entry is not None else None
+
+    def expiring_within(self, days: float, site: Optional[str] = None) -> List[Tuple[str, Optional[float]]]:
+        """返回未来 `days` 天内过期的 `(site_name, expires_at)`。
+
+        SQLite 后端为一次索引查询；JSON 后端需逐个读取文件。
+        """
+        if self._store is not None:
+            return self._store.expiring_within(days, site)
+
+        deadline = datetime.now().timestamp() + days * 86400.0
+        result: List[Tuple[str, Optional[float]]] = []
+        if not self.base_dir.exists():
+            return result
+        for path in sorted(self.base_dir.glob("*_cookies.json")):
+            site_name = path.name[: -len("_cookies.json")]
+            if site and site_name.split("_", 1)[0].lower() != site.lower():
+                continue
+            entry = self._load_entry(site_name)
+            expires_at = _expiry_for(site_name, entry[0]) if entry else None
+            if expires_at is not None and expires_at <= deadline:
+                result.append((site_name, expires_at))
+        return sorted(result, key=lambda item: item[1])
+
+    def _load_entry(self, site_name: str) -> Optional[Tuple[list, Optional[datetime]]]:
+        if self._store is not None:
+            return self._store.load(site_name)
+
+        cookie_path = self._cookie_path(site_name)
+        if not cookie_path.exists():
+            return None
 
         try:
-            context.add_cookies(cookies)
-        except Exception:
-            return False
+            with cookie_path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return None
 
-        return True
+        return self._parse_cookie_payload(data, cookie_path)
+
+    def _load_origins(self, site_name: str) -> List[Dict]:
+        if self._store is not None:
+            return self._store.load_origins(site_name)
+        try:
+            with self._cookie_path(site_name).open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return []
+        origins = data.get("origins") if isinstance(data, dict) else None
+        return origins if isinstance(origins, list) else []
+
+    def _delete(self, site_name: str) -> None:
+        if self._store is not None:
+            self._store.delete(site_name)
+            return
+        try:
+            self._cookie_path(site_name).unlink()
+        except OSError:
+            pass
 
     def _parse_cookie_payload(self, data, cookie_path: Path) -> Tuple[list, Optional[datetime]]:
         saved_at: Optional[datetime] = None
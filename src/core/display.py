@@ -0,0 +1,231 @@
+"""有头浏览器共享的 Xvfb 虚拟显示池。
+
+服务器上的有头运行（LinuxDO 需要有头浏览器通过 Cloudflare）原先每次都用 `xvfb-run`
+包装，每次登录都要启动、销毁一个 X 服务器，并发时还会争抢显示编号。本模块在进程内
+维护少量常驻的 Xvfb 显示，有头浏览器启动时租用其中之一（通过 `DISPLAY` 环境变量传给
+Chromium），关闭浏览器时归还；多个浏览器可共享同一显示。
+
+显示编号由 Xvfb 的 `-displayfd` 自行选择空闲号码，多个进程同时启动也不会冲突。
+
+配置（`defaults.xvfb`）：
+
+    "xvfb": {"enabled": "auto", "size": 2, "screen": "1920x1080x24"}
+
+`enabled` 为 `"auto"`（默认）时仅在当前没有 `DISPLAY` 且系统安装了 Xvfb 时启用。
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import select
+import shutil
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+
+logger = setup_logger("display", get_project_paths().logs / "browser.log")
+
+
+class _Display:
+    """单个 Xvfb 进程及其租用计数。"""
+
+    def __init__(self, process: subprocess.Popen, number: int) -> None:
+        self.process = process
+        self.number = number
+        self.leases = 0
+
+    @property
+    def name(self) -> str:
+        return f":{self.number}"
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+
+class XvfbPool:
+    """最多 `size` 个常驻 Xvfb 显示，按租用数最少的原则分配。"""
+
+    def __init__(
+        self,
+        *,
+        size: int = 2,
+        screen: str = "1920x1080x24",
+        binary: str = "Xvfb",
+        start_timeout: float = 10.0,
+    ) -> None:
+        self.size = max(1, int(size))
+        self.screen = screen
+        self.binary = binary
+        self.start_timeout = start_timeout
+        self._displays: List[_Display] = []
+        self._lock = threading.Lock()
+        # fork 出的子进程继承池对象时不应关闭父进程的 Xvfb
+        self._owner_pid = os.getpid()
+
+    @classmethod
+    def from_config(cls, options: Optional[Dict[str, Any]]) -> Optional["XvfbPool"]:
+        """按 `xvfb` 配置创建显示池；未启用或系统未安装 Xvfb 时返回 None。"""
+        options = options if isinstance(options, dict) else {}
+        enabled = options.get("enabled", "auto")
+        if enabled == "auto":
+            enabled = not os.environ.get("DISPLAY")
+        if not enabled:
+            return None
+        binary = str(options.get("binary", "Xvfb"))
+        if shutil.which(binary) is None:
+            logger.warning("已启用 Xvfb 显示池，但未找到 %s，有头浏览器将使用当前 DISPLAY", binary)
+            return None
+        return cls(
+            size=int(options.get("size", 2)),
+            screen=str(options.get("screen", "1920x1080x24")),
+            binary=binary,
+        )
+
+    def acquire(self) -> str:
+        """租用一个显示，返回 `DISPLAY` 取值（如 `:99`）。"""
+        with self._lock:
+            self._displays = [d for d in self._displays if d.alive()]
+            idle = [d for d in self._displays if d.leases == 0]
+            if idle:
+                display = idle[0]
+            elif len(self._displays) < self.size:
+                display = self._start()
+                self._displays.append(display)
+            else:
+                display = min(self._displays, key=lambda d: d.leases)
+            display.leases += 1
+            return display.name
+
+    def release(self, name: Optional[str]) -> None:
+        if not name:
+            return
+        with self._lock:
+            for display in self._displays:
+                if display.name == name and display.leases > 0:
+                    display.leases -= 1
+                    return
+
+    def warm(self, count: int = 1) -> None:
+        """预先启动显示，首个有头浏览器无需等待 Xvfb 启动。"""
+        with self._lock:
+            self._displays = [d for d in self._displays if d.alive()]
+            while len(self._displays) < min(count, self.size):
+                self._displays.append(self._start())
+
+    def env_for(self, name: str) -> Dict[str, str]:
+        """供 `chromium.launch(env=...)` 使用的环境变量。"""
+        return {**os.environ, "DISPLAY": name}
+
+    def close(self) -> None:
+        if os.getpid() != self._owner_pid:
+            return
+        with self._lock:
+            displays, self._displays = self._displays, []
+        for display in displays:
+            try:
+                display.process.terminate()
+                display.process.wait(timeout=5)
+            except Exception:
+                try:
+                    display.process.kill()
+                except Exception:
+                    pass
+
+    def _start(self) -> _Display:
+        read_fd, write_fd = os.pipe()
+        try:
+            process = subprocess.Popen(
+                [self.binary, "-displayfd", str(write_fd), "-screen", "0", self.screen, "-nolisten", "tcp"],
+                pass_fds=(write_fd,),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        finally:
+            os.close(write_fd)
+        try:
+            number = self._read_display_number(read_fd, process)
+        finally:
+            os.close(read_fd)
+        logger.info("已启动 Xvfb 显示 :%s（screen=%s）", number, self.screen)
+        return _Display(process, number)
+
+    def _read_display_number(self, read_fd: int, process: subprocess.Popen) -> int:
+        deadline = time.monotonic() + self.start_timeout
+        data = b""
+        while not data.endswith(b"\n"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or process.poll() is not None:
+                process.kill()
+                raise RuntimeError("Xvfb 启动失败或超时")
+            ready, _, _ = select.select([read_fd], [], [], min(remaining, 0.5))
+            if ready:
+                chunk = os.read(read_fd, 16)
+                if not chunk:
+                    process.kill()
+                    raise RuntimeError("Xvfb 未返回显示编号")
+                data += chunk
+        return int(data.strip())
+
+
+_POOL: Optional[XvfbPool] = None
+_POOL_LOADED = False
+_POOL_LOCK = threading.Lock()
+
+
+def get_display_pool() -> Optional[XvfbPool]:
+    """返回进程内共享的显示池；未启用时返回 None。"""
+    global _POOL, _POOL_LOADED
+    with _POOL_LOCK:
+        if not _POOL_LOADED:
+            _POOL_LOADED = True
+            try:
+                from src.core.config import UnifiedConfigManager
+                options = UnifiedConfigManager().get_defaults().get("xvfb")
+            except Exception:
+                options = None
+            _POOL = XvfbPool.from_config(options)
+            if _POOL is not None:
+                atexit.register(_POOL.close)
+        return _POOL
+
+
+def lease_display(headless: bool, launch_kwargs: Dict[str, Any]) -> Optional[str]:
+    """有头启动且显示池可用时租用一个显示，并把 `env` 写入 `launch_kwargs`。
+
+    返回租用的显示名（需在浏览器关闭后 `release_display`）；无需或无法租用时返回 None。
+    """
+    if headless or "env" in launch_kwargs:
+        return None
+    pool = get_display_pool()
+    if pool is None:
+        return None
+    try:
+        name = pool.acquire()
+    except Exception as exc:
+        logger.warning("租用 Xvfb 显示失败，使用当前 DISPLAY: %s", exc)
+        return None
+    launch_kwargs["env"] = pool.env_for(name)
+    return name
+
+
+def release_display(name: Optional[str]) -> None:
+    if name and _POOL is not None:
+        _POOL.release(name)
+
+
+def use_display(name: Optional[str]) -> None:
+    """子进程初始化：直接使用主进程租用的显示 `name`，不再自行启动 Xvfb。"""
+    global _POOL, _POOL_LOADED
+    if not name:
+        return
+    os.environ["DISPLAY"] = name
+    with _POOL_LOCK:
+        _POOL, _POOL_LOADED = None, True
+
+
+__all__ = ["XvfbPool", "get_display_pool", "lease_display", "release_display", "use_display"]
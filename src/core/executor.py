@@ -0,0 +1,308 @@
+"""带超时的多进程任务执行器。
+
+与 `ProcessPoolExecutor` 不同，每个任务在独立的子进程（独立进程组）中运行：
+- 结果按完成顺序产出，慢任务不会阻塞其他任务的汇报；
+- 超过 `timeout` 的任务连同其启动的浏览器进程一起被终止，而不是等待其自然结束；
+- 可按分组（通常为站点）限制同时运行的任务数，未达上限的其他站点任务优先补位。
+
+子进程以 `forkserver`（不可用时 `spawn`）方式启动，而不是直接 fork 主进程：主进程此时
+已有日志监听线程与探测线程在运行，fork 可能把它们持有的锁带入子进程而死锁。forkserver
+预先导入 `FORKSERVER_PRELOAD` 中的模块，之后的子进程由它 fork，不必每次重新导入 Playwright。
+因此 `fn`、任务与 `initializer` 须可 pickle（模块级函数），主进程的运行时状态不会被继承，
+需要时通过 `initargs` 传入；`initargs` 也可以是返回参数元组的函数，每次启动子进程时求值。
+
+    runner = ProcessRunner(max_workers=3, timeout=300, group_caps={"linuxdo": 1},
+                           initializer=init_worker_logging, initargs=(log_queue,))
+    for result in runner.run(refresh_single_user, tasks, group=lambda t: t[0]["site"]):
+        ...
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import queue as queue_module
+import signal
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# forkserver 进程预先导入的模块（导入失败时忽略）
+FORKSERVER_PRELOAD = ["src.core.base", "src.sites.registry"]
+
+_CONTEXT: Any = None
+
+
+def get_context() -> Any:
+    """子进程使用的 multiprocessing 上下文：优先 forkserver，否则 spawn。"""
+    global _CONTEXT
+    if _CONTEXT is None:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if context.get_start_method() == "forkserver":
+            context.set_forkserver_preload(FORKSERVER_PRELOAD)
+        _CONTEXT = context
+    return _CONTEXT
+
+
+@dataclass
+class TaskResult:
+    """单个任务的执行结果。"""
+
+    index: int
+    item: Any
+    value: Any = None
+    error: Optional[str] = None
+    timed_out: bool = False
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+def _child(
+    fn: Callable[[Any], Any],
+    item: Any,
+    index: int,
+    results: Any,
+    initializer: Optional[Callable[..., None]],
+    initargs: Tuple,
+) -> None:
+    # 独立进程组：超时时可一并终止浏览器等孙进程
+    if hasattr(os, "setpgrp"):
+        try:
+            os.setpgrp()
+        except OSError:
+            pass
+    try:
+        if initializer is not None:
+            initializer(*initargs)
+        results.put((index, fn(item), None))
+    except BaseException as exc:  # noqa: BLE001 - 子进程内所有异常都回传给主进程
+        results.put((index, None, f"{type(exc).__name__}: {exc}"))
+
+
+def _kill(process: Any) -> None:
+    if hasattr(os, "killpg") and process.pid:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            process.kill()
+    else:
+        process.kill()
+    process.join(5)
+
+
+class ProcessRunner:
+    """最多 `max_workers` 个子进程并发执行任务，单任务超过 `timeout` 秒即终止。
+
+    `group_caps` 为各分组（如站点）同时运行的任务数上限，未列出的分组只受 `max_workers` 约束。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 3,
+        *,
+        timeout: Optional[float] = None,
+        group_caps: Optional[Dict[str, int]] = None,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: Union[Tuple, Callable[[], Tuple]] = (),
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.group_caps = {k: max(1, int(v)) for k, v in (group_caps or {}).items() if v}
+        self.initializer = initializer
+        self.initargs = initargs
+        # 当前运行中的任务数，供进度显示读取
+        self.active = 0
+
+    def run(
+        self,
+        fn: Callable[[Any], Any],
+        items: Iterable[Any],
+        *,
+        group: Optional[Callable[[Any], str]] = None,
+    ) -> Iterator[TaskResult]:
+        """提交全部任务，按完成顺序逐个产出 `TaskResult`。"""
+        pending: List[Tuple[int, Any]] = list(enumerate(items))
+        context = get_context()
+        results = context.Queue()
+        running: Dict[int, Tuple[Any, Any, float]] = {}
+        groups: Dict[int, str] = {}
+
+        try:
+            while pending or running:
+                while pending and len(running) < self.max_workers:
+                    picked = self._pick(pending, groups.values(), group)
+                    if picked is None:
+                        break
+                    index, item = pending.pop(picked)
+                    initargs = self.initargs() if callable(self.initargs) else self.initargs
+                    process = context.Process(
+                        target=_child,
+                        args=(fn, item, index, results, self.initializer, initargs),
+                        daemon=True,
+                    )
+                    process.start()
+                    running[index] = (process, item, time.monotonic())
+                    if group is not None:
+                        groups[index] = group(item)
+                self.active = len(running)
+
+                for result in self._collect(results, running):
+                    groups.pop(result.index, None)
+                    self.active = len(running)
+                    yield result
+        finally:
+            for process, _item, _started in running.values():
+                _kill(process)
+            results.close()
+
+    def _pick(self, pending: List[Tuple[int, Any]], active_groups: Iterable[str],
+              group: Optional[Callable[[Any], str]]) -> Optional[int]:
+        """返回第一个所属分组未达上限的待执行任务位置；全部受限时返回 None。"""
+        if group is None or not self.group_caps:
+            return 0
+        counts: Dict[str, int] = {}
+        for name in active_groups:
+            counts[name] = counts.get(name, 0) + 1
+        for position, (_index, item) in enumerate(pending):
+            name = group(item)
+            cap = self.group_caps.get(name)
+            if cap is None or counts.get(name, 0) < cap:
+                return position
+        return None
+
+    def _collect(self, results: Any, running: Dict[int, Tuple[Any, Any, float]]) -> Iterator[TaskResult]:
+        try:
+            index, value, error = results.get(timeout=self._poll_interval(running))
+        except queue_module.Empty:
+            pass
+        else:
+            entry = running.pop(index, None)
+            if entry is not None:
+                process, item, started = entry
+                process.join(5)
+                yield TaskResult(index, item, value=value, error=error, duration=time.monotonic() - started)
+
+        now = time.monotonic()
+        for index, (process, item, started) in list(running.items()):
+            if self.timeout is not None and now - started >= self.timeout:
+                _kill(process)
+                running.pop(index)
+                yield TaskResult(index, item, timed_out=True, error=f"超时（{self.timeout:.0f}s）", duration=now - started)
+            elif not process.is_alive():
+                # 进程已退出：队列中仍有数据时下一轮再取，否则说明进程未回传结果即退出（崩溃）
+                if self._no_result_pending(results):
+                    running.pop(index)
+                    yield TaskResult(index, item, error=f"子进程异常退出（exitcode={process.exitcode}）",
+                                     duration=now - started)
+
+    def _poll_interval(self, running: Dict[int, Tuple[Any, Any, float]]) -> float:
+        if self.timeout is None or not running:
+            return 1.0
+        now = time.monotonic()
+        nearest = min(started + self.timeout for _p, _i, started in running.values())
+        return min(1.0, max(0.05, nearest - now))
+
+    @staticmethod
+    def _no_result_pending(results: Any) -> bool:
+        try:
+            return results.empty()
+        except (NotImplementedError, OSError):
+            return True
+
+
+class ProgressLine:
+    """在终端上原地刷新的单行进度（非终端时不输出）。
+
+    `update` 的计数以英文字段名传入，显示时按 `LABELS` 换成中文标签，未列出的字段原样显示。
+    """
+
+    LABELS: Dict[str, str] = {
+        "ok": "成功",
+        "refreshed": "刷新",
+        "skipped": "跳过",
+        "failed": "失败",
+        "running": "运行中",
+    }
+
+    def __init__(self, total: int, stream: Any = None) -> None:
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.enabled = bool(getattr(self.stream, "isatty", lambda: False)())
+        self.started = time.monotonic()
+        self._width = 0
+
+    def update(self, done: int, **counts: int) -> None:
+        if not self.enabled:
+            return
+        detail = " ".join(f"{self.LABELS.get(name, name)}={value}" for name, value in counts.items())
+        line = f"[{done}/{self.total}] {detail} 用时 {time.monotonic() - self.started:.0f}s"
+        self._width = max(self._width, len(line))
+        self.stream.write("\r" + line.ljust(self._width))
+        self.stream.flush()
+
+    def finish(self) -> None:
+        if self.enabled and self._width:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+def load_group_caps(sites: Iterable[str], overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """读取各站点 `sites.<site>.rate_limit.max_concurrent` 作为分组上限，`overrides` 优先。"""
+    caps: Dict[str, int] = {}
+    try:
+        from src.core.config import UnifiedConfigManager
+        cfg = UnifiedConfigManager()
+        for site in set(sites):
+            cap = (cfg.get_site_config(site).get("rate_limit") or {}).get("max_concurrent")
+            if cap:
+                caps[site] = int(cap)
+    except Exception:
+        pass
+    caps.update({k: int(v) for k, v in (overrides or {}).items() if v})
+    return caps
+
+
+def parse_group_caps(values: Optional[Iterable[str]]) -> Dict[str, int]:
+    """解析命令行形如 `openi=4` 的分组上限。"""
+    caps: Dict[str, int] = {}
+    for value in values or ():
+        name, _, cap = str(value).partition("=")
+        if not name or not cap.strip().isdigit():
+            raise ValueError(f"无效的站点并发上限: {value}（应为 site=N）")
+        caps[name.strip().lower()] = int(cap)
+    return caps
+
+
+def run_tasks(
+    fn: Callable[[Any], Any],
+    items: Sequence[Any],
+    *,
+    max_workers: int = 3,
+    timeout: Optional[float] = None,
+    group: Optional[Callable[[Any], str]] = None,
+    group_caps: Optional[Dict[str, int]] = None,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Union[Tuple, Callable[[], Tuple]] = (),
+) -> Iterator[TaskResult]:
+    """`ProcessRunner(...).run(fn, items)` 的便捷写法。"""
+    runner = ProcessRunner(
+        max_workers, timeout=timeout, group_caps=group_caps, initializer=initializer, initargs=initargs
+    )
+    return runner.run(fn, items, group=group)
+
+
+__all__ = [
+    "FORKSERVER_PRELOAD",
+    "get_context",
+    "TaskResult",
+    "ProcessRunner",
+    "ProgressLine",
+    "load_group_caps",
+    "parse_group_caps",
+    "run_tasks",
+]
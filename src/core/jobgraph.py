@@ -0,0 +1,212 @@
+"""带依赖关系的异步任务图。
+
+`run-all` 把所有账号规划为一组任务（`Job`），在同一事件循环、同一浏览器管理器中执行：
+
+- 任务在其依赖全部结束后才开始，例如 AnyRouter 的 OAuth 登录排在 LinuxDO 会话之后；
+- `require_success=True` 的任务在任一依赖失败时直接跳过；
+- 同时运行的任务数受 `concurrency` 限制，同一站点另受 `site_caps` 限制；
+- 依赖等待发生在占用并发名额之前，不会因等待依赖而阻塞其他任务；
+- 任务可通过 `JobContext.publish` 交付结果（如刚验证过的会话状态），成功结束后
+  依赖它的任务从 `JobContext.inputs` 按依赖 key 取得，失败任务的交付不会传递。
+
+    graph = JobGraph(jobs, concurrency=4, site_caps={"linuxdo": 1}, timeout=300)
+    results = asyncio.run(graph.run())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+
+logger = setup_logger("jobgraph", get_project_paths().logs / "run_all.log")
+
+
+
+@dataclass
+class JobContext:
+    """传给任务的运行上下文。"""
+
+    key: str
+    # 依赖 key -> 该依赖成功后交付的结果；未交付或未成功的依赖不出现
+    inputs: Dict[str, Any] = field(default_factory=dict)
+    output: Any = None
+
+    def publish(self, value: Any) -> None:
+        """交付本任务的结果，供依赖本任务的后续任务使用。"""
+        self.output = value
+
+
+JobFactory = Callable[[JobContext], Awaitable[bool]]
+
+
+@dataclass
+class Job:
+    """任务图中的单个任务。"""
+
+    key: str
+    site: str
+    run: JobFactory
+    depends_on: Tuple[str, ...] = ()
+    # 为 True 时任一依赖未成功即跳过本任务；否则依赖只决定先后顺序
+    require_success: bool = False
+    label: str = ""
+
+
+@dataclass
+class JobResult:
+    """单个任务的执行结果。"""
+
+    key: str
+    site: str
+    label: str = ""
+    status: str = "pending"  # ok / failed / skipped
+    duration: float = 0.0
+    # 相对整批开始时间的启动时刻（秒）
+    started: Optional[float] = None
+    error: Optional[str] = None
+    depends_on: Tuple[str, ...] = field(default_factory=tuple)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "site": self.site,
+            "account": self.label,
+            "status": self.status,
+            "duration": round(self.duration, 3),
+            "started": None if self.started is None else round(self.started, 3),
+            "error": self.error,
+            "depends_on": list(self.depends_on),
+        }
+
+
+class JobGraph:
+    """按依赖顺序并发执行一组任务。"""
+
+    def __init__(
+        self,
+        jobs: Sequence[Job],
+        *,
+        concurrency: int = 4,
+        site_caps: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.jobs = list(jobs)
+        self.concurrency = max(1, int(concurrency))
+        self.site_caps = {k: max(1, int(v)) for k, v in (site_caps or {}).items() if v}
+        self.timeout = timeout
+        self._validate()
+
+    def _validate(self) -> None:
+        keys = [job.key for job in self.jobs]
+        if len(set(keys)) != len(keys):
+            raise ValueError("任务 key 重复")
+        known = set(keys)
+        for job in self.jobs:
+            missing = [dep for dep in job.depends_on if dep not in known]
+            if missing:
+                raise ValueError(f"任务 {job.key} 依赖不存在的任务: {', '.join(missing)}")
+        # 拓扑排序检测环
+        indegree = {job.key: len(job.depends_on) for job in self.jobs}
+        children: Dict[str, List[str]] = {}
+        for job in self.jobs:
+            for dep in job.depends_on:
+                children.setdefault(dep, []).append(job.key)
+        ready = [key for key, degree in indegree.items() if degree == 0]
+        visited = 0
+        while ready:
+            key = ready.pop()
+            visited += 1
+            for child in children.get(key, ()):
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        if visited != len(self.jobs):
+            raise ValueError("任务依赖存在环")
+
+    async def run(self) -> List[JobResult]:
+        """执行全部任务，按输入顺序返回结果。"""
+        started = time.monotonic()
+        limit = asyncio.Semaphore(self.concurrency)
+        site_limits = {site: asyncio.Semaphore(cap) for site, cap in self.site_caps.items()}
+        results = {
+            job.key: JobResult(job.key, job.site, job.label, depends_on=tuple(job.depends_on)) for job in self.jobs
+        }
+        done = {job.key: asyncio.Event() for job in self.jobs}
+        outputs: Dict[str, Any] = {}
+
+        async def _run(job: Job) -> None:
+            result = results[job.key]
+            try:
+                for dep in job.depends_on:
+                    await done[dep].wait()
+                failed = [dep for dep in job.depends_on if not results[dep].ok]
+                if failed and job.require_success:
+                    result.status = "skipped"
+                    result.error = f"依赖未成功: {', '.join(failed)}"
+                    logger.warning("跳过 %s：%s", job.key, result.error)
+                    return
+
+                context = JobContext(job.key, {dep: outputs[dep] for dep in job.depends_on if dep in outputs})
+                # 先取站点名额再取全局名额：受站点上限阻塞的任务不占用全局并发
+                site_limit = site_limits.get(job.site)
+                if site_limit is not None:
+                    await site_limit.acquire()
+                try:
+                    async with limit:
+                        await self._execute(job, context, result, started)
+                finally:
+                    if site_limit is not None:
+                        site_limit.release()
+                if result.ok and context.output is not None:
+                    outputs[job.key] = context.output
+            finally:
+                done[job.key].set()
+
+        await asyncio.gather(*(_run(job) for job in self.jobs))
+        return [results[job.key] for job in self.jobs]
+
+    async def _execute(self, job: Job, context: JobContext, result: JobResult, started: float) -> None:
+        begin = time.monotonic()
+        result.started = begin - started
+        logger.info("开始 %s", job.key)
+        try:
+            if self.timeout:
+                ok = await asyncio.wait_for(job.run(context), timeout=self.timeout)
+            else:
+                ok = await job.run(context)
+            result.status = "ok" if ok else "failed"
+        except asyncio.TimeoutError:
+            result.status = "failed"
+            result.error = f"超时（{self.timeout:g}s）"
+        except Exception as exc:
+            result.status = "failed"
+            # Playwright 的异常信息常附带多行提示框，汇总中只保留首行
+            message = (str(exc).strip().splitlines() or [""])[0]
+            result.error = f"{type(exc).__name__}: {message}"
+        result.duration = time.monotonic() - begin
+        logger.info("%s %s，耗时 %.1fs%s", job.key, "成功" if result.ok else "失败", result.duration,
+                    f"（{result.error}）" if result.error else "")
+
+
+def summarize(results: Sequence[JobResult], *, duration: Optional[float] = None) -> Dict[str, Any]:
+    """生成可序列化为 JSON 的汇总。"""
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    summary: Dict[str, Any] = {"total": len(results), **counts}
+    if duration is not None:
+        summary["duration"] = round(duration, 3)
+    summary["jobs"] = [result.to_dict() for result in results]
+    return summary
+
+
+__all__ = ["Job", "JobContext", "JobResult", "JobGraph", "JobFactory", "summarize"]
@@ -2,53 +2,217 @@
 
 提供 `setup_logger(name, log_file)` 用于在各模块间统一日志配置，
 避免重复样板代码。
+
+默认使用队列模式：各 logger 只把记录放入内存队列，由单个后台线程
+（`QueueListener`）写入 stdout 与日志文件；同一日志文件只打开一个共享的
+`FileHandler`，多个 logger（如 `openi`、`openi.popup`、`openi.runner`）不再各自持有句柄。
+多进程场景下，主进程调用 `start_worker_log_queue()` 取得跨进程队列，
+子进程在初始化时调用 `init_worker_logging(queue)`，所有记录回到主进程统一写入。
+
+设置环境变量 `AUTO_LOG_QUEUE=0` 可退回同步写入（仍共享文件句柄）。
+`shutdown_logging()` 之后的记录同样改为同步写入，不会丢失。
+
+父子 logger 都经 `setup_logger` 配置时（如 `openi` 与 `openi.runner`），记录只由离它最近的
+那一个写入，向上传播时祖先 logger 的处理器不再重复写；根 logger 上的处理器（如脚本的汇总
+日志）不受影响。
 """
 
 from __future__ import annotations
 
+import atexit
 import logging
+import os
+import queue as queue_module
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Union
+from typing import Any, Dict, List, Optional, Union
+
+_FORMATTER = logging.Formatter(
+    fmt='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S',
+)
+
+_LOCK = threading.RLock()
+_FILE_HANDLERS: Dict[str, Optional[logging.Handler]] = {}
+_STDOUT_HANDLER: Optional[logging.Handler] = None
+_QUEUE_HANDLERS: List["_FileQueueHandler"] = []
+_LISTENERS: List[QueueListener] = []
+_QUEUE: Any = None
+_SHUT_DOWN = False
+
+
+def _queue_mode() -> bool:
+    return os.environ.get("AUTO_LOG_QUEUE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _stdout_handler() -> logging.Handler:
+    global _STDOUT_HANDLER
+    with _LOCK:
+        if _STDOUT_HANDLER is None:
+            _STDOUT_HANDLER = logging.StreamHandler(stream=sys.stdout)
+            _STDOUT_HANDLER.setFormatter(_FORMATTER)
+        return _STDOUT_HANDLER
+
+
+def _file_handler(path: str) -> Optional[logging.Handler]:
+    """返回 `path` 对应的共享 FileHandler；文件无法打开时返回 None。"""
+    with _LOCK:
+        if path not in _FILE_HANDLERS:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                handler: Optional[logging.Handler] = logging.FileHandler(path, encoding='utf-8')
+                handler.setFormatter(_FORMATTER)
+            except Exception:
+                # 若文件无法打开，仅保留 stdout 输出。
+                handler = None
+            _FILE_HANDLERS[path] = handler
+        return _FILE_HANDLERS[path]
+
+
+class _DispatchHandler(logging.Handler):
+    """监听线程中的分发器：按记录携带的 `log_file` 写入对应文件与 stdout。
+
+    没有 `log_file` 的记录（来自子进程根 logger）交给本进程根 logger 的处理器。
+    """
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        path = getattr(record, "log_file", None)
+        if path is None:
+            for handler in logging.getLogger().handlers:
+                if not isinstance(handler, QueueHandler) and record.levelno >= handler.level:
+                    handler.handle(record)
+            return True
+
+        _stdout_handler().handle(record)
+        file_handler = _file_handler(path)
+        if file_handler is not None:
+            file_handler.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
+class _FileQueueHandler(QueueHandler):
+    """把记录放入队列并标注目标日志文件；消息在入队前格式化为纯文本，可跨进程传递。
+
+    `queue` 为 None（同步模式，或队列已被 `shutdown_logging()` 撤下）时直接同步写入。
+    """
+
+    def __init__(self, target_queue: Any, log_file: str) -> None:
+        super().__init__(target_queue)
+        self.log_file = log_file
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.log_file = self.log_file
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        target = self.queue
+        if target is None:
+            _DispatchHandler().handle(record)
+        else:
+            target.put_nowait(record)
+
+
+class _ClaimFilter(logging.Filter):
+    """记录只由最先处理它的 `setup_logger` logger 写入，祖先 logger 的处理器跳过。"""
+
+    def __init__(self, owner: str) -> None:
+        super().__init__()
+        self.owner = owner
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        owner = record.__dict__.setdefault("_auto_owner", self.owner)
+        return owner == self.owner
+
+
+def _start_listener(target_queue: Any) -> None:
+    listener = QueueListener(target_queue, _DispatchHandler())
+    listener.start()
+    _LISTENERS.append(listener)
+
+
+def _local_queue() -> Any:
+    global _QUEUE
+    with _LOCK:
+        if _QUEUE is None:
+            _QUEUE = queue_module.SimpleQueue()
+            _start_listener(_QUEUE)
+        return _QUEUE
+
+
+@atexit.register
+def shutdown_logging() -> None:
+    """停止所有监听线程并写完队列中剩余的记录；此后的记录改为同步写入。"""
+    global _QUEUE, _SHUT_DOWN
+    with _LOCK:
+        listeners = list(_LISTENERS)
+        _LISTENERS.clear()
+        if any(listener.queue is _QUEUE for listener in listeners):
+            _QUEUE = None
+            _SHUT_DOWN = True
+            for handler in _QUEUE_HANDLERS:
+                handler.queue = None
+    for listener in listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
+
+def start_worker_log_queue() -> Any:
+    """主进程：创建跨进程日志队列并启动对应的写入线程，返回值传给子进程初始化函数。"""
+    from src.core.executor import get_context
+    worker_queue = get_context().Queue(-1)
+    with _LOCK:
+        _start_listener(worker_queue)
+    return worker_queue
+
+
+def init_worker_logging(worker_queue: Any) -> None:
+    """子进程初始化：所有日志（含根 logger）改为发往主进程的队列，由主进程统一写入。"""
+    global _QUEUE
+    with _LOCK:
+        _QUEUE = worker_queue
+        for handler in _QUEUE_HANDLERS:
+            handler.queue = worker_queue
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(worker_queue)]
+    root.setLevel(logging.INFO)
 
 
 def setup_logger(name: str, log_file: Union[str, Path]) -> logging.Logger:
     """创建或获取已配置的 logger。
 
-    - 同时绑定输出到 stdout 的 StreamHandler 与写入 `log_file` 的 FileHandler。
+    - 同时输出到 stdout 与 `log_file`；队列模式下由后台线程写入。
     - 幂等：对同一 logger 的重复调用不会重复添加处理器。
     - 确保 `log_file` 的父目录已存在。
+    - 建议使用 `%` 风格参数（`logger.info("x=%s", x)`），被级别过滤的记录不会格式化消息。
     """
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
+    if getattr(logger, "_auto_log_file", None) is not None:
+        return logger
 
-    log_path = Path(log_file)
+    log_path = str(Path(log_file))
     try:
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+        Path(log_path).parent.mkdir(parents=True, exist_ok=True)
     except Exception:
         pass
 
-    # 构建一致的日志格式器
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-    )
-
-    # 仅在未添加的情况下绑定处理器
-    handler_types = {type(h) for h in logger.handlers}
-
-    if logging.StreamHandler not in handler_types:
-        sh = logging.StreamHandler(stream=sys.stdout)
-        sh.setFormatter(formatter)
-        logger.addHandler(sh)
-
-    if logging.FileHandler not in handler_types:
-        try:
-            fh = logging.FileHandler(str(log_path), encoding='utf-8')
-            fh.setFormatter(formatter)
-            logger.addHandler(fh)
-        except Exception:
-            # 若文件无法打开，仅保留 stdout 处理器。
-            pass
+    with _LOCK:
+        target = _local_queue() if _queue_mode() and not _SHUT_DOWN else None
+        handler = _FileQueueHandler(target, log_path)
+        handler.addFilter(_ClaimFilter(name))
+        _QUEUE_HANDLERS.append(handler)
+        logger.addHandler(handler)
+        logger._auto_log_file = log_path  # type: ignore[attr-defined]
 
     return logger
+
+
+__all__ = ["setup_logger", "start_worker_log_queue", "init_worker_logging", "shutdown_logging"]
@@ -0,0 +1,145 @@
+"""登录运行的分阶段计时（span）记录。
+
+每个 span 记录名称、耗时与结果，在一次运行结束时以 JSONL 追加到
+`data/logs/metrics.jsonl`（每行一个 span）：
+
+    {"ts": "...", "run_id": "...", "site": "openi_alice", "span": "do_login",
+     "parent": null, "duration_ms": 5321.4, "outcome": "ok"}
+
+span 可嵌套，`parent` 为外层 span 名称；站点可在钩子内打开子 span：
+
+    with self.spans.span("navigate_to_cloud_task"):
+        ...
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.core.paths import get_project_paths
+
+_WRITE_LOCK = threading.Lock()
+
+
+def default_metrics_path() -> Path:
+    return get_project_paths().logs / "metrics.jsonl"
+
+
+class Span:
+    """进行中的 span；可在 `with` 块内修改 `outcome` 或追加属性。"""
+
+    __slots__ = ("name", "parent", "attrs", "outcome", "started")
+
+    def __init__(self, name: str, parent: Optional[str], attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.outcome = "ok"
+        self.started = time.perf_counter()
+
+    def set(self, outcome: Optional[str] = None, **attrs: Any) -> None:
+        if outcome is not None:
+            self.outcome = outcome
+        self.attrs.update(attrs)
+
+
+class SpanRecorder:
+    """单个账号运行的 span 记录器；记录先缓存在内存，`flush()` 时一次性写入。"""
+
+    def __init__(self, site_name: str, path: Optional[Path] = None) -> None:
+        self.site_name = site_name
+        self.path = Path(path) if path is not None else default_metrics_path()
+        self.run_id = uuid.uuid4().hex[:12]
+        self._stack: List[str] = []
+        self._records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def new_run(self) -> None:
+        """开始新的一次运行（同一实例多次 `run` 时区分 run_id）。"""
+        with self._lock:
+            self.run_id = uuid.uuid4().hex[:12]
+            self._stack.clear()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """计时一个阶段；块内抛出异常时结果记为 `error` 并继续向上传播。"""
+        with self._lock:
+            parent = self._stack[-1] if self._stack else None
+            self._stack.append(name)
+        current = Span(name, parent, dict(attrs))
+        try:
+            yield current
+        except BaseException as exc:
+            current.set("error", error=type(exc).__name__)
+            raise
+        finally:
+            with self._lock:
+                if self._stack and self._stack[-1] == name:
+                    self._stack.pop()
+            self._append(current.name, current.parent, time.perf_counter() - current.started,
+                         current.outcome, current.attrs)
+
+    def record(self, name: str, duration: float, outcome: str = "ok", **attrs: Any) -> None:
+        """直接记录一个已知耗时（秒）的 span。"""
+        with self._lock:
+            parent = self._stack[-1] if self._stack else None
+        self._append(name, parent, duration, outcome, attrs)
+
+    def flush(self) -> None:
+        """把缓存的记录追加写入 JSONL 文件；写入失败时丢弃，不影响自动化流程。"""
+        with self._lock:
+            records, self._records = self._records, []
+        if not records:
+            return
+        lines = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with _WRITE_LOCK, self.path.open("a", encoding="utf-8") as handle:
+                handle.write(lines)
+        except OSError:
+            pass
+
+    def _append(self, name: str, parent: Optional[str], duration: float, outcome: str,
+                attrs: Dict[str, Any]) -> None:
+        record: Dict[str, Any] = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "run_id": self.run_id,
+            "site": self.site_name,
+            "span": name,
+            "parent": parent,
+            "duration_ms": round(duration * 1000.0, 1),
+            "outcome": outcome,
+        }
+        record.update(attrs)
+        with self._lock:
+            self._records.append(record)
+
+
+class NullSpanRecorder(SpanRecorder):
+    """不记录任何内容的占位实现，供未传入记录器的调用方使用。"""
+
+    def __init__(self) -> None:
+        super().__init__("", Path("metrics.jsonl"))
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        yield Span(name, None, attrs)
+
+    def _append(self, *_args: Any, **_kwargs: Any) -> None:
+        return None
+
+    def flush(self) -> None:
+        return None
+
+
+NULL_SPANS = NullSpanRecorder()
+
+
+__all__ = ["Span", "SpanRecorder", "NullSpanRecorder", "NULL_SPANS", "default_metrics_path"]
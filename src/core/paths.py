@@ -7,10 +7,14 @@
 - 在导入时仅检测一次项目根目录以提高性能。
 - 为数据/配置提供稳定、向后兼容的目录。
 - 将路径拼接从业务逻辑中剥离以保持简单。
+
+设置环境变量 `AUTO_DATA_DIR` 可把数据目录（cookies/logs/screenshots/profiles）
+整体指向其他位置，例如基准测试使用的临时目录；需在导入 `src` 之前设置。
 """
 
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -45,6 +49,7 @@ class ProjectPaths:
         cookies: Cookie 存储目录（data / 'cookies'）。
         logs: 日志输出目录（data / 'logs'）。
         screenshots: 截图输出目录（data / 'screenshots'）。
+        profiles: 持久化浏览器用户数据目录（data / 'profiles'）。
     """
 
     root: Path
@@ -54,20 +59,23 @@ class ProjectPaths:
     cookies: Path
     logs: Path
     screenshots: Path
+    profiles: Path
 
 
 _HERE = Path(__file__).resolve()
 _ROOT = _detect_project_root(_HERE)
+_DATA = Path(os.environ["AUTO_DATA_DIR"]).expanduser().resolve() if os.environ.get("AUTO_DATA_DIR") else _ROOT / "data"
 
 # 在导入时构建路径以满足性能约束。
 _PATHS_SINGLETON = ProjectPaths(
     root=_ROOT,
     src=_ROOT / "src",
-    data=_ROOT / "data",
+    data=_DATA,
     config=_ROOT / "config",
-    cookies=_ROOT / "data" / "cookies",
-    logs=_ROOT / "data" / "logs",
-    screenshots=_ROOT / "data" / "screenshots",
+    cookies=_DATA / "cookies",
+    logs=_DATA / "logs",
+    screenshots=_DATA / "screenshots",
+    profiles=_DATA / "profiles",
 )
 
 
@@ -0,0 +1,246 @@
+"""无需浏览器的 Cookie 有效性探测。
+
+通过标准库 `http.client` 携带已保存的 cookies 请求各站点一个廉价的认证接口，
+根据状态码或响应体判断会话是否仍然有效。同一主机的连接会保持 keep-alive 复用：
+每次探测从空闲池取出（或新建）一个连接独占使用，请求完成后归还，多个线程可同时探测。
+
+探测结果为三态：
+- True：会话有效；
+- False：会话已失效；
+- None：无法判断（网络错误、被挑战页拦截等），调用方应回退到浏览器验证。
+"""
+
+from __future__ import annotations
+
+import http.client
+import threading
+import time
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+@dataclass(frozen=True)
+class ProbeSpec:
+    """单个站点的探测规则。"""
+
+    url: str
+    valid_status: Tuple[int, ...] = (200,)
+    invalid_status: Tuple[int, ...] = (401, 404)
+    # 重定向目标包含任一片段时判定为失效（如跳转到登录页）
+    invalid_redirects: Tuple[str, ...] = ("/login",)
+    # 响应体需包含的标记（任一）；为空表示只看状态码
+    valid_markers: Tuple[str, ...] = ()
+    # 响应体包含任一标记时判定为无法判断
+    inconclusive_markers: Tuple[str, ...] = ()
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+# 站点名取 `site_name` 中第一个下划线之前的部分（如 openi_<username> -> openi）
+PROBE_SPECS: Dict[str, ProbeSpec] = {
+    "openi": ProbeSpec(
+        url="https://git.openi.org.cn/dashboard",
+        invalid_status=(401,),
+        invalid_redirects=("/user/login",),
+        valid_markers=("个人信息和配置",),
+    ),
+    "linuxdo": ProbeSpec(
+        url="https://linux.do/session/current.json",
+        valid_markers=('"current_user"',),
+        headers={"Accept": "application/json"},
+    ),
+    "anyrouter": ProbeSpec(
+        url="https://anyrouter.top/api/user/self",
+        invalid_status=(401,),
+        valid_markers=('"success":true', '"success": true'),
+        # new-api 要求额外的用户头时无法仅凭 Cookie 判断
+        inconclusive_markers=("New-Api-User",),
+        headers={"Accept": "application/json"},
+    ),
+}
+
+_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+)
+
+
+def get_probe_spec(site_name: str) -> Optional[ProbeSpec]:
+    """根据 `site_name`（可带账号后缀）返回探测规则。"""
+    key = (site_name or "").split("_", 1)[0].strip().lower()
+    return PROBE_SPECS.get(key)
+
+
+def _cookie_header(cookies: Iterable[Dict], host: str, path: str) -> str:
+    now = time.time()
+    pairs: List[str] = []
+    for cookie in cookies:
+        domain = str(cookie.get("domain", "")).lstrip(".").lower()
+        if domain and not (host == domain or host.endswith("." + domain)):
+            continue
+        if not path.startswith(str(cookie.get("path") or "/")):
+            continue
+        expires = cookie.get("expires")
+        if isinstance(expires, (int, float)) and 0 < expires < now:
+            continue
+        if cookie.get("name"):
+            pairs.append(f"{cookie['name']}={cookie.get('value', '')}")
+    return "; ".join(pairs)
+
+
+class CookieProbe:
+    """按主机复用 keep-alive 连接的 Cookie 探测器（线程安全）。
+
+    锁只保护空闲连接池的取放，网络请求在锁外进行。
+    """
+
+    def __init__(self, timeout: float = 10.0) -> None:
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def probe(self, spec: ProbeSpec, cookies: List[Dict]) -> Optional[bool]:
+        """携带 cookies 请求 `spec.url` 并返回三态探测结果。"""
+        return self.check(spec, cookies)[0]
+
+    def check(self, spec: ProbeSpec, cookies: List[Dict]) -> Tuple[Optional[bool], Dict[str, Tuple[str, Optional[float]]]]:
+        """同 `probe`，额外返回服务端下发的 Set-Cookie（name -> (value, expires)）。"""
+        parts = urlsplit(spec.url)
+        host = (parts.hostname or "").lower()
+        path = parts.path or "/"
+        target = path + (f"?{parts.query}" if parts.query else "")
+        headers = {
+            "User-Agent": _USER_AGENT,
+            "Cookie": _cookie_header(cookies, host, path),
+            "Connection": "keep-alive",
+            **spec.headers,
+        }
+        if not headers["Cookie"]:
+            return False, {}
+
+        try:
+            status, location, body, set_cookies = self._request(parts.scheme, parts.netloc, target, headers)
+        except (OSError, http.client.HTTPException):
+            return None, {}
+        return self._verdict(spec, status, location, body), set_cookies
+
+    def _verdict(self, spec: ProbeSpec, status: int, location: str, body: str) -> Optional[bool]:
+        if 300 <= status < 400:
+            if any(fragment in location for fragment in spec.invalid_redirects):
+                return False
+            return None
+        if any(marker in body for marker in spec.inconclusive_markers):
+            return None
+        if status in spec.invalid_status:
+            return False
+        if status in spec.valid_status:
+            if not spec.valid_markers:
+                return True
+            return True if any(marker in body for marker in spec.valid_markers) else None
+        return None
+
+    def close(self) -> None:
+        with self._lock:
+            connections = [conn for pool in self._idle.values() for conn in pool]
+            self._idle.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _checkout(self, key: Tuple[str, str]) -> Tuple[http.client.HTTPConnection, bool]:
+        """取出一个空闲连接，没有时新建；第二个返回值表示是否为复用的连接。"""
+        with self._lock:
+            pool = self._idle.get(key)
+            if pool:
+                return pool.pop(), True
+        scheme, netloc = key
+        conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return conn_cls(netloc, timeout=self.timeout), False
+
+    def _checkin(self, key: Tuple[str, str], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    def _request(self, scheme: str, netloc: str, target: str, headers: Dict[str, str]):
+        key = (scheme, netloc)
+        # 复用连接；若服务端已关闭空闲连接则换新连接重试一次
+        for attempt in range(2):
+            conn, reused = self._checkout(key)
+            try:
+                conn.request("GET", target, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read().decode("utf-8", errors="replace")
+                set_cookies = _parse_set_cookies(resp.headers.get_all("Set-Cookie") or [])
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                if attempt or not reused:
+                    raise
+                continue
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return resp.status, resp.getheader("Location") or "", body, set_cookies
+        raise http.client.HTTPException("unreachable")
+
+
+def _parse_set_cookies(values: List[str]) -> Dict[str, Tuple[str, Optional[float]]]:
+    result: Dict[str, Tuple[str, Optional[float]]] = {}
+    for raw in values:
+        jar = SimpleCookie()
+        try:
+            jar.load(raw)
+        except Exception:
+            continue
+        for name, morsel in jar.items():
+            expires: Optional[float] = None
+            if morsel["max-age"]:
+                try:
+                    expires = time.time() + int(morsel["max-age"])
+                except ValueError:
+                    expires = None
+            result[name] = (morsel.value, expires)
+    return result
+
+
+def merge_set_cookies(cookies: List[Dict], updates: Dict[str, Tuple[str, Optional[float]]]) -> bool:
+    """将探测响应中的 Set-Cookie 合并回已保存的 cookie 列表，返回是否有变化。"""
+    changed = False
+    for cookie in cookies:
+        update = updates.get(cookie.get("name"))
+        if update is None:
+            continue
+        value, expires = update
+        if value != cookie.get("value"):
+            cookie["value"] = value
+            changed = True
+        if expires is not None and expires != cookie.get("expires"):
+            cookie["expires"] = expires
+            changed = True
+    return changed
+
+
+_DEFAULT_PROBE: Optional[CookieProbe] = None
+_DEFAULT_PROBE_LOCK = threading.Lock()
+
+
+def get_default_probe() -> CookieProbe:
+    """返回进程内共享的探测器，使批量探测复用同一组连接。"""
+    global _DEFAULT_PROBE
+    with _DEFAULT_PROBE_LOCK:
+        if _DEFAULT_PROBE is None:
+            _DEFAULT_PROBE = CookieProbe()
+        return _DEFAULT_PROBE
+
+
+__all__ = [
+    "ProbeSpec",
+    "PROBE_SPECS",
+    "CookieProbe",
+    "get_probe_spec",
+    "get_default_probe",
+    "merge_set_cookies",
+]
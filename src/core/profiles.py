@@ -0,0 +1,238 @@
+"""按账号持久化的浏览器用户数据目录。
+
+默认每次运行都从空白上下文开始：静态资源全部重新下载，Cookie 由 `CookieManager` 手动注入。
+启用后每个账号（Cookie 存储名，如 `openi_<username>`）拥有独立的用户数据目录
+`data/profiles/<site_name>`，通过 `launch_persistent_context` 启动，HTTP 缓存、
+Service Worker 与站点存储在多次运行间保留，页面以热缓存加载。
+
+同一目录同一时刻只能被一个 Chromium 使用：租用时对 `<name>.lock` 加非阻塞文件锁，
+已被占用（如并发运行同一账号）时返回 None，调用方回退到普通上下文。
+
+为避免目录无限增长，每次归还后清理未被占用的目录：
+
+- 超过 `max_age_days` 未使用的目录整个删除；
+- 单个目录超过 `max_profile_mb` 时删除其中的缓存子目录（Cookie 与站点存储保留）；
+- 全部目录合计超过 `max_total_mb` 时按最久未使用优先整个删除。
+
+配置（`defaults.persistent_profile`，可在 `sites.<site>.persistent_profile` 覆盖，默认关闭）：
+
+    "persistent_profile": {"enabled": true, "max_total_mb": 2048, "max_profile_mb": 512, "max_age_days": 30}
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+
+logger = setup_logger("profiles", get_project_paths().logs / "browser.log")
+
+# 可随时重建的缓存子目录（相对用户数据目录）
+CACHE_DIRS = (
+    "Default/Cache",
+    "Default/Code Cache",
+    "Default/GPUCache",
+    "Default/Service Worker/CacheStorage",
+    "Default/Service Worker/ScriptCache",
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "ShaderCache",
+)
+_LAST_USED = ".last_used"
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class ProfileManager:
+    """`root` 下各账号用户数据目录的租用与清理。"""
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_total_mb: float = 2048,
+        max_profile_mb: float = 512,
+        max_age_days: float = 30,
+    ) -> None:
+        self.root = Path(root)
+        self.max_total_mb = max_total_mb
+        self.max_profile_mb = max_profile_mb
+        self.max_age_days = max_age_days
+        self._held: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, options: Optional[Dict[str, Any]]) -> Optional["ProfileManager"]:
+        """按 `persistent_profile` 配置创建管理器；未启用时返回 None。"""
+        if not isinstance(options, dict) or not options.get("enabled", False):
+            return None
+        return cls(
+            get_project_paths().profiles,
+            max_total_mb=float(options.get("max_total_mb", 2048)),
+            max_profile_mb=float(options.get("max_profile_mb", 512)),
+            max_age_days=float(options.get("max_age_days", 30)),
+        )
+
+    @classmethod
+    def for_site(cls, site: str) -> Optional["ProfileManager"]:
+        """读取 `sites.<site>.persistent_profile`，未配置时回退到 `defaults.persistent_profile`。"""
+        try:
+            from src.core.config import UnifiedConfigManager
+            cfg = UnifiedConfigManager()
+            key = (site or "").split("_", 1)[0].strip().lower()
+            site_cfg = cfg.get_site_config(key)
+            options = site_cfg["persistent_profile"] if "persistent_profile" in site_cfg else (
+                cfg.get_defaults().get("persistent_profile")
+            )
+        except Exception:
+            return None
+        return cls.from_config(options)
+
+    def path_for(self, name: str) -> Path:
+        safe_name = (name or "default").replace("/", "_").replace("\\", "_")
+        return self.root / safe_name
+
+    # 租用 ---------------------------------------------------------------
+    def lease(self, name: str) -> Optional[Path]:
+        """租用 `name` 的用户数据目录；已被其他浏览器占用时返回 None。"""
+        path = self.path_for(name)
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+            handle = self._try_lock(path)
+        except OSError as exc:
+            logger.warning("创建浏览器配置目录 %s 失败: %s", path, exc)
+            return None
+        if handle is None:
+            logger.info("浏览器配置目录 %s 正被占用，本次使用临时上下文", path)
+            return None
+        with self._lock:
+            self._held[path.name] = handle
+        try:
+            (path / _LAST_USED).touch()
+        except OSError:
+            pass
+        return path
+
+    def release(self, name: str) -> None:
+        """归还目录并清理超出上限的配置。"""
+        path = self.path_for(name)
+        with self._lock:
+            handle = self._held.pop(path.name, None)
+        if handle is None:
+            return
+        self._unlock(handle)
+        try:
+            self.prune()
+        except Exception as exc:
+            logger.warning("清理浏览器配置目录失败: %s", exc)
+
+    def _try_lock(self, path: Path) -> Optional[Any]:
+        handle = open(self.root / f"{path.name}.lock", "a+")
+        if fcntl is None:
+            # 无文件锁时只在本进程内互斥
+            with self._lock:
+                if path.name in self._held:
+                    handle.close()
+                    return None
+            return handle
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+        return handle
+
+    @staticmethod
+    def _unlock(handle: Any) -> None:
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+    # 清理 ---------------------------------------------------------------
+    def prune(self) -> List[str]:
+        """按年龄、单目录与总量上限清理未被占用的目录，返回被整个删除的目录名。"""
+        if not self.root.is_dir():
+            return []
+        now = time.time()
+        removed: List[str] = []
+        idle = []
+        for path in sorted(p for p in self.root.iterdir() if p.is_dir()):
+            with self._lock:
+                if path.name in self._held:
+                    continue
+            handle = self._try_lock(path)
+            if handle is None:
+                continue
+            try:
+                last_used = self._last_used(path)
+                if self.max_age_days and now - last_used > self.max_age_days * 86400:
+                    self._remove(path, "超过 %g 天未使用" % self.max_age_days)
+                    removed.append(path.name)
+                    continue
+                size = _dir_size(path)
+                if self.max_profile_mb and size > self.max_profile_mb * 1024 * 1024:
+                    for relative in CACHE_DIRS:
+                        shutil.rmtree(path / relative, ignore_errors=True)
+                    trimmed = _dir_size(path)
+                    logger.info("浏览器配置 %s 超过 %gMB，已清空缓存（%.1fMB -> %.1fMB）",
+                                path.name, self.max_profile_mb, size / 1048576, trimmed / 1048576)
+                    size = trimmed
+                idle.append((last_used, path, size))
+            finally:
+                self._unlock(handle)
+
+        if self.max_total_mb:
+            limit = self.max_total_mb * 1024 * 1024
+            total = sum(size for _t, _p, size in idle) + sum(
+                _dir_size(self.path_for(name)) for name in list(self._held)
+            )
+            for _last_used, path, size in sorted(idle, key=lambda item: item[0]):
+                if total <= limit:
+                    break
+                handle = self._try_lock(path)
+                if handle is None:
+                    continue
+                try:
+                    self._remove(path, "总量超过 %gMB" % self.max_total_mb)
+                finally:
+                    self._unlock(handle)
+                removed.append(path.name)
+                total -= size
+        return removed
+
+    @staticmethod
+    def _last_used(path: Path) -> float:
+        try:
+            return (path / _LAST_USED).stat().st_mtime
+        except OSError:
+            return path.stat().st_mtime
+
+    @staticmethod
+    def _remove(path: Path, reason: str) -> None:
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info("已删除浏览器配置 %s（%s）", path.name, reason)
+
+
+__all__ = ["ProfileManager", "CACHE_DIRS"]
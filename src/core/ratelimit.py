@@ -0,0 +1,73 @@
+"""按站点的速率限制工具。
+
+`RateLimiter` 同时约束两件事：
+- 相邻两次任务启动之间的最小间隔（取代原先固定的 `time.sleep(3)`）；
+- 同一站点同时进行中的任务数上限。
+
+线程安全，可在 `ThreadPoolExecutor` 的多个工作线程间共享。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class RateLimiter:
+    """最小启动间隔 + 最大并发数的组合限流器。"""
+
+    def __init__(self, min_interval: float = 0.0, max_concurrent: Optional[int] = None) -> None:
+        self.min_interval = max(0.0, float(min_interval))
+        self.max_concurrent = int(max_concurrent) if max_concurrent else None
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+        self._slots = threading.BoundedSemaphore(self.max_concurrent) if self.max_concurrent else None
+
+    def acquire(self) -> None:
+        """阻塞直到获得并发槽位且距上次启动已满足最小间隔。"""
+        if self._slots is not None:
+            self._slots.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self.min_interval
+        delay = start_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def release(self) -> None:
+        if self._slots is not None:
+            self._slots.release()
+
+    def __enter__(self) -> "RateLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.release()
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(site: str, options: Optional[Dict[str, Any]] = None) -> RateLimiter:
+    """返回站点级共享限流器，首次调用时按 `options` 创建。
+
+    `options` 支持 `min_interval`（秒，默认 3）与 `max_concurrent`（默认不限）。
+    """
+    key = (site or "").strip().lower()
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            options = options or {}
+            limiter = RateLimiter(
+                min_interval=float(options.get("min_interval", 3)),
+                max_concurrent=options.get("max_concurrent"),
+            )
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+__all__ = ["RateLimiter", "get_rate_limiter"]
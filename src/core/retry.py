@@ -0,0 +1,343 @@
+"""登录失败分类、按站点的重试退避与熔断。
+
+一次登录失败按原因分为四类（`classify_error` / `classify_page`）：
+
+- `timeout`：导航或网络超时、连接错误，站点暂时不可达；
+- `selector_not_found`：页面已加载但等不到预期元素（多为页面改版）；
+- `auth_rejected`：停留在登录表单或服务端拒绝凭据；
+- `challenge_page`：停在 Cloudflare 等人机验证页。
+
+只有暂时性的 `timeout` 与 `challenge_page` 会按指数退避重试；其余类别重试也不会改变结果，
+直接返回失败。
+
+每个站点另有一个熔断器（`CircuitBreaker`）：连续 `threshold` 次暂时性失败后打开，
+`cooldown` 秒内该站点的其余账号直接失败而不再逐个等待超时；冷却结束后放行一次探测，
+成功即恢复。凭据被拒等非暂时性失败不计入熔断。
+
+配置（`defaults` 下全局生效，`sites.<site>` 下按站点覆盖，均可省略）：
+
+    "retry": {"attempts": 3, "base_delay": 5, "max_delay": 60},
+    "circuit_breaker": {"threshold": 3, "cooldown": 300}
+
+    outcome = run_with_retry("openi", lambda: automation.run(...),
+                             failure_class=lambda: automation.failure_class)
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+
+logger = setup_logger("retry", get_project_paths().logs / "retry.log")
+
+TIMEOUT = "timeout"
+SELECTOR_NOT_FOUND = "selector_not_found"
+AUTH_REJECTED = "auth_rejected"
+CHALLENGE_PAGE = "challenge_page"
+UNKNOWN = "unknown"
+# 熔断期间未实际执行的结果类别
+CIRCUIT_OPEN = "circuit_open"
+
+TRANSIENT: FrozenSet[str] = frozenset({TIMEOUT, CHALLENGE_PAGE})
+
+_SELECTOR_HINTS = ("waiting for locator", "waiting for selector", "waiting for get_by", "strict mode violation",
+                   "element is not", "no element")
+_TIMEOUT_HINTS = ("net::err_", "timeout", "timed out", "connection refused", "connection reset",
+                  "econnrefused", "econnreset", "target closed")
+_CHALLENGE_HINTS = ("just a moment", "cf-challenge", "challenge-platform", "challenges.cloudflare.com",
+                    "attention required", "请稍候")
+_AUTH_HINTS = ("401", "403", "unauthorized", "forbidden", "invalid password", "incorrect password",
+               "密码错误", "用户名或密码")
+
+# 页面上明确的凭据错误提示（状态码等数字可能出现在任意页面中，不参与匹配）
+_AUTH_PAGE_HINTS = ("invalid password", "incorrect password", "密码错误", "用户名或密码")
+
+_CHALLENGE_SELECTOR = ('#challenge-form, #cf-challenge-running, #challenge-stage, '
+                       'iframe[src*="challenges.cloudflare.com"]')
+_PASSWORD_SELECTOR = 'input[type="password"]'
+
+
+def classify_error(exc: BaseException) -> str:
+    """按异常类型与信息判断失败类别。"""
+    message = str(exc).lower()
+    if any(hint in message for hint in _CHALLENGE_HINTS):
+        return CHALLENGE_PAGE
+    is_timeout = isinstance(exc, (TimeoutError, ConnectionError))
+    try:
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+        is_timeout = is_timeout or isinstance(exc, PlaywrightTimeoutError)
+    except Exception:
+        pass
+    if any(hint in message for hint in _SELECTOR_HINTS):
+        # 定位元素超时说明页面已到达但结构不符，重试无益
+        return SELECTOR_NOT_FOUND
+    if is_timeout or any(hint in message for hint in _TIMEOUT_HINTS):
+        return TIMEOUT
+    if any(hint in message for hint in _AUTH_HINTS):
+        return AUTH_REJECTED
+    return UNKNOWN
+
+
+def classify_page(page: Any, error: Optional[BaseException] = None) -> str:
+    """登录返回失败（未抛异常）时，按页面最终状态判断失败类别。
+
+    `error` 为站点 `do_login` 自行捕获的异常（如等待跳转超时）。能据此分类时优先采用，
+    只有页面上出现明确的凭据错误提示时才把超时判为 `auth_rejected`。
+    """
+    if page is None:
+        return TIMEOUT
+    if error is not None:
+        error_class = classify_error(error)
+        if error_class == TIMEOUT and _shows_auth_error(page):
+            return AUTH_REJECTED
+        if error_class != UNKNOWN:
+            return error_class
+    try:
+        url = page.url or ""
+        if url in ("", "about:blank") or url.startswith("chrome-error://"):
+            return TIMEOUT
+        title = (page.title() or "").lower()
+        if any(hint in title or hint in url.lower() for hint in _CHALLENGE_HINTS):
+            return CHALLENGE_PAGE
+        if page.locator(_CHALLENGE_SELECTOR).count() > 0:
+            return CHALLENGE_PAGE
+        if page.locator(_PASSWORD_SELECTOR).count() > 0:
+            return AUTH_REJECTED
+    except Exception as exc:
+        return classify_error(exc)
+    return UNKNOWN
+
+
+def _shows_auth_error(page: Any) -> bool:
+    try:
+        text = (page.content() or "").lower()
+    except Exception:
+        return False
+    return any(hint in text for hint in _AUTH_PAGE_HINTS)
+
+
+def _site_options(site: str, key: str) -> Dict[str, Any]:
+    """合并 `defaults.<key>` 与 `sites.<site>.<key>`。"""
+    options: Dict[str, Any] = {}
+    try:
+        from src.core.config import UnifiedConfigManager
+        cfg = UnifiedConfigManager()
+        options.update(cfg.get_defaults().get(key) or {})
+        options.update(cfg.get_site_config(site).get(key) or {})
+    except Exception:
+        pass
+    return options
+
+
+@dataclass
+class RetryPolicy:
+    """最多 `attempts` 次尝试，第 n 次重试前等待 `base_delay * 2**(n-1)` 秒（上限 `max_delay`）。"""
+
+    attempts: int = 3
+    base_delay: float = 5.0
+    max_delay: float = 60.0
+    retry_on: FrozenSet[str] = field(default=TRANSIENT)
+
+    @classmethod
+    def for_site(cls, site: str) -> "RetryPolicy":
+        options = _site_options(site, "retry")
+        return cls(
+            attempts=max(1, int(options.get("attempts", 3))),
+            base_delay=max(0.0, float(options.get("base_delay", 5.0))),
+            max_delay=max(0.0, float(options.get("max_delay", 60.0))),
+        )
+
+    def delay(self, retry: int) -> float:
+        """第 `retry` 次重试（从 1 开始）前的等待秒数，附带至多 20% 的随机抖动。"""
+        base = min(self.base_delay * (2 ** (retry - 1)), self.max_delay)
+        return base * (1.0 + random.uniform(0.0, 0.2))
+
+
+class CircuitBreaker:
+    """按站点统计连续暂时性失败的熔断器，线程安全。"""
+
+    def __init__(
+        self,
+        site: str,
+        *,
+        threshold: int = 3,
+        cooldown: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.site = site
+        self.threshold = max(1, int(threshold))
+        self.cooldown = max(0.0, float(cooldown))
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """是否允许本次尝试；半开状态下只放行一个探测。"""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, ok: bool, error_class: Optional[str] = None) -> None:
+        """记录一次尝试的结果；只有暂时性失败计入熔断。"""
+        with self._lock:
+            probing, self._probing = self._probing, False
+            if ok:
+                if self.opened_at is not None:
+                    logger.info("站点 %s 熔断恢复", self.site)
+                self.failures = 0
+                self.opened_at = None
+                return
+            if error_class not in TRANSIENT:
+                return
+            self.failures += 1
+            if probing or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+                logger.warning("站点 %s 连续 %s 次暂时性失败（%s），熔断 %.0fs",
+                               self.site, self.failures, error_class, self.cooldown)
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(site: str) -> CircuitBreaker:
+    """返回站点级共享熔断器，首次调用时按配置创建。"""
+    key = (site or "").strip().lower()
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(key)
+        if breaker is None:
+            options = _site_options(key, "circuit_breaker")
+            breaker = CircuitBreaker(
+                key,
+                threshold=int(options.get("threshold", 3)),
+                cooldown=float(options.get("cooldown", 300)),
+            )
+            _BREAKERS[key] = breaker
+        return breaker
+
+
+def export_breakers() -> Dict[str, Tuple[int, Optional[float]]]:
+    """各站点熔断器的 `(failures, opened_at)` 快照，供子进程 `restore_breakers` 恢复。
+
+    `opened_at` 取自 `time.monotonic()`，同一台机器上的进程间可直接比较。
+    """
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.items())
+    snapshot = {}
+    for key, breaker in breakers:
+        with breaker._lock:
+            snapshot[key] = (breaker.failures, breaker.opened_at)
+    return snapshot
+
+
+def restore_breakers(snapshot: Optional[Dict[str, Tuple[int, Optional[float]]]]) -> None:
+    """子进程初始化：按主进程的快照设置各站点熔断器状态。"""
+    for key, (failures, opened_at) in (snapshot or {}).items():
+        breaker = get_circuit_breaker(key)
+        with breaker._lock:
+            breaker.failures, breaker.opened_at = int(failures), opened_at
+
+
+@dataclass
+class RetryOutcome:
+    """带重试执行的结果；布尔值即是否成功。"""
+
+    ok: bool
+    attempts: int = 0
+    error_class: Optional[str] = None
+    error: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+
+def run_with_retry(
+    site: str,
+    attempt: Callable[[], Any],
+    *,
+    failure_class: Optional[Callable[[], Optional[str]]] = None,
+    policy: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    label: str = "",
+    sleep: Callable[[float], None] = time.sleep,
+) -> RetryOutcome:
+    """执行 `attempt`（返回是否成功），暂时性失败时按策略退避重试。
+
+    `attempt` 返回假值时通过 `failure_class()` 取得失败类别（通常为
+    `LoginAutomation.failure_class`），未提供时视为 `unknown`；抛出的异常按
+    `classify_error` 分类，不会向上传播。
+    """
+    policy = policy or RetryPolicy.for_site(site)
+    breaker = breaker or get_circuit_breaker(site)
+    name = label or site
+    outcome = RetryOutcome(ok=False)
+    for number in range(1, policy.attempts + 1):
+        if not breaker.allow():
+            logger.warning("%s: 站点 %s 处于熔断状态，直接失败", name, site)
+            outcome.error_class = CIRCUIT_OPEN
+            return outcome
+        outcome.attempts = number
+        try:
+            ok = bool(attempt())
+            error_class = None if ok else ((failure_class() if failure_class else None) or UNKNOWN)
+            error = None
+        except Exception as exc:
+            ok = False
+            error_class = classify_error(exc)
+            error = f"{type(exc).__name__}: {(str(exc).strip().splitlines() or [''])[0]}"
+        breaker.record(ok, error_class)
+        outcome.ok, outcome.error_class, outcome.error = ok, error_class, error
+        if ok:
+            return outcome
+        if error_class not in policy.retry_on or number >= policy.attempts:
+            logger.warning("%s: 第 %s 次尝试失败（%s），不再重试", name, number, error_class)
+            return outcome
+        delay = policy.delay(number)
+        logger.info("%s: 第 %s 次尝试失败（%s），%.1fs 后重试", name, number, error_class, delay)
+        sleep(delay)
+    return outcome
+
+
+__all__ = [
+    "TIMEOUT",
+    "SELECTOR_NOT_FOUND",
+    "AUTH_REJECTED",
+    "CHALLENGE_PAGE",
+    "UNKNOWN",
+    "CIRCUIT_OPEN",
+    "TRANSIENT",
+    "classify_error",
+    "classify_page",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "get_circuit_breaker",
+    "export_breakers",
+    "restore_breakers",
+    "RetryOutcome",
+    "run_with_retry",
+]
@@ -0,0 +1,161 @@
+"""浏览器请求拦截：按站点策略屏蔽图片、字体、媒体与统计脚本等重资源。
+
+策略来自 `config/users.json`（站点级覆盖全局）：
+
+    "defaults": {"block_resources": true},
+    "sites": {
+      "openi": {
+        "block_resources": {
+          "types": ["image", "font", "media"],
+          "deny": ["hm.baidu.com"],
+          "allow": ["/captcha"],
+          "headless_only": true
+        }
+      }
+    }
+
+`allow` 中的 URL 片段始终放行；`deny` 中的片段（域名或路径）总是屏蔽。
+被屏蔽的请求直接 `abort()`，不会产生下载；节省的字节数按资源类型的典型大小估算。
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+# 登录与任务流程均不需要的资源类型
+DEFAULT_BLOCK_TYPES: FrozenSet[str] = frozenset({"image", "font", "media"})
+
+# 常见统计/广告域名
+DEFAULT_DENY: Tuple[str, ...] = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hm.baidu.com",
+    "cnzz.com",
+    "clarity.ms",
+)
+
+# 按资源类型估算的单次响应大小（字节），仅用于统计报告
+_ESTIMATED_BYTES: Dict[str, int] = {
+    "image": 30 * 1024,
+    "font": 40 * 1024,
+    "media": 200 * 1024,
+    "script": 20 * 1024,
+}
+_DEFAULT_ESTIMATE = 5 * 1024
+
+
+class RouteStats:
+    """一次运行中的拦截统计（线程安全）。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.total = 0
+        self.blocked = 0
+        self.bytes_saved = 0
+        self.by_type: Dict[str, int] = {}
+
+    def record(self, resource_type: str, blocked: bool) -> None:
+        with self._lock:
+            self.total += 1
+            if blocked:
+                self.blocked += 1
+                self.bytes_saved += _ESTIMATED_BYTES.get(resource_type, _DEFAULT_ESTIMATE)
+                self.by_type[resource_type] = self.by_type.get(resource_type, 0) + 1
+
+    def summary(self) -> str:
+        with self._lock:
+            detail = ", ".join(f"{k}={v}" for k, v in sorted(self.by_type.items())) or "无"
+            return (
+                f"拦截 {self.blocked}/{self.total} 个请求，"
+                f"估算节省 {self.bytes_saved / 1024:.0f} KB（{detail}）"
+            )
+
+
+@dataclass(frozen=True)
+class ResourcePolicy:
+    """单个站点的资源放行/屏蔽策略。"""
+
+    block_types: FrozenSet[str] = DEFAULT_BLOCK_TYPES
+    deny: Tuple[str, ...] = DEFAULT_DENY
+    allow: Tuple[str, ...] = ()
+    # 仅在无头模式下生效，便于有头调试时看到完整页面
+    headless_only: bool = True
+
+    @classmethod
+    def from_config(cls, options: Any) -> Optional["ResourcePolicy"]:
+        """由 `block_resources` 配置项构建策略；未开启时返回 None。
+
+        `options` 可以是布尔值（使用默认策略）或字典（`enabled` 缺省为 True）。
+        """
+        if options is True:
+            return cls()
+        if not isinstance(options, dict) or not options.get("enabled", True):
+            return None
+        types = options.get("types")
+        return cls(
+            block_types=frozenset(str(t) for t in types) if isinstance(types, list) else DEFAULT_BLOCK_TYPES,
+            deny=DEFAULT_DENY + tuple(str(d) for d in options.get("deny") or ()),
+            allow=tuple(str(a) for a in options.get("allow") or ()),
+            headless_only=bool(options.get("headless_only", True)),
+        )
+
+    @classmethod
+    def for_site(cls, site: str) -> Optional["ResourcePolicy"]:
+        """读取 `sites.<site>.block_resources`，未配置时回退到 `defaults.block_resources`。"""
+        try:
+            from src.core.config import UnifiedConfigManager
+            cfg = UnifiedConfigManager()
+            key = (site or "").split("_", 1)[0].strip().lower()
+            site_cfg = cfg.get_site_config(key)
+            options = site_cfg["block_resources"] if "block_resources" in site_cfg else (
+                cfg.get_defaults().get("block_resources")
+            )
+        except Exception:
+            return None
+        return cls.from_config(options)
+
+    def applies_to(self, headless: bool) -> bool:
+        return headless or not self.headless_only
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if any(fragment in url for fragment in self.allow):
+            return False
+        if any(fragment in url for fragment in self.deny):
+            return True
+        return resource_type in self.block_types
+
+    def install(self, context) -> RouteStats:
+        """在同步 API 的浏览器上下文上安装拦截规则，返回统计对象。"""
+        stats = RouteStats()
+
+        def _handle(route, request) -> None:
+            blocked = self.should_block(request.url, request.resource_type)
+            stats.record(request.resource_type, blocked)
+            if blocked:
+                route.abort()
+            else:
+                route.fallback()
+
+        context.route("**/*", _handle)
+        return stats
+
+    async def install_async(self, context) -> RouteStats:
+        """`install` 的 asyncio 版本。"""
+        stats = RouteStats()
+
+        async def _handle(route, request) -> None:
+            blocked = self.should_block(request.url, request.resource_type)
+            stats.record(request.resource_type, blocked)
+            if blocked:
+                await route.abort()
+            else:
+                await route.fallback()
+
+        await context.route("**/*", _handle)
+        return stats
+
+
+__all__ = ["DEFAULT_BLOCK_TYPES", "DEFAULT_DENY", "ResourcePolicy", "RouteStats"]
@@ -0,0 +1,324 @@
+"""Cookie 刷新调度守护进程。
+
+与 cron 定时全量检查不同，调度器为每个账号预测下一次需要刷新的时间，放入按到期时间
+排序的优先队列（`heapq`），只在最近一个账号到期时醒来：
+
+- 到期时间 = 会话关键 Cookie 的 `expires` - `refresh_before_days`；没有真实过期时间时
+  回退为保存时间 + `age_days`；从未登录过的账号立即到期；
+- 每个账号减去 [0, `jitter_minutes`] 的确定性抖动，已过期的账号分散到未来的抖动窗口内，
+  避免集中刷新；
+- 同一站点同时进行的刷新数不超过 `sites.<site>.rate_limit.max_concurrent`（默认 1），
+  相邻启动间隔沿用站点限流器的 `min_interval`；
+- 刷新失败按 `retry_minutes` 指数退避（上限 `max_retry_minutes`）；
+- 站点刷新成功后，登录依赖其会话的站点（见 `SiteSpec.depends_on`）随即重新刷新；
+- 每 `rescan_minutes` 重新读取配置与 Cookie，感知新增账号或外部完成的刷新。
+
+配置（`defaults.scheduler`，均可省略）：
+
+    "scheduler": {"refresh_before_days": 3, "age_days": 20, "jitter_minutes": 30,
+                  "retry_minutes": 30, "max_retry_minutes": 360, "max_workers": 2,
+                  "rescan_minutes": 60}
+"""
+
+from __future__ import annotations
+
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core.cookies import CookieManager
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+from src.core.ratelimit import get_rate_limiter
+
+logger = setup_logger("scheduler", get_project_paths().logs / "scheduler.log")
+
+DEFAULT_OPTIONS: Dict[str, float] = {
+    "refresh_before_days": 3.0,
+    "age_days": 20.0,
+    "jitter_minutes": 30.0,
+    "retry_minutes": 30.0,
+    "max_retry_minutes": 360.0,
+    "max_workers": 2,
+    "rescan_minutes": 60.0,
+}
+
+
+@dataclass
+class Account:
+    """调度中的单个账号。"""
+
+    key: str
+    site: str
+    user: Dict[str, Any]
+    due: float = 0.0
+    # 计算 `due` 所依据的时间点（过期时间或保存时间），变化时重新预测
+    basis: Optional[float] = None
+    failures: int = 0
+    version: int = 0
+    running: bool = False
+
+
+@dataclass(order=True)
+class _Entry:
+    due: float
+    seq: int
+    key: str = field(compare=False)
+    version: int = field(compare=False)
+
+
+def load_options(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    options: Dict[str, Any] = dict(DEFAULT_OPTIONS)
+    try:
+        from src.core.config import UnifiedConfigManager
+        options.update(UnifiedConfigManager().get_defaults().get("scheduler") or {})
+    except Exception:
+        pass
+    options.update({k: v for k, v in (overrides or {}).items() if v is not None})
+    return options
+
+
+def _site_cap(site: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+    try:
+        from src.core.config import UnifiedConfigManager
+        rate_limit = UnifiedConfigManager().get_site_config(site).get("rate_limit") or None
+    except Exception:
+        rate_limit = None
+    cap = (rate_limit or {}).get("max_concurrent") or 1
+    return max(1, int(cap)), rate_limit
+
+
+class RefreshScheduler:
+    """按预测过期时间驱动的 Cookie 刷新调度器。"""
+
+    def __init__(
+        self,
+        users_loader: Callable[[], List[Dict[str, Any]]],
+        *,
+        refresh: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        cookie_manager: Optional[CookieManager] = None,
+        options: Optional[Dict[str, Any]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        from src.sites.registry import refresh_account
+
+        self.users_loader = users_loader
+        self.refresh = refresh or (lambda user: refresh_account(user, headless=True))
+        self.cookie_manager = cookie_manager or CookieManager()
+        self.options = load_options(options)
+        self.clock = clock
+        self.accounts: Dict[str, Account] = {}
+        self._heap: List[_Entry] = []
+        self._seq = 0
+        self._ready: List[Account] = []
+        self._running: Dict[str, int] = {}
+        self._caps: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+
+    # 预测 ---------------------------------------------------------------
+    def predict(self, account: Account) -> Tuple[Optional[float], float]:
+        """返回 `(basis, due)`：预测所依据的时间点与计划刷新时间。"""
+        now = self.clock()
+        jitter = float(self.options["jitter_minutes"]) * 60.0
+        expiry = self.cookie_manager.get_expiry(account.key)
+        if expiry is not None:
+            basis: Optional[float] = expiry
+            due = expiry - float(self.options["refresh_before_days"]) * 86400.0
+        else:
+            saved_at = self.cookie_manager.get_saved_at(account.key)
+            basis = saved_at.timestamp() if saved_at is not None else None
+            due = basis + float(self.options["age_days"]) * 86400.0 if basis is not None else now
+        # 以账号与依据时间为种子的确定性抖动：重新扫描时不会反复漂移
+        rng = random.Random(f"{account.key}:{basis}")
+        due -= rng.uniform(0.0, jitter)
+        if due < now:
+            # 已到期的账号分散到接下来的抖动窗口内
+            due = now + rng.uniform(0.0, jitter)
+        return basis, due
+
+    # 队列维护 -----------------------------------------------------------
+    def rescan(self) -> None:
+        """重新读取账号列表与 Cookie，更新各账号的计划时间。"""
+        from src.sites.registry import cookie_site_name, get_site
+
+        users = self.users_loader()
+        seen = set()
+        with self._lock:
+            for user in users:
+                site = str(user.get("site", "")).strip().lower()
+                if get_site(site) is None:
+                    continue
+                key = cookie_site_name(user)
+                seen.add(key)
+                account = self.accounts.get(key)
+                if account is None:
+                    account = Account(key=key, site=site, user=user)
+                    self.accounts[key] = account
+                else:
+                    account.user = user
+                if account.running or account.failures:
+                    continue
+                basis, due = self.predict(account)
+                if account.version == 0 or basis != account.basis:
+                    account.basis = basis
+                    self._schedule(account, due)
+            for key in list(self.accounts):
+                if key not in seen and not self.accounts[key].running:
+                    self.accounts.pop(key)
+                    self._ready = [a for a in self._ready if a.key != key]
+            self._caps = {site: _site_cap(site)[0] for site in {a.site for a in self.accounts.values()}}
+
+    def _schedule(self, account: Account, due: float) -> None:
+        account.due = due
+        account.version += 1
+        self._seq += 1
+        heapq.heappush(self._heap, _Entry(due, self._seq, account.key, account.version))
+
+    def schedule_table(self) -> List[Tuple[str, float]]:
+        """按计划时间排序的 `(key, due)` 列表。"""
+        with self._lock:
+            return sorted(((a.key, a.due) for a in self.accounts.values()), key=lambda item: item[1])
+
+    def _pop_due(self, now: float) -> None:
+        while self._heap and self._heap[0].due <= now:
+            entry = heapq.heappop(self._heap)
+            account = self.accounts.get(entry.key)
+            if account is None or account.version != entry.version or account.running:
+                continue
+            self._ready.append(account)
+
+    def _next_wakeup(self, now: float) -> float:
+        while self._heap:
+            entry = self._heap[0]
+            account = self.accounts.get(entry.key)
+            if account is not None and account.version == entry.version:
+                return max(0.0, entry.due - now)
+            heapq.heappop(self._heap)
+        return float("inf")
+
+    # 执行 ---------------------------------------------------------------
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+
+    def run_forever(self) -> None:
+        """主循环：直到 `stop()` 被调用。"""
+        max_workers = max(1, int(self.options["max_workers"]))
+        rescan_every = max(60.0, float(self.options["rescan_minutes"]) * 60.0)
+        next_rescan = 0.0
+        logger.info("刷新调度器启动（max_workers=%s）", max_workers)
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh")
+        try:
+            while not self._stopping:
+                now = self.clock()
+                if now >= next_rescan:
+                    self.rescan()
+                    next_rescan = now + rescan_every
+                    self._log_schedule()
+                with self._lock:
+                    self._pop_due(now)
+                    self._dispatch(executor, max_workers)
+                    wait = min(self._next_wakeup(now), next_rescan - now)
+                self._wake.wait(timeout=max(1.0, wait))
+                self._wake.clear()
+            logger.info("刷新调度器正在停止，等待进行中的刷新完成...")
+        finally:
+            # 尚未开始的刷新直接取消，不再启动浏览器
+            executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("刷新调度器已停止")
+
+    def _dispatch(self, executor: ThreadPoolExecutor, max_workers: int) -> None:
+        pending: List[Account] = []
+        busy = sum(self._running.values())
+        for account in sorted(self._ready, key=lambda a: a.due):
+            cap = self._caps.get(account.site, 1)
+            if busy >= max_workers or self._running.get(account.site, 0) >= cap:
+                pending.append(account)
+                continue
+            account.running = True
+            busy += 1
+            self._running[account.site] = self._running.get(account.site, 0) + 1
+            future = executor.submit(self._refresh_one, account)
+            future.add_done_callback(lambda fut, acc=account: self._on_done(acc, fut))
+        self._ready = pending
+
+    def _refresh_one(self, account: Account) -> Optional[bool]:
+        """执行一次刷新；等待限流期间调度器已停止时不再刷新，返回 None。"""
+        if self._stopping:
+            return None
+        _cap, rate_limit = _site_cap(account.site)
+        with get_rate_limiter(account.site, rate_limit):
+            if self._stopping:
+                logger.info("调度器已停止，跳过刷新 %s", account.key)
+                return None
+            logger.info("开始刷新 %s", account.key)
+            started = time.monotonic()
+            ok = bool(self.refresh(account.user))
+            logger.info("刷新 %s %s，耗时 %.1fs", account.key, "成功" if ok else "失败", time.monotonic() - started)
+            return ok
+
+    def _on_done(self, account: Account, future: Future) -> None:
+        if future.cancelled() or (future.exception() is None and future.result() is None):
+            # 停止时被取消或跳过：只释放占用，不计入失败也不重新排期
+            with self._lock:
+                account.running = False
+                self._running[account.site] = max(0, self._running.get(account.site, 1) - 1)
+            return
+        try:
+            ok = bool(future.result())
+        except Exception as exc:
+            logger.warning("刷新 %s 异常: %s", account.key, exc)
+            ok = False
+        now = self.clock()
+        retry = float(self.options["retry_minutes"]) * 60.0
+        with self._lock:
+            account.running = False
+            self._running[account.site] = max(0, self._running.get(account.site, 1) - 1)
+            if ok:
+                account.failures = 0
+                basis, due = self.predict(account)
+                account.basis = basis
+                # 新 Cookie 寿命过短时至少间隔一个重试周期，避免原地循环
+                due = max(due, now + retry)
+            else:
+                account.failures += 1
+                backoff = min(retry * (2 ** (account.failures - 1)), float(self.options["max_retry_minutes"]) * 60.0)
+                due = now + backoff
+            if account.key in self.accounts:
+                self._schedule(account, due)
+            cascaded = self._cascade(account.site, now) if ok else []
+        logger.info("%s 下次刷新: %s", account.key, _fmt(due))
+        if cascaded:
+            logger.info("%s 会话已更新，随即刷新依赖站点: %s", account.key, ", ".join(cascaded))
+        self._wake.set()
+
+    def _cascade(self, site: str, now: float) -> List[str]:
+        """把依赖 `site` 会话的账号提前到现在（调用方持有锁）。"""
+        from src.sites.registry import dependent_sites
+
+        dependents = set(dependent_sites(site))
+        cascaded = []
+        for account in self.accounts.values():
+            if account.site in dependents and not account.running:
+                account.failures = 0
+                self._schedule(account, now)
+                cascaded.append(account.key)
+        return cascaded
+
+    def _log_schedule(self) -> None:
+        for key, due in self.schedule_table():
+            logger.info("  计划 %-24s %s", key, _fmt(due))
+
+
+def _fmt(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+__all__ = ["Account", "RefreshScheduler", "DEFAULT_OPTIONS", "load_options"]
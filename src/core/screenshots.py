@@ -0,0 +1,157 @@
+"""按级别控制的调试截图服务。
+
+截图先保存在内存环形缓冲区（仅保留最近 K 帧），只有在运行失败时才写入磁盘；
+文件写入在后台线程完成，自动化线程不等待磁盘 IO。
+
+级别（`screenshots.level`，可在 `defaults` 或 `sites.<site>` 中配置）：
+- `off`：不截图；
+- `failure`（默认）：步骤截图不执行，仅在失败时截取最后一帧；
+- `debug`：每个步骤都截图进入缓冲区，失败时连同最后一帧一并落盘。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+LEVELS = ("off", "failure", "debug")
+
+_WRITER: Optional[ThreadPoolExecutor] = None
+_WRITER_LOCK = threading.Lock()
+
+
+def _writer() -> ThreadPoolExecutor:
+    """进程内共享的单线程写入器，解释器退出前会等待队列写完。"""
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot-writer")
+        return _WRITER
+
+
+def _write(path: Path, data: bytes) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    except OSError:
+        pass
+
+
+def _load_options(site: str) -> Dict[str, Any]:
+    try:
+        from src.core.config import UnifiedConfigManager
+        cfg = UnifiedConfigManager()
+        options = dict(cfg.get_defaults().get("screenshots") or {})
+        options.update(cfg.get_site_config(site).get("screenshots") or {})
+        return options
+    except Exception:
+        return {}
+
+
+class ScreenshotRecorder:
+    """单次运行的截图记录器（环形缓冲 + 失败时异步落盘）。"""
+
+    def __init__(
+        self,
+        out_dir: Path,
+        *,
+        level: str = "failure",
+        frames: int = 10,
+        full_page: bool = False,
+    ) -> None:
+        self.out_dir = Path(out_dir)
+        self.level = level if level in LEVELS else "failure"
+        self.full_page = full_page
+        self._frames: Deque[Tuple[str, bytes]] = deque(maxlen=max(1, int(frames)))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_site(cls, site_name: str, out_dir: Path) -> "ScreenshotRecorder":
+        """按 `screenshots` 配置（`level`/`frames`/`full_page`）创建记录器。"""
+        site = (site_name or "").split("_", 1)[0].strip().lower()
+        options = _load_options(site)
+        return cls(
+            out_dir,
+            level=str(options.get("level", "failure")).lower(),
+            frames=int(options.get("frames", 10)),
+            full_page=bool(options.get("full_page", False)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.level != "off"
+
+    def capture(self, page, label: str) -> None:
+        """步骤截图：仅在 `debug` 级别下截取并放入缓冲区。"""
+        if self.level != "debug" or page is None:
+            return
+        self._grab(page, label)
+
+    async def capture_async(self, page, label: str) -> None:
+        if self.level != "debug" or page is None:
+            return
+        try:
+            data = await page.screenshot(full_page=self.full_page)
+        except Exception:
+            return
+        self._push(label, data)
+
+    def capture_failure(self, page, label: str) -> None:
+        """失败现场截图：`failure` 与 `debug` 级别下均放入缓冲区，等待 `fail` 统一落盘。"""
+        if not self.enabled or page is None:
+            return
+        self._grab(page, label)
+
+    def fail(self, page, label: str = "failure") -> List[Path]:
+        """运行失败：截取最后一帧并把缓冲区全部交给后台线程写盘，返回目标路径。"""
+        if not self.enabled:
+            return []
+        if page is not None:
+            self._grab(page, label)
+        return self.flush()
+
+    async def fail_async(self, page, label: str = "failure") -> List[Path]:
+        if not self.enabled:
+            return []
+        if page is not None:
+            try:
+                self._push(label, await page.screenshot(full_page=self.full_page))
+            except Exception:
+                pass
+        return self.flush()
+
+    def flush(self) -> List[Path]:
+        with self._lock:
+            frames = list(self._frames)
+            self._frames.clear()
+        paths: List[Path] = []
+        for name, data in frames:
+            path = self.out_dir / f"{name}.png"
+            _writer().submit(_write, path, data)
+            paths.append(path)
+        return paths
+
+    def discard(self) -> None:
+        """运行成功：丢弃缓冲区，不产生任何磁盘写入。"""
+        with self._lock:
+            self._frames.clear()
+
+    def _grab(self, page, label: str) -> None:
+        try:
+            data = page.screenshot(full_page=self.full_page)
+        except Exception:
+            return
+        self._push(label, data)
+
+    def _push(self, label: str, data: bytes) -> None:
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+        with self._lock:
+            self._frames.append((f"{ts}_{safe}", data))
+
+
+__all__ = ["LEVELS", "ScreenshotRecorder"]
@@ -0,0 +1,128 @@
+"""基于具体条件的等待工具，取代固定时长的 `wait_for_timeout`。
+
+每个等待都有上限（毫秒）：条件提前满足时立即返回，超时仅返回 False 而不抛出异常，
+调用方可以沿用原有的判断逻辑。支持的条件：
+- URL 变化或匹配（`wait_for_url_change` / `wait_for_url_match`）；
+- 选择器状态（`wait_for_selector` / `wait_for_any_selector`）；
+- 特定网络响应（`wait_for_response`）；
+- DOM 静默，即一段时间内无变更（`wait_for_dom_quiet`）；
+- 网络空闲（`wait_for_network_idle`）。
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable, Optional, Union
+
+from playwright.sync_api import Page, Response
+
+# 页面内 MutationObserver：连续 quiet 毫秒无变更时返回 true，超过 limit 毫秒返回 false
+DOM_QUIET_SCRIPT = """
+([quiet, limit]) => new Promise((resolve) => {
+    let timer = null;
+    let cap = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(() => done(true), quiet);
+    });
+    const done = (result) => {
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(cap);
+        resolve(result);
+    };
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    timer = setTimeout(() => done(true), quiet);
+    cap = setTimeout(() => done(false), limit);
+})
+"""
+
+UrlPredicate = Union[str, Callable[[str], bool]]
+
+
+def wait_for_url_change(page: Page, old_url: Optional[str] = None, *, timeout: float = 10000) -> bool:
+    """等待页面 URL 不同于 `old_url`（默认取当前 URL）。"""
+    previous = page.url if old_url is None else old_url
+    return wait_for_url_match(page, lambda url: url != previous, timeout=timeout)
+
+
+def wait_for_url_match(page: Page, url: UrlPredicate, *, timeout: float = 10000) -> bool:
+    """等待 URL 满足 glob 模式或谓词（不要求新的导航完成）。"""
+    try:
+        page.wait_for_url(url, timeout=timeout, wait_until="commit")
+        return True
+    except Exception:
+        return False
+
+
+def wait_for_selector(page: Page, selector: str, *, state: str = "visible", timeout: float = 5000) -> bool:
+    """等待选择器进入指定状态（attached/detached/visible/hidden）。"""
+    try:
+        page.locator(selector).first.wait_for(state=state, timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+def wait_for_any_selector(page: Page, selectors: Iterable[str], *, timeout: float = 5000) -> Optional[str]:
+    """等待任一选择器可见，返回最先匹配的选择器；超时返回 None。"""
+    candidates = [s for s in selectors if s]
+    if not candidates or not wait_for_selector(page, ", ".join(candidates), timeout=timeout):
+        return None
+    for selector in candidates:
+        try:
+            if page.locator(selector).first.is_visible():
+                return selector
+        except Exception:
+            continue
+    return candidates[0]
+
+
+def wait_for_response(
+    page: Page,
+    match: Union[str, Callable[[Response], bool]],
+    *,
+    timeout: float = 10000,
+) -> Optional[Response]:
+    """等待 URL 包含 `match`（或满足谓词）的下一个网络响应。
+
+    只能捕获调用之后到达的响应；需要覆盖触发动作时请使用 `page.expect_response`。
+    """
+    predicate = match if callable(match) else (lambda resp: match in resp.url)
+    try:
+        return page.wait_for_event("response", predicate=predicate, timeout=timeout)
+    except Exception:
+        return None
+
+
+def wait_for_dom_quiet(page: Page, *, quiet: float = 300, timeout: float = 3000) -> bool:
+    """等待 DOM 连续 `quiet` 毫秒无变更；超过 `timeout` 仍在变化时返回 False。"""
+    try:
+        return bool(page.evaluate(DOM_QUIET_SCRIPT, [quiet, timeout]))
+    except Exception:
+        # 等待期间发生导航会销毁执行上下文，此时退回等待加载完成
+        try:
+            page.wait_for_load_state("domcontentloaded", timeout=timeout)
+        except Exception:
+            pass
+        return False
+
+
+def wait_for_network_idle(page: Page, *, timeout: float = 3000) -> bool:
+    """等待网络空闲（500ms 无请求），最多 `timeout` 毫秒。"""
+    try:
+        page.wait_for_load_state("networkidle", timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+__all__ = [
+    "DOM_QUIET_SCRIPT",
+    "wait_for_url_change",
+    "wait_for_url_match",
+    "wait_for_selector",
+    "wait_for_any_selector",
+    "wait_for_response",
+    "wait_for_dom_quiet",
+    "wait_for_network_idle",
+]
@@ -0,0 +1,214 @@
+"""AnyRouter 登录流程（LinuxDO OAuth）的 asyncio 版本，与 `login.py` 对应。"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from playwright.async_api import Page
+
+from src.core.async_base import AsyncBrowserManager, AsyncLoginAutomation
+from src.core.async_waits import wait_for_any_selector, wait_for_selector, wait_for_url_match
+from src.core.config import UnifiedConfigManager
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+from src.sites.linuxdo.session import load_session, save_session
+
+logger = setup_logger("anyrouter", get_project_paths().logs / "anyrouter.log")
+
+VERIFY_URL = 'https://anyrouter.top/console/token'
+
+_OAUTH_BUTTON_NAMES = ('使用 LinuxDO 继续', '使用 LinuxDO 登录')
+_OAUTH_BUTTON_SELECTORS = tuple(f'button:has-text("{n}")' for n in _OAUTH_BUTTON_NAMES)
+_USER_BUTTON_SELECTOR = 'button:has-text("linuxdo_")'
+_LOGIN_FORM_SELECTOR = '#login-account-name, input[name="login"]'
+
+
+class AsyncAnyrouterLogin(AsyncLoginAutomation):
+    """`AnyrouterLogin` 的异步版本。
+
+    `linuxdo_state` 为同一批次中 LinuxDO 任务刚验证过的 `storage_state`；提供时直接注入
+    OAuth 所需的 LinuxDO 会话，不再从磁盘读取或在授权页重新登录。
+    """
+
+    def __init__(
+        self,
+        *,
+        headless: bool = False,
+        browser_manager: Optional[AsyncBrowserManager] = None,
+        linuxdo_state: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__('anyrouter', headless=headless, browser_manager=browser_manager)
+        self.linuxdo_state = linuxdo_state
+
+    async def verify_login(self, page: Page) -> bool:
+        try:
+            current_url = page.url
+            if '/console' in current_url:
+                logger.info("已登录（控制台页面）")
+                return True
+
+            if await page.locator('button:has-text("linuxdo_")').count() > 0:
+                logger.info("已登录（检测到用户按钮）")
+                return True
+
+            if '/login' in current_url or current_url == 'https://anyrouter.top/':
+                login_buttons = page.locator(', '.join(f'button:has-text("{n}")' for n in _OAUTH_BUTTON_NAMES))
+                if await login_buttons.count() > 0:
+                    logger.info("未登录（检测到登录按钮）")
+                    return False
+                await wait_for_url_match(page, '**/console**', timeout=2000)
+                if '/console' in page.url:
+                    logger.info("已登录（跳转到控制台）")
+                    return True
+
+            logger.info("登录状态未知")
+            return False
+        except Exception as exc:
+            logger.warning("验证登录出错: %s", exc)
+            return False
+
+    async def do_login(self, page: Page, **_credentials) -> bool:
+        logger.info("使用 LinuxDO OAuth 登录...")
+        try:
+            await page.goto('https://anyrouter.top/login', timeout=60000)
+            await page.wait_for_load_state('domcontentloaded')
+            # 与同步版本一致：首次进入后刷新一次，规避 OAuth 按钮首次点击无响应
+            await page.reload(wait_until='domcontentloaded')
+            await wait_for_any_selector(page, _OAUTH_BUTTON_SELECTORS, timeout=3000)
+
+            await self._close_announcement_modal(page)
+            linuxdo_pre_logged = await self._preload_linuxdo_cookie(page)
+
+            auth_page = await self._click_oauth_button(page)
+            if auth_page is None or 'linux.do' not in auth_page.url:
+                logger.warning("未能打开 LinuxDO 授权页面")
+                return False
+
+            if not linuxdo_pre_logged:
+                if not await self._fill_linuxdo_credentials_if_needed(auth_page):
+                    return False
+                try:
+                    save_session(await auth_page.context.cookies(), cookie_manager=self.cookie_manager)
+                except Exception as exc:
+                    logger.warning("保存 LinuxDO cookie 失败: %s", exc)
+
+            if 'anyrouter.top' in page.url and await self.verify_login(page):
+                return True
+
+            await self._handle_oauth_consent(auth_page)
+            await wait_for_url_match(auth_page, lambda url: 'linux.do' not in url, timeout=2000)
+            await page.bring_to_front()
+            await page.reload()
+            await page.wait_for_load_state('domcontentloaded')
+            await wait_for_any_selector(page, (_USER_BUTTON_SELECTOR, *_OAUTH_BUTTON_SELECTORS), timeout=5000)
+            return await self.verify_login(page)
+        except Exception as exc:
+            logger.error("登录过程出错: %s", exc)
+            await self.browser_manager.save_error_screenshot(page, 'anyrouter_oauth_exception.png')
+            return False
+
+    async def after_login(self, page: Page, **_credentials) -> None:
+        try:
+            if '/console/token' not in page.url:
+                await page.goto(VERIFY_URL, timeout=60000)
+                await page.wait_for_load_state('domcontentloaded')
+            await page.wait_for_load_state('networkidle')
+        except Exception as exc:
+            logger.error("登录后处理异常: %s", exc)
+
+    # 辅助方法 -----------------------------------------------------------
+    async def _close_announcement_modal(self, page: Page) -> None:
+        for name in ('今日关闭', '关闭公告', '关闭'):
+            try:
+                button = page.get_by_role('button', name=name)
+                await button.click(timeout=1500)
+                logger.info('公告已关闭（点击了"%s"）', name)
+                await wait_for_any_selector(page, _OAUTH_BUTTON_SELECTORS, timeout=1000)
+                break
+            except Exception:
+                continue
+
+    async def _preload_linuxdo_cookie(self, page: Page) -> bool:
+        cookies = load_session(self.linuxdo_state, cookie_manager=self.cookie_manager)
+        if not cookies:
+            logger.info("LinuxDO cookie 不可用")
+            return False
+        try:
+            await page.context.add_cookies(cookies)
+            source = "LinuxDO 任务交付的会话" if self.linuxdo_state else "LinuxDO cookie"
+            logger.info("%s已加载到 browser context", source)
+            return True
+        except Exception as exc:
+            logger.info("预加载 LinuxDO cookie 出错: %s", exc)
+            return False
+
+    async def _click_oauth_button(self, page: Page) -> Optional[Page]:
+        candidates = [page.get_by_role('button', name=n) for n in _OAUTH_BUTTON_NAMES]
+        candidates += [page.get_by_text(n) for n in _OAUTH_BUTTON_NAMES]
+        candidates.append(page.locator('button:has-text("LinuxDO")').first)
+        for locator in candidates:
+            try:
+                async with page.expect_popup(timeout=10000) as popup_info:
+                    await locator.click(timeout=5000)
+                popup_page = await popup_info.value
+                await popup_page.wait_for_load_state('domcontentloaded')
+                logger.info("新窗口已打开，URL: %s", popup_page.url)
+                return popup_page
+            except Exception as exc:
+                logger.info("OAuth 点击失败: %s", exc)
+                continue
+        logger.warning("所有 OAuth 按钮点击失败；终止登录")
+        return None
+
+    async def _fill_linuxdo_credentials_if_needed(self, auth_page: Page) -> bool:
+        if await auth_page.locator(_LOGIN_FORM_SELECTOR).count() == 0:
+            return True
+
+        creds = UnifiedConfigManager().get_credentials('anyrouter')
+        email = creds.get('email', '')
+        password = creds.get('password', '')
+        if not email or not password:
+            logger.error("未提供 LinuxDO/AnyRouter 凭据")
+            return False
+
+        try:
+            await auth_page.locator('#login-button').click()
+            await wait_for_selector(auth_page, _LOGIN_FORM_SELECTOR, timeout=2000)
+        except Exception:
+            pass
+        await auth_page.locator(_LOGIN_FORM_SELECTOR).first.fill(email)
+        pwd = auth_page.locator('#login-account-password, input[name="password"]').first
+        await pwd.fill(password)
+        try:
+            await auth_page.locator('form:has(#login-account-name) button[type="submit"]').first.click()
+        except Exception:
+            await pwd.press('Enter')
+        await wait_for_selector(auth_page, _LOGIN_FORM_SELECTOR, state='hidden', timeout=5000)
+        return True
+
+    async def _handle_oauth_consent(self, auth_page: Page) -> None:
+        try:
+            if 'linux.do' not in auth_page.url:
+                return
+            if await auth_page.locator('a:has-text("允许"), button:has-text("允许")').count() == 0:
+                logger.info('未找到"允许"按钮，可能已自动授权')
+                return
+            try:
+                cb = auth_page.get_by_role('checkbox', name='记住这次授权')
+                if await cb.is_visible(timeout=1000):
+                    await cb.check()
+            except Exception:
+                pass
+            for role in ('link', 'button'):
+                try:
+                    await auth_page.get_by_role(role, name='允许').click(timeout=5000)
+                    logger.info("已点击允许按钮，等待授权完成...")
+                    await wait_for_url_match(auth_page, lambda url: 'linux.do' not in url, timeout=3000)
+                    break
+                except Exception:
+                    continue
+        except Exception as exc:
+            logger.warning("OAuth 同意处理出错: %s", exc)
+
+
+__all__ = ["AsyncAnyrouterLogin", "VERIFY_URL"]
@@ -2,8 +2,6 @@
 
 from __future__ import annotations
 
-import time
-from pathlib import Path
 from typing import Optional
 
 # 统一通过 `python -m src` 启动，无需修改 sys.path
@@ -14,29 +12,26 @@ from src.core.base import LoginAutomation
 from src.core.logger import setup_logger
 from src.core.paths import get_project_paths
 from src.core.config import UnifiedConfigManager
+from src.core.waits import wait_for_any_selector, wait_for_selector, wait_for_url_match
+from src.sites.linuxdo.session import load_session, save_session
 
 logger = setup_logger("anyrouter", get_project_paths().logs / "anyrouter.log")
 
+# 登录页上的 OAuth 按钮与已登录后的用户按钮，用于条件等待
+OAUTH_BUTTON_SELECTORS = (
+    "button:has-text('使用 LinuxDO 继续')",
+    "button:has-text('使用 LinuxDO 登录')",
+)
+USER_BUTTON_SELECTOR = 'button:has-text("linuxdo_")'
+
 
 class AnyrouterLogin(LoginAutomation):
     def __init__(self, *, headless: bool = False) -> None:
         super().__init__('anyrouter', headless=headless)
-        # 确保调试目录存在
-        self.debug_dir = get_project_paths().screenshots / "anyrouter_debug"
-        try:
-            self.debug_dir.mkdir(parents=True, exist_ok=True)
-        except Exception:
-            pass
 
     def _shot(self, page: Page, name: str) -> None:
-        try:
-            from datetime import datetime
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            path = self.debug_dir / f"{ts}_{name}.png"
-            page.screenshot(path=str(path), full_page=True)
-            logger.info(f"Saved screenshot: {path}")
-        except Exception as exc:
-            logger.warning(f"Screenshot failed ({name}): {exc}")
+        """步骤截图：仅在 `screenshots.level=debug` 时进入内存缓冲区，失败时才写入 anyrouter_debug/。"""
+        self.screenshots.capture(page, name)
 
     def try_cookie_login(
         self,
@@ -46,8 +41,8 @@ class AnyrouterLogin(LoginAutomation):
         expire_days: Optional[int] = None,
     ) -> bool:
         cookie_path = self.cookie_manager.get_cookie_path(self.site_name)
-        if not cookie_path.exists():
-            logger.info(f"未找到 Cookie 文件: {cookie_path}")
+        if not self.cookie_manager.has_cookies(self.site_name):
+            logger.info("未找到 Cookie 文件: %s", cookie_path)
             return False
 
         logger.info("尝试 Cookie 登录...")
@@ -61,7 +56,7 @@ class AnyrouterLogin(LoginAutomation):
     def verify_login(self, page: Page) -> bool:
         try:
             current_url = page.url
-            logger.info(f"验证登录，当前 URL: {current_url}")
+            logger.info("验证登录，当前 URL: %s", current_url)
 
             if '/console' in current_url:
                 logger.info("已登录（控制台页面）")
@@ -69,7 +64,7 @@ class AnyrouterLogin(LoginAutomation):
 
             # 检测用户名按钮（已登录标志）
             user_button_count = page.locator('button:has-text("linuxdo_")').count()
-            logger.info(f"用户按钮数量: {user_button_count}")
+            logger.info("用户按钮数量: %s", user_button_count)
             if user_button_count > 0:
                 logger.info("已登录（检测到用户按钮）")
                 return True
@@ -77,16 +72,16 @@ class AnyrouterLogin(LoginAutomation):
             # 检查是否在登录页面
             if '/login' in current_url or current_url == 'https://anyrouter.top/':
                 login_button_count = page.locator('button:has-text("使用 LinuxDO 登录"), button:has-text("使用 LinuxDO 继续")').count()
-                logger.info(f"登录按钮数量: {login_button_count}")
+                logger.info("登录按钮数量: %s", login_button_count)
                 if login_button_count > 0:
                     logger.info("未登录（检测到登录按钮）")
                     return False
                 else:
                     # 在登录页但没有登录按钮，可能正在跳转
                     logger.info("在登录页但未检测到登录按钮，等待跳转...")
-                    page.wait_for_timeout(2000)
+                    wait_for_url_match(page, '**/console**', timeout=2000)
                     new_url = page.url
-                    logger.info(f"等待后 URL: {new_url}")
+                    logger.info("等待后 URL: %s", new_url)
                     if '/console' in new_url:
                         logger.info("已登录（跳转到控制台）")
                         return True
@@ -94,7 +89,7 @@ class AnyrouterLogin(LoginAutomation):
             logger.info("登录状态未知")
             return False
         except Exception as exc:
-            logger.warning(f"验证登录出错: {exc}")
+            logger.warning("验证登录出错: %s", exc)
             return False
 
     def login_with_linuxdo_oauth(self, page: Page) -> bool:
@@ -118,10 +113,10 @@ class AnyrouterLogin(LoginAutomation):
 
             # 检查是否为 LinuxDO 授权页
             if 'linux.do' not in auth_page.url:
-                logger.warning(f"授权页面 URL 不是 LinuxDO: {auth_page.url}")
+                logger.warning("授权页面 URL 不是 LinuxDO: %s", auth_page.url)
                 return False
 
-            logger.info(f"已打开 LinuxDO 授权页，URL: {auth_page.url}")
+            logger.info("已打开 LinuxDO 授权页，URL: %s", auth_page.url)
 
             # 如果 LinuxDO cookie 无效，需要在授权页面手动登录
             if not linuxdo_pre_logged:
@@ -132,39 +127,39 @@ class AnyrouterLogin(LoginAutomation):
 
             # 提交凭据后，优先尝试早期验证是否已经回到 AnyRouter
             try:
-                logger.info(f"登录后检查 AnyRouter 页面，URL: {page.url}")
+                logger.info("登录后检查 AnyRouter 页面，URL: %s", page.url)
                 if 'anyrouter.top' in page.url and self.verify_login(page):
                     logger.info("提交凭据后登录似乎成功")
                     return True
             except Exception as exc:
-                logger.info(f"登录后早期检查出错: {exc}")
+                logger.info("登录后早期检查出错: %s", exc)
 
             self._handle_oauth_consent(auth_page)
 
-            # 等待 OAuth 授权完成
-            page.wait_for_timeout(2000)
+            # 等待 OAuth 授权完成：授权页跳回 AnyRouter（或被关闭）
+            wait_for_url_match(auth_page, lambda url: 'linux.do' not in url, timeout=2000)
 
             # 切换回 AnyRouter 页面并刷新以显示登录状态
             page.bring_to_front()
             logger.info("已将 AnyRouter 页面置于前台")
-            page.wait_for_timeout(2000)
 
             # 刷新页面以更新登录状态
             logger.info("刷新 AnyRouter 页面以更新登录状态...")
             page.reload()
             page.wait_for_load_state('domcontentloaded')
-            page.wait_for_timeout(2000)
+            wait_for_any_selector(page, (USER_BUTTON_SELECTOR, *OAUTH_BUTTON_SELECTORS), timeout=5000)
 
             logger.info("开始最终登录验证")
             ok = self.verify_login(page)
             if not ok:
                 logger.info("最终验证失败；捕获 AnyRouter 页面状态")
-                self._shot(page, 'final_verification_failed')
+                self.screenshots.capture_failure(page, 'final_verification_failed')
             else:
                 logger.info("最终验证成功")
             return ok
         except Exception as exc:
-            logger.error(f"登录过程出错: {exc}")
+            self.last_error = exc
+            logger.error("登录过程出错: %s", exc)
             self._save_error_screenshot(page, 'anyrouter_oauth_exception')
             return False
 
@@ -172,64 +167,56 @@ class AnyrouterLogin(LoginAutomation):
     def _preload_linuxdo_cookie(self, page: Page) -> bool:
         """在 browser context 中预加载 LinuxDO cookie，新打开的窗口会自动继承"""
         try:
-            from src.core.cookies import CookieManager
-            linuxdo_cookie_mgr = CookieManager()
-            cookie_path = linuxdo_cookie_mgr.get_cookie_path('linuxdo')
-
-            if not cookie_path.exists():
-                logger.info("LinuxDO cookie 文件不存在")
+            # 有效期与 LinuxDO 自身登录一致（见 src.sites.linuxdo.session）
+            cookies = load_session(cookie_manager=self.cookie_manager)
+            if not cookies:
+                logger.info("LinuxDO cookie 不存在或已过期")
                 return False
 
-            logger.info(f"预加载 LinuxDO cookie: {cookie_path}")
             # 直接在 context 中加载 cookie，不需要导航
-            if linuxdo_cookie_mgr.load_cookies(page.context, 'linuxdo', expire_days=7):
-                logger.info("LinuxDO cookie 已加载到 browser context")
-                return True
-            else:
-                logger.info("LinuxDO cookie 加载失败")
-                return False
+            page.context.add_cookies(cookies)
+            logger.info("LinuxDO cookie 已加载到 browser context")
+            return True
         except Exception as exc:
-            logger.info(f"预加载 LinuxDO cookie 出错: {exc}")
+            logger.info("预加载 LinuxDO cookie 出错: %s", exc)
             return False
 
     def _save_linuxdo_cookie(self, auth_page: Page) -> None:
         """保存 LinuxDO cookie 供后续使用"""
         try:
-            from src.core.cookies import CookieManager
-            linuxdo_cookie_mgr = CookieManager()
-            saved_path = linuxdo_cookie_mgr.save_cookies(auth_page.context, 'linuxdo')
-            logger.info(f"已保存 LinuxDO cookie: {saved_path}")
+            saved_path = save_session(auth_page.context.cookies(), cookie_manager=self.cookie_manager)
+            logger.info("已保存 LinuxDO cookie: %s", saved_path)
         except Exception as exc:
-            logger.warning(f"保存 LinuxDO cookie 失败: {exc}")
+            logger.warning("保存 LinuxDO cookie 失败: %s", exc)
 
     def _navigate_to_login_page(self, page: Page) -> bool:
         try:
             logger.info("导航到登录页: https://anyrouter.top/login")
             page.goto('https://anyrouter.top/login', timeout=60000)
             page.wait_for_load_state('domcontentloaded')
-            logger.info(f"已加载登录页，URL: {page.url}")
+            logger.info("已加载登录页，URL: %s", page.url)
             try:
-                logger.info(f"登录页标题: {page.title()}")
+                logger.info("登录页标题: %s", page.title())
             except Exception as exc:
-                logger.info(f"获取页面标题失败: {exc}")
+                logger.info("获取页面标题失败: %s", exc)
             self._shot(page, 'after_goto_login')
 
             # 首次进入登录页后立刻刷新一次，规避首次点击 OAuth 按钮无响应的问题
             try:
                 logger.info("刷新登录页以稳定 OAuth 按钮...")
                 page.reload(wait_until='domcontentloaded')
-                page.wait_for_timeout(300)
+                wait_for_any_selector(page, OAUTH_BUTTON_SELECTORS, timeout=3000)
                 try:
                     title = page.title()
                 except Exception:
                     title = "<无标题>"
-                logger.info(f"刷新后 URL: {page.url}，标题: {title}")
+                logger.info("刷新后 URL: %s，标题: %s", page.url, title)
                 self._shot(page, 'after_refresh_login')
             except Exception as exc:
-                logger.info(f"刷新失败: {exc}")
+                logger.info("刷新失败: %s", exc)
             return True
         except Exception as exc:
-            logger.error(f"导航到登录页失败: {exc}")
+            logger.error("导航到登录页失败: %s", exc)
             return False
 
     def _close_announcement_modal(self, page: Page) -> None:
@@ -238,45 +225,33 @@ class AnyrouterLogin(LoginAutomation):
             closed_announcement = False
             for name in ('今日关闭', '关闭公告', '关闭'):
                 try:
-                    logger.info(f"尝试关闭公告按钮: {name}")
-                    page.get_by_role('button', name=name).click(timeout=1500)
-                    page.wait_for_timeout(500)
+                    logger.info("尝试关闭公告按钮: %s", name)
+                    button = page.get_by_role('button', name=name)
+                    button.click(timeout=1500)
+                    try:
+                        button.wait_for(state='hidden', timeout=1000)
+                    except Exception:
+                        pass
                     closed_announcement = True
-                    logger.info(f'公告已关闭（点击了"{name}"）')
+                    logger.info('公告已关闭（点击了"%s"）', name)
                     break
                 except Exception as exc:
-                    logger.info(f"未找到公告按钮 '{name}' 或点击失败: {exc}")
+                    logger.info("未找到公告按钮 '%s' 或点击失败: %s", name, exc)
                     continue
             if not closed_announcement:
                 logger.info("未检测到公告弹窗")
             else:
-                # 弹窗关闭后等待页面稳定
-                page.wait_for_timeout(1000)
-                page.wait_for_load_state('domcontentloaded')
-                logger.info("关闭公告后页面已稳定")
-
-                # 检查"使用 LinuxDO 继续"按钮是否可见，如果不可见则刷新页面
-                oauth_button_selectors = [
-                    "button:has-text('使用 LinuxDO 继续')",
-                    "button:has-text('使用 LinuxDO 登录')",
-                ]
-                oauth_button_visible = False
-                for selector in oauth_button_selectors:
-                    try:
-                        if page.locator(selector).count() > 0:
-                            oauth_button_visible = True
-                            logger.info(f"检测到 OAuth 按钮: {selector}")
-                            break
-                    except Exception:
-                        continue
-
-                if not oauth_button_visible:
+                # 弹窗关闭后等待"使用 LinuxDO 继续"按钮出现，如果未出现则刷新页面
+                selector = wait_for_any_selector(page, OAUTH_BUTTON_SELECTORS, timeout=1000)
+                if selector:
+                    logger.info("检测到 OAuth 按钮: %s", selector)
+                else:
                     logger.info("未检测到 OAuth 按钮，刷新页面...")
                     page.reload(wait_until='domcontentloaded')
-                    page.wait_for_timeout(1000)
+                    wait_for_any_selector(page, OAUTH_BUTTON_SELECTORS, timeout=3000)
                     logger.info("页面已刷新")
         except Exception as exc:
-            logger.info(f"关闭公告处理出错: {exc}")
+            logger.info("关闭公告处理出错: %s", exc)
 
     def _click_oauth_button(self, page: Page) -> Optional[Page]:
         """点击 OAuth 按钮并返回新打开的授权页面"""
@@ -289,14 +264,14 @@ class AnyrouterLogin(LoginAutomation):
             ("locator('button:has-text(\"LinuxDO\")')", lambda: page.locator('button:has-text("LinuxDO")').first),
         ]
         try:
-            logger.info(f"点击前页面数: {len(page.context.pages)}")
+            logger.info("点击前页面数: %s", len(page.context.pages))
         except Exception:
             pass
         self._shot(page, 'before_oauth_click')
 
         for desc, locator_func in actions:
             try:
-                logger.info(f"尝试 OAuth 按钮选择器: {desc}")
+                logger.info("尝试 OAuth 按钮选择器: %s", desc)
                 locator = locator_func()
 
                 # 使用 expect_popup 捕获新打开的窗口
@@ -305,26 +280,19 @@ class AnyrouterLogin(LoginAutomation):
                     logger.info("OAuth 按钮点击成功，等待新窗口...")
 
                 popup_page = popup_info.value
-                logger.info(f"新窗口已打开，URL: {popup_page.url}")
+                logger.info("新窗口已打开，URL: %s", popup_page.url)
                 popup_page.wait_for_load_state('domcontentloaded')
                 try:
-                    logger.info(f"当前打开的标签页数: {len(page.context.pages)}")
+                    logger.info("当前打开的标签页数: %s", len(page.context.pages))
                 except Exception:
                     pass
                 self._shot(page, 'after_oauth_click')
                 return popup_page
             except Exception as e:
-                logger.info(f"OAuth 点击失败，选择器: {desc}，错误: {e}")
+                logger.info("OAuth 点击失败，选择器: %s，错误: %s", desc, e)
                 continue
 
-        try:
-            debug_dir = Path('.playwright-debug')
-            debug_dir.mkdir(parents=True, exist_ok=True)
-            screenshot_path = debug_dir / f"anyrouter_oauth_click_failed_{int(time.time())}.png"
-            page.screenshot(path=str(screenshot_path), full_page=True)
-            logger.info(f"已保存截图: {screenshot_path}")
-        except Exception:
-            pass
+        self.screenshots.capture_failure(page, 'anyrouter_oauth_click_failed')
         logger.warning("所有 OAuth 按钮点击失败；终止登录")
         return None
 
@@ -332,37 +300,30 @@ class AnyrouterLogin(LoginAutomation):
         auth_page = None
         pages_after = list(page.context.pages)
         try:
-            logger.info(f"点击后页面数: {len(pages_after)}")
+            logger.info("点击后页面数: %s", len(pages_after))
         except Exception:
             pass
         for idx, candidate in enumerate(pages_after, start=1):
             try:
                 url = candidate.url
-                logger.info(f"检查页面[{idx}] URL: {url}")
+                logger.info("检查页面[%s] URL: %s", idx, url)
                 if 'linux.do' in url:
                     auth_page = candidate
-                    logger.info(f"在页面[{idx}]检测到 LinuxDO 授权页")
+                    logger.info("在页面[%s]检测到 LinuxDO 授权页", idx)
                     break
             except Exception as exc:
-                logger.info(f"检查页面[{idx}]出错: {exc}")
+                logger.info("检查页面[%s]出错: %s", idx, exc)
                 continue
         if not auth_page:
             logger.warning("未在标签页中找到 LinuxDO 授权页")
-            try:
-                debug_dir = Path('.playwright-debug')
-                debug_dir.mkdir(parents=True, exist_ok=True)
-                screenshot_path = debug_dir / f"anyrouter_oauth_no_auth_tab_{int(time.time())}.png"
-                page.screenshot(path=str(screenshot_path), full_page=True)
-                logger.info(f"已保存截图: {screenshot_path}")
-            except Exception:
-                pass
+            self.screenshots.capture_failure(page, 'anyrouter_oauth_no_auth_tab')
             return None
 
         auth_page.bring_to_front()
         logger.info("已将 LinuxDO 授权页置于前台")
         auth_page.wait_for_load_state('domcontentloaded')
         try:
-            logger.info(f"授权页已加载，URL: {auth_page.url}")
+            logger.info("授权页已加载，URL: %s", auth_page.url)
         except Exception:
             pass
         self._shot(auth_page, 'auth_page_loaded')
@@ -395,9 +356,9 @@ class AnyrouterLogin(LoginAutomation):
         try:
             logger.info("授权页似乎是登录表单；尝试先点击登录按钮")
             auth_page.locator('#login-button').click()
-            auth_page.wait_for_timeout(500)
+            wait_for_selector(auth_page, '#login-account-name, input[name="login"]', timeout=2000)
         except Exception as exc:
-            logger.info(f"初始登录按钮点击被忽略/失败: {exc}")
+            logger.info("初始登录按钮点击被忽略/失败: %s", exc)
         self._shot(auth_page, 'before_fill_credentials')
         auth_page.locator('#login-account-name, input[name="login"]').first.fill(email)
         pwd = auth_page.locator('#login-account-password, input[name="password"]').first
@@ -406,9 +367,10 @@ class AnyrouterLogin(LoginAutomation):
             logger.info("通过提交按钮提交登录表单")
             auth_page.locator('form:has(#login-account-name) button[type="submit"]').first.click()
         except Exception as exc:
-            logger.info(f"提交按钮点击失败: {exc}；在密码字段按 Enter")
+            logger.info("提交按钮点击失败: %s；在密码字段按 Enter", exc)
             pwd.press('Enter')
-        auth_page.wait_for_timeout(2000)
+        # 登录成功后登录表单消失（授权页跳转或关闭）
+        wait_for_selector(auth_page, '#login-account-name, input[name="login"]', state='hidden', timeout=5000)
         self._shot(auth_page, 'after_submit_credentials')
 
         return True
@@ -419,7 +381,7 @@ class AnyrouterLogin(LoginAutomation):
             try:
                 current_url = auth_page.url
                 if 'anyrouter.top' in current_url or 'linux.do' not in current_url:
-                    logger.info(f"页面已跳转，无需点击允许。当前 URL: {current_url}")
+                    logger.info("页面已跳转，无需点击允许。当前 URL: %s", current_url)
                     return
             except Exception:
                 pass
@@ -450,7 +412,7 @@ class AnyrouterLogin(LoginAutomation):
                     logger.info('勾选"记住这次授权"复选框')
                     cb.check()
             except Exception as exc:
-                logger.info(f'未找到"记住授权"复选框或勾选失败: {exc}')
+                logger.info('未找到"记住授权"复选框或勾选失败: %s', exc)
 
             for action in (
                 lambda: auth_page.get_by_role('link', name='允许').click(timeout=5000),
@@ -463,25 +425,18 @@ class AnyrouterLogin(LoginAutomation):
                     action()
                     self._shot(auth_page, 'after_click_allow')
                     logger.info("已点击允许按钮，等待授权完成...")
-                    auth_page.wait_for_timeout(3000)
+                    wait_for_url_match(auth_page, lambda url: 'linux.do' not in url, timeout=3000)
                     logger.info("授权等待完成")
                     break
                 except Exception as exc:
-                    logger.info(f"同意点击尝试失败: {exc}")
+                    logger.info("同意点击尝试失败: %s", exc)
                     continue
         except Exception as exc:
-            logger.warning(f"OAuth 同意处理出错: {exc}")
+            logger.warning("OAuth 同意处理出错: %s", exc)
 
     def _save_error_screenshot(self, page: Page, name: str) -> None:
-        """保存错误截图的辅助方法"""
-        try:
-            debug_dir = Path('.playwright-debug')
-            debug_dir.mkdir(parents=True, exist_ok=True)
-            screenshot_path = debug_dir / f"{name}_{int(time.time())}.png"
-            page.screenshot(path=str(screenshot_path), full_page=True)
-            logger.info(f"已保存截图: {screenshot_path}")
-        except Exception:
-            pass
+        """保存错误截图的辅助方法（随本次运行失败一并异步落盘）"""
+        self.screenshots.capture_failure(page, name)
 
     def do_login(self, page: Page, **_credentials) -> bool:
         return self.login_with_linuxdo_oauth(page)
@@ -491,10 +446,9 @@ class AnyrouterLogin(LoginAutomation):
             if '/console/token' not in page.url:
                 page.goto('https://anyrouter.top/console/token', timeout=60000)
                 page.wait_for_load_state('domcontentloaded')
-                page.wait_for_timeout(2000)
             page.wait_for_load_state('networkidle')
         except Exception as exc:
-            logger.error(f"登录后处理异常: {exc}")
+            logger.error("登录后处理异常: %s", exc)
 
 
 def login_to_anyrouter(*, use_cookie: bool = True, headless: bool = False) -> bool:
@@ -505,7 +459,7 @@ def login_to_anyrouter(*, use_cookie: bool = True, headless: bool = False) -> bo
             verify_url='https://anyrouter.top/console/token',
         )
     except Exception as exc:
-        logger.error(f"运行异常: {exc}")
+        logger.error("运行异常: %s", exc)
         return False
 
 
@@ -0,0 +1,117 @@
+"""Linux.do 登录流程的 asyncio 版本（与 `login.py` 对应）。"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from playwright.async_api import Page
+
+from src.core.async_base import AsyncBrowserManager, AsyncLoginAutomation
+from src.core.async_waits import wait_for_dom_quiet, wait_for_network_idle, wait_for_url_match
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+from src.sites.linuxdo.session import session_expire_days
+
+logger = setup_logger("linuxdo", get_project_paths().logs / "linuxdo.log")
+
+VERIFY_URL = 'https://linux.do/'
+
+
+class AsyncLinuxdoLogin(AsyncLoginAutomation):
+    """`LinuxdoLogin` 的异步版本。"""
+
+    def __init__(self, *, headless: bool = False, browser_manager: Optional[AsyncBrowserManager] = None) -> None:
+        super().__init__('linuxdo', headless=headless, browser_manager=browser_manager,
+                         cookie_expire_days=session_expire_days())
+
+    async def verify_login(self, page: Page) -> bool:
+        try:
+            await wait_for_dom_quiet(page, timeout=2000)
+            if '/login' not in page.url:
+                logger.info("已登录，URL 已跳转")
+                return True
+
+            if await page.locator('form, input[name="login"], input[placeholder*="邮箱"]').count() == 0:
+                logger.info("已登录，无登录表单")
+                return True
+
+            if await page.locator('text=欢迎回来').count() == 0:
+                logger.info("已登录，未发现欢迎文本")
+                return True
+
+            return False
+        except Exception as exc:
+            logger.warning("验证登录时出错: %s", exc)
+            try:
+                return '/login' not in page.url
+            except Exception:
+                return False
+
+    async def login_with_credentials(self, page: Page, email: str, password: str) -> bool:
+        logger.info("使用账号密码登录...")
+        await page.locator('#login-button').click()
+
+        logger.info("填写账号: %s", email)
+        await page.locator('#login-account-name, input[name="login"]').fill(email)
+        password_input = page.locator('#login-account-password, input[name="password"]').first
+        await password_input.fill(password)
+
+        logger.info("提交登录...")
+        submitted = False
+        for selector, timeout in (
+            ('form:has(#login-account-name) button[type="submit"], form:has(input[name="login"]) button[type="submit"]', 10000),
+            ('button:has-text("登录"):visible, #login-button.login:visible, .login-button:visible, '
+             'button:has-text("Log in"):visible, button:has-text("Login"):visible', 8000),
+        ):
+            try:
+                submit = page.locator(selector).first
+                await submit.wait_for(state='visible', timeout=timeout)
+                await submit.click()
+                submitted = True
+                break
+            except Exception:
+                continue
+        if not submitted:
+            try:
+                await password_input.press('Enter')
+                submitted = True
+            except Exception:
+                logger.error("未能找到可用的提交按钮")
+                return False
+
+        await wait_for_url_match(page, lambda url: '/login' not in url, timeout=10000)
+        if await self.verify_login(page):
+            logger.info("登录成功")
+            return True
+
+        logger.error("登录失败")
+        return False
+
+    async def do_login(self, page: Page, **credentials) -> bool:
+        email = credentials.get('email')
+        password = credentials.get('password')
+        if not email or not password:
+            logger.error("未提供登录凭据，无法登录")
+            return False
+
+        logger.info("正在打开 LinuxDO 登录页面...")
+        await page.goto('https://linux.do/login', timeout=60000)
+        await page.wait_for_load_state('domcontentloaded')
+
+        success = await self.login_with_credentials(page, email, password)
+        if not success:
+            await self.browser_manager.save_error_screenshot(page, 'linuxdo_login_failed.png')
+        return success
+
+    async def after_login(self, page: Page, **_credentials) -> None:
+        try:
+            if 'chrome-error' in page.url or 'about:' in page.url:
+                logger.warning("页面 URL 异常，尝试重新载入首页...")
+                await page.goto(VERIFY_URL, timeout=60000, wait_until='domcontentloaded')
+            logger.info("论坛首页已加载，当前 URL: %s", page.url)
+            await wait_for_network_idle(page, timeout=3000)
+        except Exception as exc:
+            logger.error("登录后处理出错: %s", exc)
+
+
+__all__ = ["AsyncLinuxdoLogin", "VERIFY_URL"]
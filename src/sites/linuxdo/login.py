@@ -13,6 +13,8 @@ from src.core.base import LoginAutomation
 from src.core.logger import setup_logger
 from src.core.paths import get_project_paths
 from src.core.config import UnifiedConfigManager
+from src.core.waits import wait_for_dom_quiet, wait_for_network_idle, wait_for_url_match
+from src.sites.linuxdo.session import session_expire_days
 
 logger = setup_logger("linuxdo", get_project_paths().logs / "linuxdo.log")
 
@@ -20,8 +22,12 @@ logger = setup_logger("linuxdo", get_project_paths().logs / "linuxdo.log")
 class LinuxdoLogin(LoginAutomation):
     """Linux.do 登录自动化实现。"""
 
+    # 登录后无额外浏览器步骤：HTTP 探测确认 Cookie 有效即可跳过浏览器
+    requires_browser_after_login = False
+
     def __init__(self, *, headless: bool = False) -> None:
-        super().__init__('linuxdo', headless=headless)
+        # 与 AnyRouter 的 OAuth 登录共用同一份 Cookie，有效期统一由 session 模块决定
+        super().__init__('linuxdo', headless=headless, cookie_expire_days=session_expire_days())
 
     def try_cookie_login(
         self,
@@ -31,8 +37,8 @@ class LinuxdoLogin(LoginAutomation):
         expire_days: Optional[int] = None,
     ) -> bool:
         cookie_path = self.cookie_manager.get_cookie_path(self.site_name)
-        if not cookie_path.exists():
-            logger.info(f"Cookie 文件不存在: {cookie_path}")
+        if not self.cookie_manager.has_cookies(self.site_name):
+            logger.info("Cookie 文件不存在: %s", cookie_path)
             return False
 
         logger.info("尝试使用 Cookie 快速登录...")
@@ -45,7 +51,7 @@ class LinuxdoLogin(LoginAutomation):
 
     def verify_login(self, page: Page) -> bool:
         try:
-            page.wait_for_timeout(2000)
+            wait_for_dom_quiet(page, timeout=2000)
             current_url = page.url
             if '/login' not in current_url:
                 logger.info("已登录，URL 已跳转")
@@ -63,7 +69,7 @@ class LinuxdoLogin(LoginAutomation):
 
             return False
         except Exception as exc:
-            logger.warning(f"验证登录时出错: {exc}")
+            logger.warning("验证登录时出错: %s", exc)
             try:
                 if '/login' not in page.url:
                     return True
@@ -78,7 +84,7 @@ class LinuxdoLogin(LoginAutomation):
         login_button = page.locator('#login-button')
         login_button.click()
 
-        logger.info(f"填写账号: {email}")
+        logger.info("填写账号: %s", email)
         email_input = page.locator('#login-account-name, input[name=\"login\"]')
         email_input.fill(email)
 
@@ -114,7 +120,8 @@ class LinuxdoLogin(LoginAutomation):
             return False
 
         logger.info("等待登录完成...")
-        page.wait_for_timeout(3000)
+        # 登录成功后论坛会离开 /login；失败时页面停留，最多等待 10 秒
+        wait_for_url_match(page, lambda url: '/login' not in url, timeout=10000)
 
         if self.verify_login(page):
             logger.info("登录成功")
@@ -146,18 +153,18 @@ class LinuxdoLogin(LoginAutomation):
                 logger.warning("页面 URL 异常，尝试重新载入首页...")
                 try:
                     page.goto('https://linux.do/', timeout=60000, wait_until='domcontentloaded')
-                    page.wait_for_timeout(2000)
+                    wait_for_dom_quiet(page, timeout=2000)
                     current_url = page.url
                 except Exception:
                     pass
 
             logger.info("论坛首页已加载")
-            logger.info(f"当前 URL: {current_url}")
+            logger.info("当前 URL: %s", current_url)
 
-            logger.info("保留会话，等待 3 秒以稳定会话状态...")
-            page.wait_for_timeout(3000)
+            logger.info("保留会话，等待网络空闲以稳定会话状态（最多 3 秒）...")
+            wait_for_network_idle(page, timeout=3000)
         except Exception as exc:
-            logger.error(f"登录后处理出错: {exc}")
+            logger.error("登录后处理出错: %s", exc)
 
 
 def login_to_linuxdo(
@@ -187,7 +194,7 @@ def login_to_linuxdo(
             password=password,
         )
     except Exception as exc:
-        logger.error(f"发生异常: {exc}")
+        logger.error("发生异常: %s", exc)
         automation.browser_manager.save_error_screenshot(
             automation.page,
             'linuxdo_error_screenshot.png',
@@ -0,0 +1,58 @@
+"""LinuxDO 会话的共享读写策略。
+
+LinuxDO 自身登录与 AnyRouter 的 LinuxDO OAuth 登录共用 `linuxdo` 这一份 Cookie。
+两处原先各自决定有效期（LinuxDO 30 天、AnyRouter 硬编码 7 天），同一文件在一处
+仍有效、在另一处却已过期。本模块统一：
+
+- 有效期取 `defaults.cookie_expire_days`（默认 30 天）；
+- 调用方持有刚验证过的会话（`run-all` 中 LinuxDO 任务的 `storage_state`）时优先使用，
+  否则回退到已保存的 Cookie；
+- 写回统一经由 `CookieManager.write_cookies`。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from src.core.cookies import CookieManager
+
+SITE_NAME = "linuxdo"
+
+
+def session_expire_days() -> int:
+    """LinuxDO 会话 Cookie 的有效期（天）。"""
+    try:
+        from src.core.config import UnifiedConfigManager
+        return int(UnifiedConfigManager().get_defaults().get("cookie_expire_days", 30))
+    except Exception:
+        return 30
+
+
+def load_session(
+    state: Optional[Dict[str, Any]] = None,
+    *,
+    cookie_manager: Optional[CookieManager] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """返回可加入浏览器上下文的 LinuxDO Cookie。
+
+    `state` 为 LinuxDO 登录任务交付的 `storage_state`，其中的 Cookie 刚被验证过，
+    优先于磁盘上的副本；没有时按统一有效期读取已保存的 Cookie，均不可用时返回 None。
+    """
+    if state and state.get("cookies"):
+        return list(state["cookies"])
+    manager = cookie_manager or CookieManager()
+    return manager.read_cookies(SITE_NAME, session_expire_days())
+
+
+def save_session(
+    cookies: List[Dict[str, Any]],
+    *,
+    origins: Optional[List[Dict[str, Any]]] = None,
+    cookie_manager: Optional[CookieManager] = None,
+) -> Any:
+    """保存 LinuxDO Cookie，返回保存位置。"""
+    manager = cookie_manager or CookieManager()
+    return manager.write_cookies(SITE_NAME, cookies, origins=origins)
+
+
+__all__ = ["SITE_NAME", "session_expire_days", "load_session", "save_session"]
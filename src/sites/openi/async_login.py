@@ -0,0 +1,299 @@
+"""OpenI 登录与云脑任务流程的 asyncio 版本。
+
+与 `login.py`、`popup.py`、`cloud_task.py` 的同步实现一一对应，
+用于在单进程内并发处理多个账号（参见 `run_users`）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence
+
+from playwright.async_api import Page
+
+from src.core.async_base import AsyncBrowserManager, AsyncLoginAutomation
+from src.core.async_runner import run_sessions
+from src.core.async_waits import wait_for_dom_quiet
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+from src.sites.openi.cloud_task import STATUS_WATCH_SCRIPT, TASK_STATUSES, is_navigation_error
+
+
+logger = setup_logger("openi", get_project_paths().logs / "openi_automation.log")
+
+VERIFY_URL = 'https://git.openi.org.cn/dashboard'
+
+
+class AsyncPopupHandler:
+    """`PopupHandler` 的异步版本。"""
+
+    async def close_popup(self, page: Page) -> None:
+        try:
+            no_reminder_checkbox = page.locator('input[name="notRemindAgain"]').first
+            if await no_reminder_checkbox.is_visible():
+                await no_reminder_checkbox.click()
+                logger.info("  - 已勾选'不再提醒'")
+        except Exception:
+            pass
+
+        try:
+            for button in await page.get_by_text('关闭').all():
+                try:
+                    if await button.is_visible():
+                        await button.click()
+                        logger.info("  - 已点击关闭按钮")
+                        try:
+                            await button.wait_for(state='hidden', timeout=500)
+                        except Exception:
+                            pass
+                        break
+                except Exception:
+                    continue
+        except Exception:
+            pass
+
+
+class AsyncCloudTaskManager:
+    """`CloudTaskManager` 的异步版本。"""
+
+    def __init__(
+        self,
+        task_name: str,
+        run_duration: int = 5,
+        *,
+        wait_timeout: int = 2000,
+        search_timeout: int = 3000,
+        click_timeout: int = 5000,
+    ) -> None:
+        self.task_name = task_name
+        self.run_duration = run_duration
+        self.wait_timeout = wait_timeout
+        self.search_timeout = search_timeout
+        self.click_timeout = click_timeout
+
+    async def navigate_to_cloud_task(self, page: Page) -> None:
+        logger.info("\n导航到云脑任务页面...")
+        await page.get_by_role('link', name='云脑任务').click()
+        await page.wait_for_url('**/cloudbrains', timeout=30000)
+        logger.info("已进入云脑任务页面")
+        await wait_for_dom_quiet(page, quiet=500, timeout=self.wait_timeout)
+
+    async def watch_task_status(self, page: Page, targets: Sequence[str], timeout: float) -> Optional[str]:
+        """`CloudTaskManager.watch_task_status` 的异步版本：页面内监听，出现目标状态即返回。"""
+        targets = [t.upper() for t in targets]
+        deadline = time.monotonic() + timeout / 1000.0
+        while True:
+            remaining = (deadline - time.monotonic()) * 1000.0
+            if remaining <= 0:
+                return None
+            try:
+                return await page.evaluate(STATUS_WATCH_SCRIPT, [targets, self.task_name, remaining])
+            except Exception as exc:
+                if not is_navigation_error(exc):
+                    logger.warning("监听任务状态失败: %s", exc)
+                    return None
+                try:
+                    await page.wait_for_load_state('domcontentloaded', timeout=max(1.0, remaining))
+                except Exception:
+                    return None
+
+    async def wait_for_task_status(self, page: Page, target_status: str, timeout: int = 30) -> bool:
+        logger.info("等待任务状态变为 %s...", target_status)
+        if await self.watch_task_status(page, [target_status], timeout * 1000):
+            logger.info("  - 任务状态已变为 %s", target_status)
+            return True
+        logger.warning("  - 等待超时，未能在 %s 秒内变为 %s 状态", timeout, target_status)
+        return False
+
+    async def stop_task(self, page: Page, *, wait_for_stopped: bool = True, timeout: int = 30) -> bool:
+        try:
+            logger.info("点击停止按钮...")
+            await page.get_by_role('link', name='停止').click()
+            logger.info("  - 已点击停止按钮")
+            if wait_for_stopped:
+                return await self.wait_for_task_status(page, 'STOPPED', timeout)
+            return True
+        except Exception as exc:
+            logger.error("停止任务失败: %s", exc)
+            return False
+
+    async def handle_cloud_task(self, page: Page) -> None:
+        logger.info("\n搜索任务 '%s'...", self.task_name)
+        search_input = page.get_by_role('textbox', name='搜索任务名称')
+        await search_input.fill(self.task_name)
+        await search_input.press('Enter')
+        await wait_for_dom_quiet(page, quiet=500, timeout=self.search_timeout)
+
+        task_status = await self.watch_task_status(page, TASK_STATUSES, self.wait_timeout)
+        if task_status:
+            logger.info("  - 当前任务状态 %s", task_status)
+
+        if task_status == 'RUNNING':
+            logger.info("\n任务正在运行，需要先停止...")
+            await self.stop_task(page, wait_for_stopped=True, timeout=30)
+            task_status = 'STOPPED'
+
+        if task_status not in ['STOPPED', None]:
+            return
+
+        logger.info("\n点击'再次调试'按钮...")
+        await wait_for_dom_quiet(page, quiet=500, timeout=self.search_timeout)
+        try:
+            debug_again_button = page.get_by_role('link', name='再次调试')
+            await debug_again_button.wait_for(state='visible', timeout=10000)
+            if not await debug_again_button.is_enabled():
+                logger.warning("  - '再次调试'按钮被禁用，跳过任务启动")
+                return
+            await debug_again_button.click()
+            logger.info("  - 已点击 '再次调试'")
+        except Exception as exc:
+            logger.error("  - 无法点击'再次调试'按钮: %s", exc)
+            return
+
+        await wait_for_dom_quiet(page, quiet=500, timeout=self.click_timeout)
+        if await self.wait_for_task_status(page, 'RUNNING', timeout=60):
+            logger.info("\n任务运行中，等待%s秒...", self.run_duration)
+            # 异步等待期间事件循环可继续推进其他账号
+            await asyncio.sleep(self.run_duration)
+        else:
+            logger.warning("\n任务启动超时，尝试停止任务...")
+
+        await self.stop_task(page, wait_for_stopped=False)
+        await self.watch_task_status(page, ('STOPPING', 'STOPPED'), self.wait_timeout)
+        logger.info("任务操作完成")
+
+
+class AsyncOpeniLogin(AsyncLoginAutomation):
+    """`OpeniLogin` 的异步版本。"""
+
+    def __init__(
+        self,
+        username: str,
+        *,
+        headless: bool = False,
+        task_name: str = 'image',
+        run_duration: int = 15,
+        cookie_expire_days: int = 7,
+        browser_manager: Optional[AsyncBrowserManager] = None,
+    ) -> None:
+        self.username = username
+        super().__init__(
+            site_name=f"openi_{username}",
+            headless=headless,
+            browser_kwargs={'slow_mo': 500},
+            cookie_expire_days=cookie_expire_days,
+            browser_manager=browser_manager,
+        )
+        self._popup = AsyncPopupHandler()
+        self._cloud = AsyncCloudTaskManager(task_name=task_name, run_duration=run_duration)
+
+    async def verify_login(self, page: Page) -> bool:
+        try:
+            if await page.get_by_role('menu', name='个人信息和配置').is_visible(timeout=5000):
+                logger.info("[%s] Cookie 验证成功，已登录", self.username)
+                return True
+            logger.warning("[%s] Cookie 验证失败，需要重新登录", self.username)
+            return False
+        except Exception as exc:
+            logger.warning("[%s] Cookie 验证失败: %s", self.username, exc)
+            return False
+
+    async def do_login(self, page: Page, **credentials) -> bool:
+        password = credentials.get('password')
+        if not password:
+            logger.error("[%s] 未提供密码，无法登录", self.username)
+            return False
+
+        try:
+            logger.info("[%s] 正在访问 OpenI 平台...", self.username)
+            await page.goto('https://git.openi.org.cn/', timeout=30000)
+            await page.wait_for_load_state('domcontentloaded')
+
+            await page.get_by_role('link', name=' 登录').click()
+            await page.wait_for_load_state('domcontentloaded')
+
+            username_input = page.get_by_role('textbox', name='用户名/邮箱/手机号')
+            await username_input.wait_for(state='visible', timeout=10000)
+            await username_input.fill(self.username)
+
+            password_input = page.get_by_role('textbox', name='密码')
+            await password_input.wait_for(state='visible', timeout=10000)
+            await password_input.fill(password)
+
+            login_button = page.get_by_role('button', name='登录')
+            await login_button.wait_for(state='visible', timeout=10000)
+            await login_button.click()
+
+            try:
+                await page.wait_for_url('**/dashboard', timeout=30000)
+            except Exception:
+                logger.warning("[%s] 等待跳转超时，当前URL: %s", self.username, page.url)
+                if 'dashboard' not in page.url:
+                    raise
+
+            await wait_for_dom_quiet(page, quiet=500, timeout=2000)
+            await self._popup.close_popup(page)
+
+            if await self.verify_login(page):
+                logger.info("登录成功！欢迎 %s", self.username)
+                return True
+
+            logger.warning("[%s] 登录验证失败", self.username)
+            return False
+        except Exception as exc:
+            logger.error("用户 %s 登录失败: %s", self.username, exc)
+            await self.browser_manager.save_error_screenshot(page, f'error_screenshot_{self.username}.png')
+            return False
+
+    async def after_login(self, page: Page, **_credentials) -> None:
+        try:
+            if self.logged_in_with_cookies:
+                await wait_for_dom_quiet(page, quiet=500, timeout=2000)
+                await self._popup.close_popup(page)
+
+            await self._cloud.navigate_to_cloud_task(page)
+            await self._popup.close_popup(page)
+            await self._cloud.handle_cloud_task(page)
+
+            logger.info("\n用户 %s 执行成功", self.username)
+        except Exception as exc:
+            logger.error("用户 %s 执行失败: %s", self.username, exc)
+            await self.browser_manager.save_error_screenshot(page, f'error_screenshot_{self.username}.png')
+            raise
+
+
+async def run_users(
+    users: Sequence[Dict],
+    *,
+    concurrency: int = 4,
+    headless: bool = True,
+    task_name: str = 'image',
+    run_duration: int = 15,
+    use_cookies: bool = True,
+    cookie_expire_days: int = 7,
+) -> List[bool]:
+    """在共享浏览器上并发处理多个 OpenI 账号，按输入顺序返回结果。"""
+    async with AsyncBrowserManager() as manager:
+        def _factory(user: Dict):
+            async def _session() -> bool:
+                automation = AsyncOpeniLogin(
+                    user['username'],
+                    headless=headless,
+                    task_name=task_name,
+                    run_duration=run_duration,
+                    cookie_expire_days=cookie_expire_days,
+                    browser_manager=manager,
+                )
+                return await automation.run(
+                    use_cookie=use_cookies,
+                    verify_url=VERIFY_URL,
+                    cookie_expire_days=cookie_expire_days,
+                    password=user.get('password'),
+                )
+            return _session
+
+        return await run_sessions([_factory(u) for u in users], concurrency=concurrency)
+
+
+__all__ = ["AsyncPopupHandler", "AsyncCloudTaskManager", "AsyncOpeniLogin", "run_users"]
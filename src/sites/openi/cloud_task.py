@@ -5,21 +5,80 @@
   - `wait_timeout`（默认 2000ms）
   - `search_timeout`（默认 3000ms）
   - `click_timeout`（默认 5000ms）
+- 上述参数现为条件等待（DOM 静默、状态单元格出现等）的上限，条件满足即继续。
+- 任务状态由页面内的 MutationObserver 监听（`watch_task_status`）：一次 `evaluate`
+  往返，表格中出现目标状态的瞬间即返回，不再在 Python 侧反复构造定位器查询。
+- 传入 `api`（`CloudTaskApi`）时优先通过 JSON 接口搜索、重启与停止任务，
+  接口不可用时回退到页面操作（见 `task_api.py`）。
 """
 
 from __future__ import annotations
 
 import time
-from typing import Optional
+from typing import Any, Optional, Sequence
 
 from playwright.sync_api import Page
 
 from src.core.logger import setup_logger
 from src.core.paths import get_project_paths
+from src.core.waits import wait_for_dom_quiet
+from src.sites.openi.task_api import CloudTask, CloudTaskApi, TaskApiError
 
 
 logger = setup_logger("openi.cloud_task", get_project_paths().logs / "openi_automation.log")
 
+TASK_STATUSES = ('RUNNING', 'STOPPED', 'WAITING', 'STOPPING')
+
+# 页面内监听任务表格：任一可见单元格文本包含目标状态时返回该状态（与 `td:has-text(...)` 一致，
+# 单元格内带图标或其他文字也能匹配），超过 limit 毫秒返回 null。
+# 存在包含任务名的行时只看这些行，避免列表中其他任务的状态干扰。
+STATUS_WATCH_SCRIPT = """
+([targets, taskName, limit]) => new Promise((resolve) => {
+    const read = () => {
+        const rows = taskName
+            ? Array.from(document.querySelectorAll('tr')).filter((row) => row.textContent.includes(taskName))
+            : [];
+        const roots = rows.length ? rows : [document];
+        for (const root of roots) {
+            for (const cell of root.querySelectorAll('td')) {
+                const text = cell.textContent.toUpperCase();
+                const hit = targets.find((target) => text.includes(target));
+                if (hit && cell.getClientRects().length) {
+                    return hit;
+                }
+            }
+        }
+        return null;
+    };
+    const first = read();
+    if (first) {
+        resolve(first);
+        return;
+    }
+    let cap = null;
+    const observer = new MutationObserver(() => {
+        const hit = read();
+        if (hit) done(hit);
+    });
+    const done = (result) => {
+        observer.disconnect();
+        clearTimeout(cap);
+        resolve(result);
+    };
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    cap = setTimeout(() => done(null), limit);
+})
+"""
+
+# 执行上下文因导航被销毁时 `evaluate` 抛出的错误信息片段
+_NAVIGATION_ERRORS = ("execution context was destroyed", "cannot find context with specified id")
+
+
+def is_navigation_error(exc: BaseException) -> bool:
+    """`evaluate` 失败是否由页面导航引起（此时应在新页面上重新监听）。"""
+    message = str(exc).lower()
+    return any(fragment in message for fragment in _NAVIGATION_ERRORS)
+
 
 class CloudTaskManager:
     """OpenI 云脑任务的高层操作封装。"""
@@ -32,6 +91,8 @@ class CloudTaskManager:
         wait_timeout: int = 2000,
         search_timeout: int = 3000,
         click_timeout: int = 5000,
+        api: Optional[CloudTaskApi] = None,
+        popup: Optional[Any] = None,
     ) -> None:
         self.task_name = task_name
         self.run_duration = run_duration
@@ -39,6 +100,10 @@ class CloudTaskManager:
         self.wait_timeout = wait_timeout
         self.search_timeout = search_timeout
         self.click_timeout = click_timeout
+        # 接口模式客户端；回退到页面操作时用 popup 关闭云脑任务页弹窗
+        self.api = api
+        self.popup = popup
+        self._api_task: Optional[CloudTask] = None
 
     # ----- 仪表盘辅助 -----
     def show_dashboard_info(self, page: Page) -> None:
@@ -46,7 +111,7 @@ class CloudTaskManager:
         try:
             contributions = page.get_by_text('total contributions in the last 12 months')
             if contributions.is_visible():
-                logger.info(f"  - {contributions.inner_text()}")
+                logger.info("  - %s", contributions.inner_text())
         except Exception:
             pass
 
@@ -65,43 +130,49 @@ class CloudTaskManager:
         logger.info("已进入云脑任务页面")
 
         logger.info("检查并关闭云脑任务页面弹窗...")
-        page.wait_for_timeout(self.wait_timeout)
+        wait_for_dom_quiet(page, quiet=500, timeout=self.wait_timeout)
 
         logger.info("\n云脑任务信息:")
         try:
             task_count = page.get_by_text('？|?3 ?')  # 保留原逻辑的弱选择器
             if task_count.is_visible():
-                logger.info(f"  - {task_count.inner_text()}")
+                logger.info("  - %s", task_count.inner_text())
         except Exception:
             pass
 
         logger.info("  - 任务列表已加载")
 
     # ----- 任务基础操作 -----
-    def wait_for_task_status(self, page: Page, target_status: str, timeout: int = 30) -> bool:
-        logger.info(f"等待任务状态变为 {target_status}...")
-        for _ in range(timeout):
-            time.sleep(1)
+    def watch_task_status(self, page: Page, targets: Sequence[str], timeout: float) -> Optional[str]:
+        """等待任务行出现 `targets` 中任一状态并返回该状态；超过 `timeout` 毫秒返回 None。
+
+        期间页面发生导航（执行上下文被销毁）时，等待加载完成后在剩余时间内重新监听；
+        其他错误直接返回 None。
+        """
+        targets = [t.upper() for t in targets]
+        deadline = time.monotonic() + timeout / 1000.0
+        while True:
+            remaining = (deadline - time.monotonic()) * 1000.0
+            if remaining <= 0:
+                return None
             try:
-                status_cell = page.locator(f'td:has-text("{target_status}")').first
-                if status_cell.is_visible():
-                    logger.info(f"  - 任务状态已变为 {target_status}")
-                    return True
-            except Exception:
-                continue
-        logger.warning(f"  - 等待超时，未能在 {timeout} 秒内变为 {target_status} 状态")
-        return False
+                return page.evaluate(STATUS_WATCH_SCRIPT, [targets, self.task_name, remaining])
+            except Exception as exc:
+                if not is_navigation_error(exc):
+                    logger.warning("监听任务状态失败: %s", exc)
+                    return None
+                try:
+                    page.wait_for_load_state('domcontentloaded', timeout=max(1.0, remaining))
+                except Exception:
+                    return None
 
-    def get_task_status(self, page: Page) -> Optional[str]:
-        try:
-            status_cell = page.locator(
-                'td:has-text("RUNNING"), td:has-text("STOPPED"), td:has-text("WAITING"), td:has-text("STOPPING")'
-            ).first
-            if status_cell.is_visible():
-                return status_cell.inner_text().strip()
-        except Exception:
-            pass
-        return None
+    def wait_for_task_status(self, page: Page, target_status: str, timeout: int = 30) -> bool:
+        logger.info("等待任务状态变为 %s...", target_status)
+        if self.watch_task_status(page, [target_status], timeout * 1000):
+            logger.info("  - 任务状态已变为 %s", target_status)
+            return True
+        logger.warning("  - 等待超时，未能在 %s 秒内变为 %s 状态", timeout, target_status)
+        return False
 
     def stop_task(self, page: Page, *, wait_for_stopped: bool = True, timeout: int = 30) -> bool:
         try:
@@ -114,58 +185,125 @@ class CloudTaskManager:
                 return self.wait_for_task_status(page, 'STOPPED', timeout)
             return True
         except Exception as exc:
-            logger.error(f"停止任务失败: {exc}")
+            logger.error("停止任务失败: %s", exc)
             return False
 
     # ----- 高层流程 -----
     def handle_cloud_task(self, page: Page) -> None:
-        logger.info(f"\n搜索任务 '{self.task_name}'...")
+        running_ok = self.start_cloud_task(page)
+        if running_ok is None:
+            return
+
+        if running_ok:
+            logger.info("\n任务运行中，等待%s秒...", self.run_duration)
+            time.sleep(self.run_duration)
+        else:
+            logger.warning("\n任务启动超时，尝试停止任务...")
+
+        self.finish_cloud_task(page)
+
+    def start_cloud_task(self, page: Page) -> Optional[bool]:
+        """搜索任务并点击“再次调试”，不等待运行窗口。
+
+        返回 True 表示任务已进入 RUNNING，False 表示启动超时（仍需停止），
+        None 表示任务未被启动（无需后续停止）。
+        """
+        self._api_task = None
+        if self.api is not None:
+            try:
+                return self._start_via_api(page)
+            except TaskApiError as exc:
+                logger.warning("接口模式不可用，回退到页面操作: %s", exc)
+            if '/cloudbrains' not in page.url:
+                self.navigate_to_cloud_task(page)
+                if self.popup is not None:
+                    self.popup.close_popup(page)
+        return self._start_via_ui(page)
+
+    def _start_via_api(self, page: Page) -> Optional[bool]:
+        logger.info("\n通过接口查找任务 '%s'...", self.task_name)
+        task = self.api.find_task(page, self.task_name)
+        logger.info("  - 当前任务状态 %s", task.status or "未知")
+        if task.status == 'RUNNING':
+            logger.info("\n任务正在运行，需要先停止...")
+            self.api.stop(page, task)
+            if self.api.wait_status(page, self.task_name, ('STOPPED',), 30) is None:
+                logger.warning("  - 等待超时，任务未停止")
+            task.status = 'STOPPED'
+        if task.status not in ('STOPPED', ''):
+            return None
+
+        self.api.restart(page, task)
+        self._api_task = task
+        logger.info("等待任务状态变为 RUNNING...")
+        try:
+            running = self.api.wait_status(page, self.task_name, ('RUNNING',), 60) == 'RUNNING'
+        except TaskApiError as exc:
+            # 重启请求已生效：不能再回退到页面操作（会再次停止并重启任务），按启动超时处理，
+            # 之后仍由 finish_cloud_task 通过接口停止
+            logger.warning("  - 查询任务状态失败，按启动超时处理: %s", exc)
+            return False
+        if running:
+            logger.info("  - 任务状态已变为 RUNNING")
+        else:
+            logger.warning("  - 等待超时，未能在 60 秒内变为 RUNNING 状态")
+        return running
+
+    def _start_via_ui(self, page: Page) -> Optional[bool]:
+        logger.info("\n搜索任务 '%s'...", self.task_name)
         search_input = page.get_by_role('textbox', name='搜索任务名称')
         search_input.fill(self.task_name)
         search_input.press('Enter')
-        page.wait_for_timeout(self.search_timeout)
+        wait_for_dom_quiet(page, quiet=500, timeout=self.search_timeout)
         logger.info("搜索完成")
 
         logger.info("\n检查任务状态...")
-        page.wait_for_timeout(self.wait_timeout)
-        task_status = self.get_task_status(page)
+        task_status = self.watch_task_status(page, TASK_STATUSES, self.wait_timeout)
         if task_status:
-            logger.info(f"  - 当前任务状态 {task_status}")
+            logger.info("  - 当前任务状态 %s", task_status)
 
         if task_status == 'RUNNING':
             logger.info("\n任务正在运行，需要先停止...")
             self.stop_task(page, wait_for_stopped=True, timeout=30)
             task_status = 'STOPPED'
 
-        if task_status in ['STOPPED', None]:
-            logger.info("\n点击'再次调试'按钮...")
-            page.wait_for_timeout(self.search_timeout)
-            try:
-                debug_again_button = page.get_by_role('link', name='再次调试')
-                debug_again_button.wait_for(state='visible', timeout=10000)
-                if debug_again_button.is_enabled():
-                    debug_again_button.click()
-                    logger.info("  - 已点击 '再次调试'")
-                else:
-                    logger.warning("  - '再次调试'按钮被禁用，跳过任务启动")
-                    return
-            except Exception as exc:
-                logger.error(f"  - 无法点击'再次调试'按钮: {exc}")
-                return
+        if task_status not in ['STOPPED', None]:
+            return None
 
-            page.wait_for_timeout(self.click_timeout)
-            running_ok = self.wait_for_task_status(page, 'RUNNING', timeout=60)
-
-            if running_ok:
-                logger.info(f"\n任务运行中，等待{self.run_duration}秒...")
-                time.sleep(self.run_duration)
+        logger.info("\n点击'再次调试'按钮...")
+        wait_for_dom_quiet(page, quiet=500, timeout=self.search_timeout)
+        try:
+            debug_again_button = page.get_by_role('link', name='再次调试')
+            debug_again_button.wait_for(state='visible', timeout=10000)
+            if debug_again_button.is_enabled():
+                debug_again_button.click()
+                logger.info("  - 已点击 '再次调试'")
             else:
-                logger.warning("\n任务启动超时，尝试停止任务...")
+                logger.warning("  - '再次调试'按钮被禁用，跳过任务启动")
+                return None
+        except Exception as exc:
+            logger.error("  - 无法点击'再次调试'按钮: %s", exc)
+            return None
+
+        wait_for_dom_quiet(page, quiet=500, timeout=self.click_timeout)
+        return self.wait_for_task_status(page, 'RUNNING', timeout=60)
 
-            self.stop_task(page, wait_for_stopped=False)
-            page.wait_for_timeout(self.wait_timeout)
-            logger.info("任务操作完成")
+    def finish_cloud_task(self, page: Page) -> None:
+        """停止由 `start_cloud_task` 启动的任务。"""
+        task, self._api_task = self._api_task, None
+        if task is not None and self.api is not None:
+            try:
+                self.api.stop(page, task)
+                logger.info("任务操作完成")
+                return
+            except TaskApiError as exc:
+                logger.warning("接口停止任务失败，回退到页面操作: %s", exc)
+                if '/cloudbrains' not in page.url:
+                    self.navigate_to_cloud_task(page)
+        self.stop_task(page, wait_for_stopped=False)
+        self.watch_task_status(page, ('STOPPING', 'STOPPED'), self.wait_timeout)
+        logger.info("任务操作完成")
 
 
-__all__ = ["CloudTaskManager"]
+__all__ = ["CloudTaskManager", "STATUS_WATCH_SCRIPT", "TASK_STATUSES", "is_navigation_error"]
 
@@ -5,20 +5,34 @@ OpenI 平台登录自动化脚本
 
 from __future__ import annotations
 
+import time
 from typing import Optional
 
 from playwright.sync_api import Page
 
 from src.core.base import LoginAutomation
+from src.core.browser import BrowserPool
+from src.core.config import UnifiedConfigManager
 from src.core.logger import setup_logger
 from src.core.paths import get_project_paths
+from src.core.waits import wait_for_dom_quiet
 from src.sites.openi.popup import PopupHandler
 from src.sites.openi.cloud_task import CloudTaskManager
+from src.sites.openi.task_api import CloudTaskApi
 
 
 logger = setup_logger("openi", get_project_paths().logs / "openi_automation.log")
 
 
+def _task_api() -> Optional[CloudTaskApi]:
+    """读取 `sites.openi.task_api`，启用时返回接口模式客户端。"""
+    try:
+        return CloudTaskApi.from_config(UnifiedConfigManager().get_site_config('openi').get('task_api'))
+    except Exception as exc:
+        logger.warning("读取 task_api 配置失败，使用页面操作: %s", exc)
+        return None
+
+
 class OpeniLogin(LoginAutomation):
     """OpenI 多用户登录自动化实现。"""
 
@@ -31,12 +45,18 @@ class OpeniLogin(LoginAutomation):
         run_duration: int = 15,
         use_cookies: bool = True,
         cookie_expire_days: int = 7,
+        browser_pool: Optional[BrowserPool] = None,
+        pipelined: bool = False,
     ) -> None:
         self.username = username
         self.task_name = task_name
         self.run_duration = run_duration
         self.use_cookies = use_cookies
         self.cookie_expire_days = cookie_expire_days
+        # 流水线模式：after_login 只启动任务，运行窗口由调用方统一等待后调用 stop_cloud_task()
+        self.pipelined = pipelined
+        self.task_started_at: Optional[float] = None
+        self._task_running: Optional[bool] = None
 
         # 修复 site_name（移除多级前缀，避免嵌套）
         site_name = f"openi_{username}"
@@ -46,10 +66,16 @@ class OpeniLogin(LoginAutomation):
             headless=headless,
             browser_kwargs={'slow_mo': 500},
             cookie_expire_days=cookie_expire_days,
+            browser_pool=browser_pool,
         )
 
         self._popup = PopupHandler()
-        self._cloud = CloudTaskManager(task_name=self.task_name, run_duration=self.run_duration)
+        self._cloud = CloudTaskManager(
+            task_name=self.task_name,
+            run_duration=self.run_duration,
+            api=_task_api(),
+            popup=self._popup,
+        )
 
     # 为简化实现，Cookie 登录沿用基类实现
 
@@ -62,7 +88,7 @@ class OpeniLogin(LoginAutomation):
             logger.warning("Cookie 验证失败，需要重新登录")
             return False
         except Exception as exc:
-            logger.warning(f"Cookie 验证失败: {exc}")
+            logger.warning("Cookie 验证失败: %s", exc)
             return False
 
     def do_login(self, page: Page, **credentials) -> bool:
@@ -74,7 +100,7 @@ class OpeniLogin(LoginAutomation):
         try:
             logger.info("正在访问 OpenI 平台...")
             page.goto('https://git.openi.org.cn/', timeout=30000)
-            logger.info(f"  - 当前 URL: {page.url}")
+            logger.info("  - 当前 URL: %s", page.url)
             page.wait_for_load_state('domcontentloaded')
             logger.info("  - 页面加载完成")
 
@@ -82,7 +108,7 @@ class OpeniLogin(LoginAutomation):
             page.get_by_role('link', name=' 登录').click()
             page.wait_for_load_state('domcontentloaded')
 
-            logger.info(f"填写用户名 {self.username}")
+            logger.info("填写用户名 %s", self.username)
             username_input = page.get_by_role('textbox', name='用户名/邮箱/手机号')
             username_input.wait_for(state='visible', timeout=10000)
             username_input.fill(self.username)
@@ -101,22 +127,23 @@ class OpeniLogin(LoginAutomation):
             try:
                 page.wait_for_url('**/dashboard', timeout=30000)
             except Exception:
-                logger.warning(f"等待跳转超时，当前URL: {page.url}")
+                logger.warning("等待跳转超时，当前URL: %s", page.url)
                 if 'dashboard' not in page.url:
                     raise
 
             logger.info("检查并关闭仪表盘弹窗...")
-            page.wait_for_timeout(2000)
+            wait_for_dom_quiet(page, quiet=500, timeout=2000)
             self._popup.close_popup(page)
 
             if self.verify_login(page):
-                logger.info(f"登录成功！欢迎 {self.username}")
+                logger.info("登录成功！欢迎 %s", self.username)
                 return True
 
             logger.warning("登录验证失败")
             return False
         except Exception as exc:
-            logger.error(f"用户 {self.username} 登录失败: {exc}")
+            self.last_error = exc
+            logger.error("用户 %s 登录失败: %s", self.username, exc)
             if not self.browser_manager.save_error_screenshot(page, f'error_screenshot_{self.username}.png'):
                 logger.warning("无法保存登录失败截图")
             return False
@@ -125,17 +152,44 @@ class OpeniLogin(LoginAutomation):
         try:
             if self.logged_in_with_cookies:
                 logger.info("检查并关闭仪表盘弹窗...")
-                page.wait_for_timeout(2000)
+                wait_for_dom_quiet(page, quiet=500, timeout=2000)
                 self._popup.close_popup(page)
 
             self._cloud.show_dashboard_info(page)
-            self._cloud.navigate_to_cloud_task(page)
-            self._popup.close_popup(page)
-            self._cloud.handle_cloud_task(page)
-
-            logger.info(f"\n用户 {self.username} 执行成功")
+            if self._cloud.api is None:
+                # 接口模式无需打开云脑任务页；接口不可用时由 CloudTaskManager 再导航
+                with self.spans.span("navigate_to_cloud_task"):
+                    self._cloud.navigate_to_cloud_task(page)
+                    self._popup.close_popup(page)
+            if self.pipelined:
+                with self.spans.span("start_cloud_task") as span:
+                    self._task_running = self._cloud.start_cloud_task(page)
+                    span.set({True: "running", False: "timeout", None: "skipped"}[self._task_running])
+                self.task_started_at = time.monotonic()
+                logger.info("\n用户 %s 任务已启动，等待统一停止", self.username)
+                return
+            with self.spans.span("handle_cloud_task", run_duration=self.run_duration):
+                self._cloud.handle_cloud_task(page)
+
+            logger.info("\n用户 %s 执行成功", self.username)
         except Exception as exc:
-            logger.error(f"用户 {self.username} 执行失败: {exc}")
+            logger.error("用户 %s 执行失败: %s", self.username, exc)
             if not self.browser_manager.save_error_screenshot(page, f'error_screenshot_{self.username}.png'):
                 logger.warning("无法保存错误截图")
             raise
+
+    def stop_cloud_task(self) -> None:
+        """流水线模式下停止已启动的任务并关闭会话。"""
+        try:
+            if self.page is not None and self._task_running is not None:
+                if not self._task_running:
+                    logger.warning("用户 %s 任务启动超时，尝试停止任务...", self.username)
+                with self.spans.span("finish_cloud_task"):
+                    self._cloud.finish_cloud_task(self.page)
+                logger.info("\n用户 %s 执行成功", self.username)
+        except Exception as exc:
+            logger.error("用户 %s 停止任务失败: %s", self.username, exc)
+            raise
+        finally:
+            self._task_running = None
+            self.close()
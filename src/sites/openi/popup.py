@@ -40,7 +40,11 @@ class PopupHandler:
                         if button.is_visible():
                             button.click()
                             logger.info("  - 已点击关闭按钮")
-                            page.wait_for_timeout(500)
+                            # 等待弹窗消失而非固定等待
+                            try:
+                                button.wait_for(state='hidden', timeout=500)
+                            except Exception:
+                                pass
                             break
                     except Exception:
                         continue
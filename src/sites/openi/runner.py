@@ -3,9 +3,14 @@
 from __future__ import annotations
 
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
 
+from src.core.browser import BrowserPool
 from src.core.logger import setup_logger
 from src.core.paths import get_project_paths
+from src.core.ratelimit import RateLimiter, get_rate_limiter
+from src.core.retry import run_with_retry
 from src.sites.openi.config import load_config
 from src.sites.openi.login import OpeniLogin
 
@@ -13,8 +18,94 @@ from src.sites.openi.login import OpeniLogin
 logger = setup_logger("openi.runner", get_project_paths().logs / "openi_automation.log")
 
 
-def main() -> None:
-    """主函数：加载配置并依次处理所有用户。"""
+def _run_user(
+    index: int,
+    total: int,
+    user: Dict,
+    settings: Dict,
+    limiter: RateLimiter,
+    pool: Optional[BrowserPool],
+    *,
+    pipelined: bool = False,
+) -> Union[bool, OpeniLogin, None]:
+    """处理单个用户；在站点限流器约束下启动。
+
+    超时、人机验证等暂时性失败按 `sites.openi.retry` 退避重试，站点熔断时直接失败。
+    流水线模式下登录并启动任务后保持会话，成功时返回 `OpeniLogin` 实例，失败返回 None。
+    """
+    username = user['username']
+    with limiter:
+        logger.info("\n[%s/%s] 正在处理用户: %s", index, total, username)
+        logger.info("-" * 60)
+
+        automation = OpeniLogin(
+            username=username,
+            headless=settings['headless'],
+            task_name=settings['task_name'],
+            run_duration=settings['run_duration'],
+            use_cookies=settings['use_cookies'],
+            cookie_expire_days=settings['cookie_expire_days'],
+            browser_pool=pool,
+            pipelined=pipelined,
+        )
+
+        outcome = run_with_retry(
+            'openi',
+            lambda: automation.run(
+                use_cookie=settings['use_cookies'],
+                verify_url='https://git.openi.org.cn/dashboard',
+                cookie_expire_days=settings['cookie_expire_days'],
+                keep_open=pipelined,
+                password=user['password'],
+            ),
+            failure_class=lambda: automation.failure_class,
+            label=f"openi:{username}",
+        )
+        ok = outcome.ok
+        if not ok:
+            logger.warning("用户 %s 失败（%s，尝试 %s 次）", username, outcome.error_class, outcome.attempts)
+
+        if pipelined:
+            return automation if ok else None
+        return ok
+
+
+def _run_pipelined(users: List[Dict], settings: Dict, limiter: RateLimiter, pool: BrowserPool) -> List[bool]:
+    """流水线模式：先为所有账号启动任务，再按各自启动时间统一停止。
+
+    批处理耗时约为一个运行窗口加上各账号的登录/启动开销，而非 N 个运行窗口。
+    """
+    total = len(users)
+    sessions = [
+        _run_user(index, total, user, settings, limiter, pool, pipelined=True)
+        for index, user in enumerate(users, 1)
+    ]
+
+    run_duration = float(settings['run_duration'])
+    logger.info("\n所有任务已启动，共享运行窗口 %s 秒后依次停止...", run_duration)
+    results: List[bool] = []
+    for session in sessions:
+        if session is None:
+            results.append(False)
+            continue
+        if session.task_started_at is not None:
+            remaining = session.task_started_at + run_duration - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+        try:
+            session.stop_cloud_task()
+            results.append(True)
+        except Exception:
+            results.append(False)
+    return results
+
+
+def main(concurrency: Optional[int] = None, pipeline: Optional[bool] = None) -> int:
+    """主函数：加载配置并处理所有用户，返回退出码（有失败用户时为 1）。
+
+    `concurrency` > 1 时使用线程池并发处理；未指定时读取配置 `concurrency`（默认 1）。
+    `pipeline` 为 True 时启用流水线模式（共享运行窗口），需在单线程内共享浏览器池。
+    """
     logger.info("=" * 60)
     logger.info("OpenI 平台多用户自动化脚本")
     logger.info("=" * 60)
@@ -23,75 +114,93 @@ def main() -> None:
         config_data = load_config()
         users = config_data['users']
         config = config_data.get('config', {})
-
-        task_name = config.get('task_name', 'image')
-        run_duration = config.get('run_duration', 15)
-        headless = config.get('headless', False)
-        use_cookies = config.get('use_cookies', True)
-        cookie_expire_days = config.get('cookie_expire_days', 7)
+        defaults = config_data.get('defaults') or {}
+        site_cfg = (config_data.get('sites') or {}).get('openi') or {}
+
+        settings = {
+            'task_name': config.get('task_name', 'image'),
+            'run_duration': config.get('run_duration', 15),
+            'headless': config.get('headless', False),
+            'use_cookies': config.get('use_cookies', True),
+            'cookie_expire_days': config.get('cookie_expire_days', 7),
+        }
+        if concurrency is None:
+            concurrency = int(config.get('concurrency', defaults.get('concurrency', 1)))
+        concurrency = max(1, concurrency)
+        if pipeline is None:
+            pipeline = bool(config.get('pipeline', site_cfg.get('pipeline', False)))
+        if pipeline and concurrency > 1:
+            logger.warning("流水线模式在单线程内运行，忽略 concurrency 设置")
+            concurrency = 1
+        # 站点限流：默认相邻账号启动间隔 3 秒，取代固定 sleep
+        limiter = get_rate_limiter('openi', config.get('rate_limit') or site_cfg.get('rate_limit'))
+
+        # 浏览器池：整批共享一个 Playwright 驱动与少量预热浏览器。
+        # 同步 API 绑定线程，故仅在串行模式下启用。
+        pool = None
+        if concurrency == 1:
+            pool = BrowserPool.from_config(config.get('browser_pool') or defaults.get('browser_pool'))
+        if pipeline and pool is None:
+            # 流水线需要同时保持多个会话，必须共享同一个 Playwright 驱动
+            pool = BrowserPool()
 
         total_users = len(users)
-        success_count = 0
-        failed_users = []
 
-        logger.info(f"\n共有 {total_users} 个用户需要处理")
-        logger.info(f"任务配置: task_name={task_name}, run_duration={run_duration}s, headless={headless}")
-        logger.info(f"Cookie 配置: use_cookies={use_cookies}, expire_days={cookie_expire_days}")
+        logger.info("\n共有 %s 个用户需要处理", total_users)
+        logger.info(
+            "任务配置: task_name=%s, run_duration=%ss, headless=%s",
+            settings['task_name'], settings['run_duration'], settings['headless'],
+        )
+        logger.info("Cookie 配置: use_cookies=%s, expire_days=%s", settings['use_cookies'], settings['cookie_expire_days'])
+        logger.info(
+            "并发配置: concurrency=%s, min_interval=%ss, max_concurrent=%s, pipeline=%s",
+            concurrency, limiter.min_interval, limiter.max_concurrent or '不限', pipeline,
+        )
+        if pool is not None:
+            logger.info("浏览器池: size=%s, max_contexts=%s, max_rss_mb=%s", pool.size, pool.max_contexts, pool.max_rss_mb)
         logger.info("=" * 60)
 
-        for index, user in enumerate(users, 1):
-            username = user['username']
-            password = user['password']
-
-            logger.info(f"\n[{index}/{total_users}] 正在处理用户: {username}")
-            logger.info("-" * 60)
-
-            automation = OpeniLogin(
-                username=username,
-                headless=headless,
-                task_name=task_name,
-                run_duration=run_duration,
-                use_cookies=use_cookies,
-                cookie_expire_days=cookie_expire_days,
-            )
-
-            try:
-                success = automation.run(
-                    use_cookie=use_cookies,
-                    verify_url='https://git.openi.org.cn/dashboard',
-                    cookie_expire_days=cookie_expire_days,
-                    password=password,
-                )
-            except Exception:
-                success = False
-
-            if success:
-                success_count += 1
+        results: List[bool] = []
+        try:
+            if pipeline:
+                results = _run_pipelined(users, settings, limiter, pool)
+            elif concurrency == 1:
+                for index, user in enumerate(users, 1):
+                    results.append(_run_user(index, total_users, user, settings, limiter, pool))
             else:
-                failed_users.append(username)
-
-            if index < total_users:
-                logger.info("\n等待 3 秒后处理下一个用户...")
-                time.sleep(3)
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    futures = [
+                        executor.submit(_run_user, index, total_users, user, settings, limiter, None)
+                        for index, user in enumerate(users, 1)
+                    ]
+                    # 按账号顺序收集结果，保证汇总报告稳定
+                    results = [fut.result() for fut in futures]
+        finally:
+            if pool is not None:
+                pool.close()
+
+        failed_users = [user['username'] for user, ok in zip(users, results) if not ok]
+        success_count = total_users - len(failed_users)
 
         logger.info("\n" + "=" * 60)
         logger.info("执行完成！汇总报告")
         logger.info("=" * 60)
-        logger.info(f"总用户数: {total_users}")
-        logger.info(f"成功: {success_count}")
-        logger.info(f"失败: {len(failed_users)}")
+        logger.info("总用户数: %s", total_users)
+        logger.info("成功: %s", success_count)
+        logger.info("失败: %s", len(failed_users))
 
         if failed_users:
-            logger.warning(f"失败用户列表: {', '.join(failed_users)}")
+            logger.warning("失败用户列表: %s", ', '.join(failed_users))
 
         logger.info("=" * 60)
+        return 0 if not failed_users else 1
 
     except FileNotFoundError as exc:
-        logger.error(f"\n{exc}")
+        logger.error("\n%s", exc)
+        return 1
     except Exception as exc:
-        logger.error(f"\n发生错误: {exc}")
+        logger.error("\n发生错误: %s", exc)
         raise
 
 
 __all__ = ["main"]
-
@@ -0,0 +1,218 @@
+"""通过站点 JSON 接口控制 OpenI 云脑调试任务。
+
+`CloudTaskManager` 默认完全经由页面操作：填写搜索框、回车、等待渲染、读取状态单元格、
+点击“再次调试”/“停止”。启用接口模式后，改用已登录上下文的 `page.request`
+（与页面共享 Cookie）按任务名搜索、重启与停止任务，省去多次页面渲染与等待；
+接口不可用（状态码异常、响应无法解析、找不到任务）时抛出 `TaskApiError`，
+由 `CloudTaskManager` 回退到页面操作。
+
+各接口路径可在 `sites.openi.task_api` 中覆盖（`{name}`、`{id}`、`{owner}`、`{repo}` 会被替换）：
+
+    "task_api": {"enabled": true,
+                 "search": "/api/v1/cloudbrains?q={name}",
+                 "restart": "/{owner}/{repo}/cloudbrain/{id}/restart",
+                 "stop": "/{owner}/{repo}/cloudbrain/{id}/stop"}
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from urllib.parse import quote
+
+from playwright.sync_api import Page
+
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+
+logger = setup_logger("openi.task_api", get_project_paths().logs / "openi_automation.log")
+
+BASE_URL = "https://git.openi.org.cn"
+
+DEFAULT_ENDPOINTS: Dict[str, str] = {
+    "search": "/api/v1/cloudbrains?q={name}",
+    "restart": "/{owner}/{repo}/cloudbrain/{id}/restart",
+    "stop": "/{owner}/{repo}/cloudbrain/{id}/stop",
+}
+
+# 不同版本接口中任务字段的候选键名
+_NAME_KEYS = ("DisplayJobName", "display_job_name", "JobName", "job_name", "name")
+_ID_KEYS = ("ID", "id", "JobID", "job_id")
+_STATUS_KEYS = ("Status", "status")
+_LIST_KEYS = ("tasks", "data", "list", "Tasks", "Data", "cloudbrains", "Cloudbrains")
+
+
+class TaskApiError(RuntimeError):
+    """接口不可用或响应不符合预期，调用方应回退到页面操作。"""
+
+
+@dataclass
+class CloudTask:
+    """接口返回的单个云脑任务。"""
+
+    id: str
+    name: str
+    status: str = ""
+    owner: str = ""
+    repo: str = ""
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+def _first(entry: Dict[str, Any], keys: Iterable[str]) -> Any:
+    for key in keys:
+        value = entry.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _entries(payload: Any) -> List[Dict[str, Any]]:
+    """从响应中取出任务列表（顶层列表或常见包装键下的列表，最多向下两层）。"""
+    if isinstance(payload, list):
+        return [e for e in payload if isinstance(e, dict)]
+    if isinstance(payload, dict):
+        for key in _LIST_KEYS:
+            value = payload.get(key)
+            if isinstance(value, list):
+                return [e for e in value if isinstance(e, dict)]
+            if isinstance(value, dict):
+                nested = _entries(value)
+                if nested:
+                    return nested
+    return []
+
+
+def _to_task(entry: Dict[str, Any]) -> Optional[CloudTask]:
+    # 部分接口把任务包在 {"Cloudbrain": {...}} 中
+    inner = entry.get("Cloudbrain") if isinstance(entry.get("Cloudbrain"), dict) else entry
+    task_id = _first(inner, _ID_KEYS)
+    name = _first(inner, _NAME_KEYS)
+    if task_id is None or name is None:
+        return None
+    repo = inner.get("Repo") or entry.get("Repo") or {}
+    repo = repo if isinstance(repo, dict) else {}
+    return CloudTask(
+        id=str(task_id),
+        name=str(name),
+        status=str(_first(inner, _STATUS_KEYS) or "").upper(),
+        owner=str(repo.get("OwnerName") or inner.get("repo_owner_name") or inner.get("owner") or ""),
+        repo=str(repo.get("Name") or repo.get("LowerName") or inner.get("repo_name") or inner.get("repo") or ""),
+        raw=entry,
+    )
+
+
+class CloudTaskApi:
+    """基于 `page.request` 的云脑任务接口客户端。"""
+
+    def __init__(
+        self,
+        *,
+        base_url: str = BASE_URL,
+        endpoints: Optional[Dict[str, str]] = None,
+        timeout: float = 10000,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.endpoints = {**DEFAULT_ENDPOINTS, **(endpoints or {})}
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    @classmethod
+    def from_config(cls, options: Optional[Dict[str, Any]]) -> Optional["CloudTaskApi"]:
+        """按 `task_api` 配置创建客户端；未启用时返回 None。"""
+        if not isinstance(options, dict) or not options.get("enabled"):
+            return None
+        endpoints = {k: str(v) for k, v in options.items() if k in DEFAULT_ENDPOINTS and v}
+        return cls(
+            base_url=str(options.get("base_url") or BASE_URL),
+            endpoints=endpoints,
+            timeout=float(options.get("timeout", 10000)),
+            poll_interval=float(options.get("poll_interval", 1.0)),
+        )
+
+    # 请求 ---------------------------------------------------------------
+    def _url(self, action: str, task: Optional[CloudTask] = None, name: str = "") -> str:
+        values = {"name": quote(name, safe="")}
+        if task is not None:
+            values.update(id=quote(task.id, safe=""), owner=task.owner, repo=task.repo)
+        try:
+            path = self.endpoints[action].format(**values)
+        except (KeyError, IndexError) as exc:
+            raise TaskApiError(f"接口 {action} 的路径模板无法填充: {exc}") from exc
+        return path if path.startswith("http") else self.base_url + path
+
+    def _csrf(self, page: Page) -> str:
+        try:
+            for cookie in page.context.cookies(self.base_url):
+                if cookie.get("name") == "_csrf":
+                    return str(cookie.get("value") or "")
+        except Exception:
+            pass
+        return ""
+
+    def _json(self, response: Any, action: str) -> Any:
+        if not response.ok:
+            raise TaskApiError(f"接口 {action} 返回 HTTP {response.status}")
+        try:
+            return response.json()
+        except Exception as exc:
+            raise TaskApiError(f"接口 {action} 的响应不是 JSON") from exc
+
+    # 操作 ---------------------------------------------------------------
+    def find_task(self, page: Page, name: str) -> CloudTask:
+        """按任务名搜索，返回名称完全一致的第一个任务。"""
+        try:
+            response = page.request.get(self._url("search", name=name), timeout=self.timeout,
+                                        headers={"Accept": "application/json"})
+        except Exception as exc:
+            raise TaskApiError(f"搜索任务失败: {exc}") from exc
+        for entry in _entries(self._json(response, "search")):
+            task = _to_task(entry)
+            if task is not None and task.name == name:
+                return task
+        raise TaskApiError(f"接口未返回名为 {name} 的任务")
+
+    def _post(self, page: Page, action: str, task: CloudTask) -> Any:
+        if not task.owner or not task.repo:
+            # 路径需要仓库信息而响应中没有时无法构造请求
+            if "{owner}" in self.endpoints[action] or "{repo}" in self.endpoints[action]:
+                raise TaskApiError(f"任务 {task.name} 缺少仓库信息，无法调用 {action}")
+        csrf = self._csrf(page)
+        try:
+            response = page.request.post(
+                self._url(action, task),
+                form={"_csrf": csrf} if csrf else None,
+                headers={"Accept": "application/json", **({"X-Csrf-Token": csrf} if csrf else {})},
+                timeout=self.timeout,
+            )
+        except Exception as exc:
+            raise TaskApiError(f"{action} 请求失败: {exc}") from exc
+        payload = self._json(response, action)
+        code = payload.get("result_code") if isinstance(payload, dict) else None
+        if code not in (None, 0, "0"):
+            raise TaskApiError(f"接口 {action} 返回错误: {payload.get('error_msg') or code}")
+        return payload
+
+    def restart(self, page: Page, task: CloudTask) -> None:
+        self._post(page, "restart", task)
+        logger.info("  - 已通过接口重新启动任务 %s（id=%s）", task.name, task.id)
+
+    def stop(self, page: Page, task: CloudTask) -> None:
+        self._post(page, "stop", task)
+        logger.info("  - 已通过接口停止任务 %s（id=%s）", task.name, task.id)
+
+    def wait_status(self, page: Page, name: str, targets: Sequence[str], timeout: float) -> Optional[str]:
+        """轮询搜索接口直到任务进入 `targets` 中任一状态；超过 `timeout` 秒返回 None。"""
+        wanted = {t.upper() for t in targets}
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self.find_task(page, name).status
+            if status in wanted:
+                return status
+            if time.monotonic() + self.poll_interval > deadline:
+                return None
+            page.wait_for_timeout(self.poll_interval * 1000)
+
+
+__all__ = ["CloudTask", "CloudTaskApi", "TaskApiError", "DEFAULT_ENDPOINTS"]
@@ -0,0 +1,135 @@
+"""站点注册表：按站点名称提供账号标识、Cookie 名称与强制刷新入口。
+
+刷新即忽略已保存 Cookie 重新登录一次（`run(force_login=True)`），成功后写入新的登录状态；
+超时、人机验证等暂时性失败按站点重试策略退避重试，站点熔断时直接失败（见 `src.core.retry`）。
+调度器与批量脚本通过本模块调用各站点，无需了解各站点类的构造参数。
+
+`depends_on` 声明站点登录所依赖的其他站点会话（AnyRouter 经 LinuxDO OAuth 登录）：
+依赖站点刷新成功后，调度器随即刷新依赖它的站点，使其登录状态基于新的上游会话。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.config import UnifiedConfigManager
+from src.core.retry import RetryOutcome, run_with_retry
+
+
+def _site_of(user: Dict) -> str:
+    return str(user.get("site", "")).strip().lower()
+
+
+def cookie_site_name(user: Dict) -> str:
+    """返回账号对应的 Cookie 存储名（OpenI 为 `openi_<username>`，其余为站点名）。"""
+    site = _site_of(user)
+    if site == "openi":
+        return f"openi_{user.get('username') or ''}"
+    return site
+
+
+def account_label(user: Dict) -> str:
+    return str(user.get("username") or user.get("email") or "<unknown>")
+
+
+def _run_login(site: str, automation, user: Dict, **run_kwargs) -> RetryOutcome:
+    return run_with_retry(
+        site,
+        lambda: automation.run(**run_kwargs),
+        failure_class=lambda: automation.failure_class,
+        label=f"{site}:{account_label(user)}",
+    )
+
+
+def _refresh_openi(user: Dict, headless: bool) -> RetryOutcome:
+    from src.sites.openi.login import OpeniLogin
+
+    cfg = UnifiedConfigManager()
+    site_cfg = cfg.get_site_config("openi")
+    expire_days = int(cfg.get_defaults().get("cookie_expire_days", 30))
+    automation = OpeniLogin(
+        username=user.get("username") or "",
+        headless=headless,
+        task_name=site_cfg.get("task_name", "image"),
+        run_duration=int(site_cfg.get("run_duration", 15)),
+        cookie_expire_days=expire_days,
+    )
+    return _run_login(
+        "openi",
+        automation,
+        user,
+        use_cookie=True,
+        force_login=True,
+        verify_url="https://git.openi.org.cn/dashboard",
+        password=user.get("password"),
+    )
+
+
+def _refresh_linuxdo(user: Dict, headless: bool) -> RetryOutcome:
+    from src.sites.linuxdo.login import LinuxdoLogin
+
+    automation = LinuxdoLogin(headless=headless)
+    return _run_login(
+        "linuxdo",
+        automation,
+        user,
+        use_cookie=True,
+        force_login=True,
+        verify_url="https://linux.do/",
+        email=user.get("email"),
+        password=user.get("password"),
+    )
+
+
+def _refresh_anyrouter(user: Dict, headless: bool) -> RetryOutcome:
+    from src.sites.anyrouter.login import AnyrouterLogin
+
+    automation = AnyrouterLogin(headless=headless)
+    return _run_login(
+        "anyrouter",
+        automation,
+        user,
+        use_cookie=True,
+        force_login=True,
+        verify_url="https://anyrouter.top/console/token",
+    )
+
+
+@dataclass(frozen=True)
+class SiteSpec:
+    """单个站点的注册信息。"""
+
+    name: str
+    # (user, headless) -> 刷新结果（布尔值即是否成功）
+    refresh: Callable[[Dict, bool], RetryOutcome]
+    # 登录依赖其会话的其他站点
+    depends_on: Tuple[str, ...] = ()
+
+
+SITES: Dict[str, SiteSpec] = {
+    "openi": SiteSpec("openi", _refresh_openi),
+    "linuxdo": SiteSpec("linuxdo", _refresh_linuxdo),
+    "anyrouter": SiteSpec("anyrouter", _refresh_anyrouter, depends_on=("linuxdo",)),
+}
+
+
+def get_site(name: str) -> Optional[SiteSpec]:
+    return SITES.get((name or "").strip().lower())
+
+
+def dependent_sites(name: str) -> List[str]:
+    """返回登录依赖 `name` 站点会话的站点。"""
+    name = (name or "").strip().lower()
+    return [spec.name for spec in SITES.values() if name in spec.depends_on]
+
+
+def refresh_account(user: Dict, *, headless: bool = True) -> RetryOutcome:
+    """强制重新登录 `user` 并保存新 Cookie；未注册的站点返回失败结果。"""
+    spec = get_site(_site_of(user))
+    if spec is None:
+        return RetryOutcome(ok=False)
+    return spec.refresh(user, headless)
+
+
+__all__ = ["SiteSpec", "SITES", "get_site", "dependent_sites", "cookie_site_name", "account_label", "refresh_account"]
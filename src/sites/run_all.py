@@ -0,0 +1,166 @@
+"""`python -m src run-all`：在一个进程内执行配置中的全部账号。
+
+所有站点的账号被规划为一个任务图（`src.core.jobgraph`），共享同一个 Playwright 驱动与
+`AsyncBrowserManager`（同一启动参数只启动一个 Chromium，每个账号独立上下文）：
+
+- OpenI：每个账号一个任务；
+- LinuxDO / AnyRouter：Cookie 按站点保存，各只执行一次（取配置中的第一个账号）；
+- AnyRouter 通过 LinuxDO OAuth 登录，排在 LinuxDO 任务之后：LinuxDO 任务成功后交付其
+  `storage_state`，AnyRouter 任务在同一浏览器中直接注入该会话完成 OAuth，无需再次验证 LinuxDO。
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.core.async_base import AsyncBrowserManager
+from src.core.config import UnifiedConfigManager
+from src.core.executor import load_group_caps
+from src.core.jobgraph import Job, JobContext, JobGraph, summarize
+from src.core.logger import setup_logger
+from src.core.paths import get_project_paths
+from src.sites.registry import account_label, cookie_site_name
+
+logger = setup_logger("run_all", get_project_paths().logs / "run_all.log")
+
+SITE_ORDER = ("linuxdo", "anyrouter", "openi")
+
+
+def _linuxdo_headless(headless: bool) -> bool:
+    """LinuxDO 需要有头浏览器应对 Cloudflare；没有可用显示时才退回无头模式。"""
+    if not headless:
+        return False
+    if os.environ.get("DISPLAY"):
+        return False
+    try:
+        from src.core.display import get_display_pool
+        return get_display_pool() is None
+    except Exception:
+        return True
+
+
+def plan_jobs(
+    users: Iterable[Dict],
+    manager: AsyncBrowserManager,
+    *,
+    headless: bool = True,
+    use_cookie: bool = True,
+    sites: Optional[Iterable[str]] = None,
+) -> List[Job]:
+    """把账号列表规划为任务；同一 Cookie 存储名只保留第一个账号。"""
+    wanted = {s.strip().lower() for s in sites} if sites else None
+    cfg = UnifiedConfigManager()
+    defaults = cfg.get_defaults()
+    openi_cfg = cfg.get_site_config("openi")
+    expire_days = int(defaults.get("cookie_expire_days", 30))
+
+    linuxdo_headless = _linuxdo_headless(headless)
+    seen = set()
+    planned: Dict[str, List[Job]] = {site: [] for site in SITE_ORDER}
+    for user in users:
+        site = str(user.get("site", "")).strip().lower()
+        if site not in planned or (wanted is not None and site not in wanted):
+            continue
+        key = cookie_site_name(user)
+        if key in seen:
+            continue
+        seen.add(key)
+        label = account_label(user)
+
+        if site == "openi":
+            run = _openi_job(user, manager, headless=headless, use_cookie=use_cookie, expire_days=expire_days,
+                             task_name=openi_cfg.get("task_name", "image"),
+                             run_duration=int(openi_cfg.get("run_duration", 15)))
+        elif site == "linuxdo":
+            run = _linuxdo_job(user, manager, headless=linuxdo_headless, use_cookie=use_cookie)
+        else:
+            run = _anyrouter_job(manager, headless=headless, use_cookie=use_cookie)
+        planned[site].append(Job(key=key, site=site, run=run, label=label))
+
+    # AnyRouter 排在 LinuxDO 之后：LinuxDO 失败时 AnyRouter 仍可在授权页自行登录，因此只约束顺序
+    linuxdo_keys = tuple(job.key for job in planned["linuxdo"])
+    for job in planned["anyrouter"]:
+        job.depends_on = linuxdo_keys
+        if linuxdo_keys:
+            # 与 LinuxDO 任务使用相同启动参数，即共享同一个浏览器
+            job.run = _anyrouter_job(manager, headless=linuxdo_headless, use_cookie=use_cookie)
+
+    return [job for site in SITE_ORDER for job in planned[site]]
+
+
+def _openi_job(user: Dict, manager: AsyncBrowserManager, *, headless: bool, use_cookie: bool,
+               expire_days: int, task_name: str, run_duration: int):
+    async def _run(_ctx: JobContext) -> bool:
+        from src.sites.openi.async_login import VERIFY_URL, AsyncOpeniLogin
+
+        automation = AsyncOpeniLogin(
+            user.get("username") or "",
+            headless=headless,
+            task_name=task_name,
+            run_duration=run_duration,
+            cookie_expire_days=expire_days,
+            browser_manager=manager,
+        )
+        return await automation.run(
+            use_cookie=use_cookie,
+            verify_url=VERIFY_URL,
+            cookie_expire_days=expire_days,
+            password=user.get("password"),
+        )
+    return _run
+
+
+def _linuxdo_job(user: Dict, manager: AsyncBrowserManager, *, headless: bool, use_cookie: bool):
+    async def _run(ctx: JobContext) -> bool:
+        from src.sites.linuxdo.async_login import VERIFY_URL, AsyncLinuxdoLogin
+
+        automation = AsyncLinuxdoLogin(headless=headless, browser_manager=manager)
+        ok = await automation.run(
+            use_cookie=use_cookie,
+            verify_url=VERIFY_URL,
+            email=user.get("email"),
+            password=user.get("password"),
+        )
+        if ok and automation.session_state:
+            ctx.publish(automation.session_state)
+        return ok
+    return _run
+
+
+def _anyrouter_job(manager: AsyncBrowserManager, *, headless: bool, use_cookie: bool):
+    async def _run(ctx: JobContext) -> bool:
+        from src.sites.anyrouter.async_login import VERIFY_URL, AsyncAnyrouterLogin
+
+        # 取第一个成功交付会话的 LinuxDO 依赖；没有时 AnyRouter 回退到已保存的 LinuxDO Cookie
+        linuxdo_state = next(iter(ctx.inputs.values()), None)
+        automation = AsyncAnyrouterLogin(headless=headless, browser_manager=manager, linuxdo_state=linuxdo_state)
+        return await automation.run(use_cookie=use_cookie, verify_url=VERIFY_URL)
+    return _run
+
+
+async def run_all(
+    *,
+    headless: bool = True,
+    use_cookie: bool = True,
+    sites: Optional[Iterable[str]] = None,
+    concurrency: Optional[int] = None,
+    site_caps: Optional[Dict[str, int]] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """执行配置中的全部账号，返回 JSON 汇总。"""
+    cfg = UnifiedConfigManager()
+    if concurrency is None:
+        concurrency = int(cfg.get_defaults().get("concurrency", 4))
+
+    started = time.monotonic()
+    async with AsyncBrowserManager() as manager:
+        jobs = plan_jobs(cfg.get_users(), manager, headless=headless, use_cookie=use_cookie, sites=sites)
+        caps = load_group_caps({job.site for job in jobs}, site_caps)
+        logger.info("run-all: %s 个任务，并发 %s，站点上限 %s", len(jobs), concurrency, caps or "-")
+        results = await JobGraph(jobs, concurrency=concurrency, site_caps=caps, timeout=timeout).run()
+    return summarize(results, duration=time.monotonic() - started)
+
+
+__all__ = ["plan_jobs", "run_all"]
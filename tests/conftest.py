@@ -0,0 +1,17 @@
+"""测试公共配置：数据目录指向临时目录，避免读写 `data/`。"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# 需在导入 src 之前设置（见 src/core/paths.py）
+os.environ.setdefault("AUTO_DATA_DIR", tempfile.mkdtemp(prefix="auto-tests-"))
+
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
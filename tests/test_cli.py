@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import pytest
+
+from src.__main__ import main
+
+
+@pytest.mark.parametrize("extra", [["--concurrency", "2"], ["--pipeline"]])
+def test_openi_user_rejects_multi_account_options(extra, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["openi", "--user", "alice", *extra])
+    assert excinfo.value.code == 2
+    assert "--user" in capsys.readouterr().err
+
+
+def test_cookie_expire_days_matches_login_source():
+    from init_all_cookies import cookie_expire_days
+
+    data = {"config": {"cookie_expire_days": 7}, "defaults": {"cookie_expire_days": 20}}
+    assert cookie_expire_days({"site": "openi"}, data) == 7
+    assert cookie_expire_days({"site": "linuxdo"}, data) == 20
+    assert cookie_expire_days({"site": "openi"}, {}) == 30
+    assert cookie_expire_days({"site": "linuxdo"}, {"defaults": {"cookie_expire_days": "x"}}) == 30
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.cookies import SESSION_COOKIE_RULES, CookieManager, session_expiry
+
+DAY = 86400.0
+
+
+def cookie(name, expires=None, value="v"):
+    data = {"name": name, "value": value, "domain": "example.com", "path": "/"}
+    if expires is not None:
+        data["expires"] = expires
+    return data
+
+
+def test_session_cookie_rules_cover_every_site():
+    assert set(SESSION_COOKIE_RULES) == {"openi", "linuxdo", "anyrouter"}
+
+
+def test_session_expiry_uses_site_rules():
+    now = time.time()
+    cookies = [
+        cookie("i_like_openi", now + 5 * DAY),  # 前缀规则 i_like_*
+        cookie("gitea_awesome", now + 2 * DAY),
+        cookie("_csrf", now + 1 * DAY),  # 非关键 Cookie 不参与
+        cookie("lang"),
+    ]
+    assert session_expiry(cookies, "openi_alice") == pytest.approx(now + 2 * DAY)
+    # 关键 Cookie 都是会话 Cookie 时无法判断
+    assert session_expiry([cookie("_t"), cookie("other", now + DAY)], "linuxdo") is None
+    assert session_expiry(cookies, "unknown") is None
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def manager(request, tmp_path):
+    return CookieManager(base_dir=tmp_path, backend=request.param)
+
+
+def test_round_trip_with_origins(manager):
+    origins = [{"origin": "https://linux.do", "localStorage": [{"name": "k", "value": "v"}]}]
+    manager.write_cookies("linuxdo", [cookie("_t", time.time() + 10 * DAY)], origins=origins)
+    state = manager.read_storage_state("linuxdo", 30)
+    assert [c["name"] for c in state["cookies"]] == ["_t"]
+    assert state["origins"] == origins
+    assert manager.has_cookies("linuxdo")
+
+
+def test_expired_session_cookie_invalidates_and_deletes(manager):
+    manager.write_cookies("linuxdo", [cookie("_t", time.time() + 60)])
+    # 剩余寿命低于安全边际即视为过期，即使保存时间很新
+    assert manager.read_cookies("linuxdo", 30) is None
+    assert manager.get_expiry("linuxdo") is None
+
+
+def test_session_expiry_overrides_saved_age(manager):
+    manager.write_cookies("anyrouter", [cookie("session", time.time() + 10 * DAY)])
+    assert manager.read_cookies("anyrouter", 0) is not None
+
+
+def test_expiring_within(manager):
+    now = time.time()
+    manager.write_cookies("linuxdo", [cookie("_t", now + 2 * DAY)])
+    manager.write_cookies("openi_bob", [cookie("i_like_openi", now + 20 * DAY)])
+    assert [name for name, _ in manager.expiring_within(3)] == ["linuxdo"]
+    assert manager.expiring_within(3, site="openi") == []
+
+
+def write_json(tmp_path, site_name, cookies, saved_at):
+    payload = {"cookies": cookies, "saved_at": saved_at.isoformat()}
+    (tmp_path / f"{site_name}_cookies.json").write_text(json.dumps(payload), encoding="utf-8")
+
+
+def test_saved_age_fallback(tmp_path):
+    manager = CookieManager(base_dir=tmp_path, backend="json")
+    write_json(tmp_path, "openi_old", [cookie("i_like_openi")], datetime.now() - timedelta(days=10))
+    assert manager.read_cookies("openi_old", 30) is not None
+    assert manager.read_cookies("openi_old", 7) is None
+    assert not manager.has_cookies("openi_old")
+
+
+def test_needs_refresh(tmp_path):
+    from refresh_all_cookies import needs_refresh
+
+    manager = CookieManager(base_dir=tmp_path, backend="json")
+    now = time.time()
+    assert needs_refresh(manager, "linuxdo")  # 从未保存
+
+    manager.write_cookies("linuxdo", [cookie("_t", now + 10 * DAY)])
+    assert not needs_refresh(manager, "linuxdo")
+    manager.write_cookies("linuxdo", [cookie("_t", now + 2 * DAY)])
+    assert needs_refresh(manager, "linuxdo")
+
+    # 没有真实过期时间时按保存天数判断
+    write_json(tmp_path, "openi_a", [cookie("i_like_openi")], datetime.now() - timedelta(days=5))
+    write_json(tmp_path, "openi_b", [cookie("i_like_openi")], datetime.now() - timedelta(days=25))
+    assert not needs_refresh(manager, "openi_a")
+    assert needs_refresh(manager, "openi_b")
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import io
+import os
+import time
+
+import pytest
+
+from src.core.executor import ProcessRunner, ProgressLine, get_context, load_group_caps, parse_group_caps
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+def fail(_value) -> None:
+    raise ValueError("bad input")
+
+
+def sleep_for(item):
+    _group, seconds = item
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def crash(_value) -> None:
+    os._exit(3)
+
+
+def set_marker(value: str) -> None:
+    os.environ["AUTO_TEST_MARKER"] = value
+
+
+def read_marker(_item) -> str:
+    return os.environ.get("AUTO_TEST_MARKER", "")
+
+
+def test_workers_do_not_fork_the_parent():
+    assert get_context().get_start_method() in ("forkserver", "spawn")
+
+
+def test_results_and_errors():
+    results = {r.item: r for r in ProcessRunner(max_workers=2).run(square, [1, 2, 3])}
+    assert {item: r.value for item, r in results.items()} == {1: 1, 2: 4, 3: 9}
+    assert all(r.ok for r in results.values())
+
+    [failed] = list(ProcessRunner().run(fail, [1]))
+    assert not failed.ok
+    assert failed.error == "ValueError: bad input"
+
+    [crashed] = list(ProcessRunner().run(crash, [1]))
+    assert not crashed.ok and "exitcode=3" in crashed.error
+
+
+def test_timeout_kills_slow_task():
+    started = time.monotonic()
+    results = {r.item[1]: r for r in ProcessRunner(max_workers=2, timeout=1).run(sleep_for, [("a", 30), ("a", 0)])}
+    assert time.monotonic() - started < 15
+    assert results[30].timed_out and not results[30].ok
+    assert results[0].ok
+
+
+def test_group_caps_limit_concurrency_per_group():
+    items = [("slow", 0.5), ("slow", 0.5), ("fast", 0)]
+    runner = ProcessRunner(max_workers=3, group_caps={"slow": 1})
+    order = [r.item for r in runner.run(sleep_for, items, group=lambda item: item[0])]
+    # 受限分组串行执行，其他分组的任务补位先完成
+    assert order[0] == ("fast", 0)
+    assert order[1:] == [("slow", 0.5), ("slow", 0.5)]
+
+
+def test_initargs_callable_is_evaluated_per_process():
+    values = iter(["first", "second"])
+    runner = ProcessRunner(max_workers=1, initializer=set_marker, initargs=lambda: (next(values),))
+    assert [r.value for r in runner.run(read_marker, [1, 2])] == ["first", "second"]
+
+
+def test_parse_group_caps():
+    assert parse_group_caps(["OpenI=4", "linuxdo=1"]) == {"openi": 4, "linuxdo": 1}
+    assert parse_group_caps(None) == {}
+    for value in ("openi", "openi=x", "=2"):
+        with pytest.raises(ValueError):
+            parse_group_caps([value])
+
+
+def test_load_group_caps_overrides_win():
+    assert load_group_caps([], {"openi": 2})["openi"] == 2
+
+
+def test_progress_line_renders_labels():
+    stream = io.StringIO()
+    stream.isatty = lambda: True
+    progress = ProgressLine(5, stream)
+    progress.update(3, ok=2, failed=1, running=1, custom=7)
+    progress.finish()
+    text = stream.getvalue()
+    assert text.startswith("\r[3/5] 成功=2 失败=1 运行中=1 custom=7 ")
+    assert text.endswith("\n")
+
+
+def test_progress_line_is_silent_off_terminal():
+    stream = io.StringIO()
+    progress = ProgressLine(1, stream)
+    progress.update(1, ok=1)
+    progress.finish()
+    assert stream.getvalue() == ""
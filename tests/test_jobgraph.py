@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.core.jobgraph import Job, JobGraph, summarize
+
+
+def make_job(key, site="site", *, ok=True, delay=0.0, log=None, depends_on=(), require_success=False, publish=None,
+             seen=None, active=None):
+    async def run(context):
+        if log is not None:
+            log.append(("start", key))
+        if seen is not None:
+            seen[key] = dict(context.inputs)
+        if active is not None:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(delay)
+        if active is not None:
+            active["now"] -= 1
+        if publish is not None:
+            context.publish(publish)
+        if log is not None:
+            log.append(("end", key))
+        if isinstance(ok, Exception):
+            raise ok
+        return ok
+
+    return Job(key=key, site=site, run=run, depends_on=tuple(depends_on), require_success=require_success)
+
+
+def run_graph(jobs, **kwargs):
+    return asyncio.run(JobGraph(jobs, **kwargs).run())
+
+
+def test_dependencies_run_first_and_pass_outputs():
+    log, seen = [], {}
+    jobs = [
+        make_job("anyrouter", depends_on=["linuxdo"], log=log, seen=seen, require_success=True),
+        make_job("linuxdo", delay=0.05, log=log, publish={"cookies": [1]}),
+    ]
+    results = run_graph(jobs)
+    assert [r.key for r in results] == ["anyrouter", "linuxdo"]
+    assert all(r.ok for r in results)
+    assert log.index(("end", "linuxdo")) < log.index(("start", "anyrouter"))
+    assert seen["anyrouter"] == {"linuxdo": {"cookies": [1]}}
+
+
+def test_failed_dependency_skips_or_only_orders():
+    seen = {}
+    jobs = [
+        make_job("base", ok=False, publish="state"),
+        make_job("strict", depends_on=["base"], require_success=True),
+        make_job("loose", depends_on=["base"], seen=seen),
+    ]
+    results = {r.key: r for r in run_graph(jobs)}
+    assert results["base"].status == "failed"
+    assert results["strict"].status == "skipped" and "base" in results["strict"].error
+    assert results["loose"].ok
+    # 失败任务的交付不会传递
+    assert seen["loose"] == {}
+
+
+def test_exceptions_and_timeouts_are_failures():
+    jobs = [make_job("boom", ok=RuntimeError("first line\nsecond line")), make_job("slow", delay=5)]
+    results = {r.key: r for r in run_graph(jobs, timeout=0.2)}
+    assert results["boom"].error == "RuntimeError: first line"
+    assert results["slow"].status == "failed" and "超时" in results["slow"].error
+
+
+def test_concurrency_and_site_caps():
+    active = {"now": 0, "peak": 0}
+    jobs = [make_job(f"a{i}", site="a", delay=0.05, active=active) for i in range(4)]
+    run_graph(jobs, concurrency=4, site_caps={"a": 2})
+    assert active["peak"] == 2
+
+    active = {"now": 0, "peak": 0}
+    jobs = [make_job(f"j{i}", site=f"s{i}", delay=0.05, active=active) for i in range(5)]
+    run_graph(jobs, concurrency=3)
+    assert active["peak"] == 3
+
+
+@pytest.mark.parametrize(
+    "jobs, message",
+    [
+        ([make_job("a"), make_job("a")], "重复"),
+        ([make_job("a", depends_on=["missing"])], "不存在"),
+        ([make_job("a", depends_on=["b"]), make_job("b", depends_on=["a"])], "环"),
+    ],
+)
+def test_invalid_graphs_are_rejected(jobs, message):
+    with pytest.raises(ValueError, match=message):
+        JobGraph(jobs)
+
+
+def test_summarize_counts_statuses():
+    results = run_graph([make_job("ok"), make_job("bad", ok=False), make_job("skip", depends_on=["bad"],
+                                                                             require_success=True)])
+    summary = summarize(results, duration=1.23456)
+    assert (summary["total"], summary["ok"], summary["failed"], summary["skipped"]) == (3, 1, 1, 1)
+    assert summary["duration"] == 1.235
+    assert [job["key"] for job in summary["jobs"]] == ["ok", "bad", "skip"]
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def run_snippet(code: str, tmp_path: Path, queue_mode: str = "1") -> subprocess.CompletedProcess:
+    """日志模块持有进程级状态，在独立进程中运行以免影响其他测试。"""
+    env = {**os.environ, "AUTO_DATA_DIR": str(tmp_path), "AUTO_LOG_QUEUE": queue_mode, "PYTHONPATH": str(ROOT)}
+    return subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=str(tmp_path),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+
+
+def messages(path: Path) -> list:
+    return [line.split(" - ", 2)[2] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.parametrize("queue_mode", ["1", "0"])
+def test_parent_and_child_loggers_write_once(tmp_path, queue_mode):
+    run_snippet(
+        f"""
+        from src.core.logger import setup_logger
+        parent = setup_logger("site", r"{tmp_path}/site.log")
+        child = setup_logger("site.runner", r"{tmp_path}/site.log")
+        other = setup_logger("site.popup", r"{tmp_path}/popup.log")
+        child.info("child %s", 1)
+        parent.info("parent")
+        other.info("popup")
+        """,
+        tmp_path,
+        queue_mode,
+    )
+    assert messages(tmp_path / "site.log") == ["child 1", "parent"]
+    assert messages(tmp_path / "popup.log") == ["popup"]
+
+
+def test_records_after_shutdown_are_not_lost(tmp_path):
+    result = run_snippet(
+        f"""
+        from src.core.logger import setup_logger, shutdown_logging
+        logger = setup_logger("app", r"{tmp_path}/app.log")
+        logger.info("before")
+        shutdown_logging()
+        logger.info("after %s", "shutdown")
+        setup_logger("late", r"{tmp_path}/app.log").info("late logger")
+        print("summary", flush=True)
+        """,
+        tmp_path,
+    )
+    assert messages(tmp_path / "app.log") == ["before", "after shutdown", "late logger"]
+    assert result.stdout.splitlines()[0].endswith("before")
+
+
+def test_level_filtered_records_are_not_formatted(tmp_path):
+    run_snippet(
+        f"""
+        from src.core.logger import setup_logger
+
+        class Boom:
+            def __str__(self):
+                raise AssertionError("formatted")
+
+        logger = setup_logger("lazy", r"{tmp_path}/lazy.log")
+        logger.debug("value=%s", Boom())
+        logger.info("done")
+        """,
+        tmp_path,
+    )
+    assert messages(tmp_path / "lazy.log") == ["done"]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.core.probe import CookieProbe, ProbeSpec, get_probe_spec, merge_set_cookies
+
+COOKIES = [{"name": "session", "value": "abc", "domain": "127.0.0.1", "path": "/"}]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server 约定
+        time.sleep(self.delay)
+        if self.path == "/redirect":
+            self._send(302, b"", Location="/user/login?redirect=/")
+        elif self.path == "/unauthorized":
+            self._send(401, b"{}")
+        elif self.path == "/challenge":
+            self._send(200, b"<title>Just a moment</title> New-Api-User")
+        elif self.path == "/refresh":
+            self._send(200, b'{"current_user": {}}', **{"Set-Cookie": "session=new; Max-Age=3600; Path=/"})
+        else:
+            cookie = self.headers.get("Cookie", "")
+            self._send(200, b'{"current_user": {}}' if "session=abc" in cookie else b"{}")
+
+    def _send(self, status: int, body: bytes, **headers: str) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    _Handler.delay = 0.0
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def spec(base: str, path: str = "/ok", **kwargs) -> ProbeSpec:
+    kwargs.setdefault("valid_markers", ('"current_user"',))
+    kwargs.setdefault("invalid_redirects", ("/user/login",))
+    return ProbeSpec(url=base + path, **kwargs)
+
+
+def test_probe_verdicts(server):
+    probe = CookieProbe(timeout=5)
+    try:
+        assert probe.probe(spec(server), COOKIES) is True
+        assert probe.probe(spec(server), [dict(COOKIES[0], value="other")]) is None
+        assert probe.probe(spec(server, "/redirect"), COOKIES) is False
+        assert probe.probe(spec(server, "/unauthorized"), COOKIES) is False
+        assert probe.probe(spec(server, "/challenge", inconclusive_markers=("New-Api-User",)), COOKIES) is None
+        # 没有可发送的 Cookie 时直接判定失效，不发请求
+        assert probe.probe(spec(server), [dict(COOKIES[0], domain="example.com")]) is False
+    finally:
+        probe.close()
+
+
+def test_probe_unreachable_is_inconclusive():
+    probe = CookieProbe(timeout=1)
+    assert probe.probe(ProbeSpec(url="http://127.0.0.1:9/ok"), COOKIES) is None
+
+
+def test_probes_run_concurrently(server):
+    _Handler.delay = 0.3
+    probe = CookieProbe(timeout=5)
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            verdicts = list(pool.map(lambda _i: probe.probe(spec(server), COOKIES), range(4)))
+    finally:
+        probe.close()
+    assert verdicts == [True] * 4
+    # 串行需要 1.2s；共享探测器不应把网络请求串行化
+    assert time.monotonic() - started < 0.9
+
+
+def test_probe_reuses_connections(server):
+    probe = CookieProbe(timeout=5)
+    try:
+        for _ in range(3):
+            assert probe.probe(spec(server), COOKIES) is True
+        assert sum(len(pool) for pool in probe._idle.values()) == 1
+    finally:
+        probe.close()
+    assert not probe._idle
+
+
+def test_set_cookie_updates_are_merged(server):
+    probe = CookieProbe(timeout=5)
+    try:
+        verdict, updates = probe.check(spec(server, "/refresh"), COOKIES)
+    finally:
+        probe.close()
+    assert verdict is True
+    cookies = [dict(COOKIES[0])]
+    assert merge_set_cookies(cookies, updates)
+    assert cookies[0]["value"] == "new"
+    assert cookies[0]["expires"] > time.time()
+    assert not merge_set_cookies(cookies, updates)
+
+
+def test_get_probe_spec_strips_account_suffix():
+    assert get_probe_spec("openi_alice") is get_probe_spec("openi")
+    assert get_probe_spec("unknown") is None
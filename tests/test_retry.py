@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import pytest
+
+from src.core import retry
+from src.core.retry import (
+    AUTH_REJECTED,
+    CHALLENGE_PAGE,
+    CIRCUIT_OPEN,
+    SELECTOR_NOT_FOUND,
+    TIMEOUT,
+    UNKNOWN,
+    CircuitBreaker,
+    RetryPolicy,
+    classify_error,
+    classify_page,
+    run_with_retry,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeLocator:
+    def __init__(self, count: int) -> None:
+        self._count = count
+
+    def count(self) -> int:
+        return self._count
+
+
+class FakePage:
+    def __init__(self, url="https://example.com/login", title="登录", html="", password=True, challenge=False):
+        self.url = url
+        self._title = title
+        self._html = html
+        self._password = password
+        self._challenge = challenge
+
+    def title(self) -> str:
+        return self._title
+
+    def content(self) -> str:
+        return self._html
+
+    def locator(self, selector: str) -> FakeLocator:
+        if "challenge" in selector:
+            return FakeLocator(1 if self._challenge else 0)
+        return FakeLocator(1 if self._password and "password" in selector else 0)
+
+
+@pytest.mark.parametrize(
+    "exc, expected",
+    [
+        (TimeoutError("navigation timed out"), TIMEOUT),
+        (ConnectionError("connection reset by peer"), TIMEOUT),
+        (RuntimeError("net::ERR_CONNECTION_REFUSED at https://x"), TIMEOUT),
+        (RuntimeError("Timeout 10000ms exceeded.\nwaiting for locator('#user')"), SELECTOR_NOT_FOUND),
+        (RuntimeError("Just a moment..."), CHALLENGE_PAGE),
+        (RuntimeError("HTTP 403 Forbidden"), AUTH_REJECTED),
+        (ValueError("boom"), UNKNOWN),
+    ],
+)
+def test_classify_error(exc, expected):
+    assert classify_error(exc) == expected
+
+
+def test_classify_page_from_final_state():
+    assert classify_page(None) == TIMEOUT
+    assert classify_page(FakePage(url="chrome-error://chromewebdata/")) == TIMEOUT
+    assert classify_page(FakePage(title="Just a moment...")) == CHALLENGE_PAGE
+    assert classify_page(FakePage(challenge=True)) == CHALLENGE_PAGE
+    assert classify_page(FakePage()) == AUTH_REJECTED
+    assert classify_page(FakePage(password=False)) == UNKNOWN
+
+
+def test_classify_page_prefers_swallowed_timeout():
+    # 停在登录表单但原因是等待跳转超时：应可重试，而不是判为凭据被拒
+    error = TimeoutError('waiting for navigation to "**/dashboard"')
+    assert classify_page(FakePage(), error) == TIMEOUT
+    assert classify_page(FakePage(html="<p>用户名或密码不正确</p>"), error) == AUTH_REJECTED
+    # 无法据异常分类时回退到页面状态
+    assert classify_page(FakePage(), ValueError("boom")) == AUTH_REJECTED
+
+
+def test_retry_policy_delay_is_exponential_and_capped():
+    policy = RetryPolicy(attempts=5, base_delay=2.0, max_delay=5.0)
+    assert 2.0 <= policy.delay(1) <= 2.4
+    assert 4.0 <= policy.delay(2) <= 4.8
+    assert 5.0 <= policy.delay(3) <= 6.0
+    assert 5.0 <= policy.delay(10) <= 6.0
+
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker("site", threshold=2, cooldown=60, clock=clock)
+    breaker.record(False, AUTH_REJECTED)
+    breaker.record(False, AUTH_REJECTED)
+    assert breaker.state == "closed"  # 非暂时性失败不计入
+
+    breaker.record(False, TIMEOUT)
+    breaker.record(False, TIMEOUT)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now += 61
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # 半开时只放行一个探测
+
+    breaker.record(True)
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_circuit_breaker_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker("site", threshold=3, cooldown=10, clock=clock)
+    for _ in range(3):
+        breaker.record(False, TIMEOUT)
+    clock.now += 11
+    assert breaker.allow()
+    breaker.record(False, CHALLENGE_PAGE)
+    assert breaker.state == "open"
+
+
+def test_run_with_retry_retries_only_transient_failures():
+    sleeps = []
+    classes = iter([TIMEOUT, CHALLENGE_PAGE])
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        return len(calls) == 3
+
+    outcome = run_with_retry(
+        "site",
+        attempt,
+        failure_class=lambda: next(classes),
+        policy=RetryPolicy(attempts=3, base_delay=1, max_delay=1),
+        breaker=CircuitBreaker("site", threshold=10),
+        sleep=sleeps.append,
+    )
+    assert outcome.ok and outcome.attempts == 3
+    assert len(sleeps) == 2
+
+    calls.clear()
+    outcome = run_with_retry(
+        "site",
+        attempt,
+        failure_class=lambda: AUTH_REJECTED,
+        policy=RetryPolicy(attempts=3, base_delay=1, max_delay=1),
+        breaker=CircuitBreaker("site", threshold=10),
+        sleep=sleeps.append,
+    )
+    assert not outcome.ok and outcome.attempts == 1
+    assert outcome.error_class == AUTH_REJECTED
+
+
+def test_run_with_retry_classifies_exceptions_and_stops_at_open_breaker():
+    breaker = CircuitBreaker("site", threshold=1, cooldown=60)
+
+    def attempt():
+        raise TimeoutError("timed out")
+
+    outcome = run_with_retry("site", attempt, policy=RetryPolicy(attempts=3), breaker=breaker, sleep=lambda _s: None)
+    assert not outcome.ok
+    assert outcome.error_class == CIRCUIT_OPEN
+    assert outcome.attempts == 1
+    assert outcome.error == "TimeoutError: timed out"
+
+
+def test_export_and_restore_breakers(monkeypatch):
+    monkeypatch.setattr(retry, "_BREAKERS", {})
+    monkeypatch.setattr(retry, "_site_options", lambda site, key: {"threshold": 1, "cooldown": 300})
+    retry.get_circuit_breaker("openi").record(False, TIMEOUT)
+    snapshot = retry.export_breakers()
+    assert snapshot["openi"][0] == 1 and snapshot["openi"][1] is not None
+
+    # 模拟子进程：全新的熔断器表按快照恢复
+    monkeypatch.setattr(retry, "_BREAKERS", {})
+    retry.restore_breakers(snapshot)
+    assert retry.get_circuit_breaker("openi").state == "open"
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from src.core.routing import DEFAULT_DENY, ResourcePolicy, RouteStats
+
+
+def test_default_policy_blocks_heavy_types_and_trackers():
+    policy = ResourcePolicy()
+    assert policy.should_block("https://git.openi.org.cn/logo.png", "image")
+    assert policy.should_block("https://fonts.example.com/a.woff2", "font")
+    assert policy.should_block("https://hm.baidu.com/hm.js", "script")
+    assert not policy.should_block("https://git.openi.org.cn/user/login", "document")
+    assert not policy.should_block("https://git.openi.org.cn/app.js", "script")
+
+
+def test_allow_wins_over_deny_and_types():
+    policy = ResourcePolicy.from_config({"allow": ["/captcha"], "deny": ["/ads/"]})
+    assert not policy.should_block("https://site/captcha.png", "image")
+    assert policy.should_block("https://site/ads/banner.js", "script")
+    assert set(DEFAULT_DENY) <= set(policy.deny)
+
+
+def test_from_config():
+    assert ResourcePolicy.from_config(True) == ResourcePolicy()
+    assert ResourcePolicy.from_config(False) is None
+    assert ResourcePolicy.from_config(None) is None
+    assert ResourcePolicy.from_config({"enabled": False}) is None
+    policy = ResourcePolicy.from_config({"types": ["media"], "headless_only": False})
+    assert policy.block_types == frozenset({"media"})
+    assert not policy.should_block("https://site/a.png", "image")
+    assert policy.applies_to(headless=False)
+    assert not ResourcePolicy().applies_to(headless=False)
+
+
+def test_route_stats_summary():
+    stats = RouteStats()
+    stats.record("image", True)
+    stats.record("document", False)
+    assert (stats.total, stats.blocked, stats.by_type) == (2, 1, {"image": 1})
+    assert "拦截 1/2" in stats.summary()
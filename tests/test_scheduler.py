@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from src.core import ratelimit
+from src.core.cookies import CookieManager
+from src.core.scheduler import Account, RefreshScheduler
+
+DAY = 86400.0
+USERS = [{"site": "openi", "username": f"u{i}", "password": "p"} for i in range(3)]
+
+
+@pytest.fixture
+def cookie_manager(tmp_path):
+    return CookieManager(base_dir=tmp_path, backend="json")
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_LIMITERS", {})
+
+
+def make_scheduler(cookie_manager, refresh=None, **options):
+    options.setdefault("jitter_minutes", 30)
+    return RefreshScheduler(
+        lambda: USERS,
+        refresh=refresh or (lambda _user: True),
+        cookie_manager=cookie_manager,
+        options=options,
+    )
+
+
+def test_predict_uses_session_cookie_expiry(cookie_manager):
+    expires = time.time() + 10 * DAY
+    cookie_manager.write_cookies("openi_u0", [{"name": "i_like_openi", "value": "x", "expires": expires}])
+    scheduler = make_scheduler(cookie_manager, refresh_before_days=3)
+    account = Account(key="openi_u0", site="openi", user=USERS[0])
+
+    basis, due = scheduler.predict(account)
+    assert basis == pytest.approx(expires)
+    assert expires - 3 * DAY - 30 * 60 <= due <= expires - 3 * DAY
+    # 抖动以账号与依据时间为种子：重复预测结果一致
+    assert scheduler.predict(account) == (basis, due)
+
+
+def test_predict_spreads_accounts_without_cookies(cookie_manager):
+    scheduler = make_scheduler(cookie_manager)
+    now = time.time()
+    basis, due = scheduler.predict(Account(key="openi_new", site="openi", user={}))
+    assert basis is None
+    assert now <= due <= time.time() + 30 * 60
+
+
+def test_failed_refresh_backs_off_exponentially(cookie_manager):
+    scheduler = make_scheduler(cookie_manager, retry_minutes=10, max_retry_minutes=25)
+    scheduler.rescan()
+    account = scheduler.accounts["openi_u0"]
+    delays = []
+    for _ in range(3):
+        account.running = True
+        future: Future = Future()
+        future.set_result(False)
+        before = time.time()
+        scheduler._on_done(account, future)
+        delays.append(account.due - before)
+    assert delays[0] == pytest.approx(600, abs=2)
+    assert delays[1] == pytest.approx(1200, abs=2)
+    assert delays[2] == pytest.approx(1500, abs=2)
+    assert account.failures == 3 and not account.running
+
+
+def test_cancelled_refresh_is_not_a_failure(cookie_manager):
+    scheduler = make_scheduler(cookie_manager)
+    scheduler.rescan()
+    account = scheduler.accounts["openi_u0"]
+    account.running = True
+    scheduler._running["openi"] = 1
+    version = account.version
+    future: Future = Future()
+    future.cancel()
+    scheduler._on_done(account, future)
+    assert not account.running
+    assert account.failures == 0
+    assert account.version == version
+    assert scheduler._running["openi"] == 0
+
+
+def test_stop_skips_refresh_waiting_on_rate_limiter(cookie_manager):
+    calls = []
+    scheduler = make_scheduler(cookie_manager, refresh=calls.append, jitter_minutes=0, max_workers=3)
+    limiter = ratelimit.get_rate_limiter("openi", {"min_interval": 0, "max_concurrent": 1})
+    limiter.acquire()  # 站点名额被占用：已提交的刷新阻塞在限流器上
+    thread = threading.Thread(target=scheduler.run_forever, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not any(a.running for a in scheduler.accounts.values()) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert any(a.running for a in scheduler.accounts.values())
+        scheduler.stop()
+    finally:
+        limiter.release()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert calls == []
+    assert not any(a.running for a in scheduler.accounts.values())